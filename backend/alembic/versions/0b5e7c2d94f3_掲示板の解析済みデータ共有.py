@@ -0,0 +1,36 @@
+"""掲示板の解析済みデータ共有
+
+Revision ID: 0b5e7c2d94f3
+Revises: f1d8b3e5a702
+Create Date: 2025-06-23 11:07:42.659318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b5e7c2d94f3'
+down_revision: Union[str, None] = 'f1d8b3e5a702'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('bulletin_posts', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('bulletin_posts', sa.Column('content_source_id', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_bulletin_posts_content_hash'), 'bulletin_posts', ['content_hash'], unique=False)
+    op.create_foreign_key(
+        'bulletin_posts_content_source_id_fkey', 'bulletin_posts', 'bulletin_posts', ['content_source_id'], ['id']
+    )
+    op.add_column('bulletin_jobs', sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('bulletin_jobs', 'content_hash')
+    op.drop_constraint('bulletin_posts_content_source_id_fkey', 'bulletin_posts', type_='foreignkey')
+    op.drop_index(op.f('ix_bulletin_posts_content_hash'), table_name='bulletin_posts')
+    op.drop_column('bulletin_posts', 'content_source_id')
+    op.drop_column('bulletin_posts', 'content_hash')
@@ -0,0 +1,92 @@
+"""セルスタイルの重複排除
+
+Revision ID: 3f9d2c8b71a4
+Revises: 85f6f40a7b55
+Create Date: 2025-06-14 10:21:37.412905
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import hashlib
+import json
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9d2c8b71a4'
+down_revision: Union[str, None] = '85f6f40a7b55'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# このリビジョン時点のスタイルの同一性判定に使うカラム（アプリのモデルが変わってもマイグレーションの動作を変えない）
+STYLE_COLUMNS = [
+    'font_bold', 'font_color', 'font_size', 'bg_color',
+    'border_top_style', 'border_top_color', 'border_right_style', 'border_right_color',
+    'border_bottom_style', 'border_bottom_color', 'border_left_style', 'border_left_color',
+    'alignment_horizontal', 'alignment_vertical'
+]
+
+
+# スタイルのハッシュ（このリビジョン時点のCellStyle.compute_hashと同じ計算）
+def compute_style_hash(style) -> str:
+    payload = json.dumps([style.get(column) for column in STYLE_COLUMNS])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def upgrade() -> None:
+    op.add_column('bulletin_cells', sa.Column('style_id', sa.Integer(), nullable=True))
+    op.add_column('cell_styles', sa.Column('style_hash', sa.String(length=64), nullable=True))
+
+    # まず各セルから自身のスタイル行を参照させる
+    bind = op.get_bind()
+    bind.execute(sa.text(
+        "UPDATE bulletin_cells c SET style_id = s.id FROM cell_styles s WHERE s.cell_id = c.id"
+    ))
+
+    # 既存のスタイルをハッシュでまとめ、重複分の参照を代表スタイルへ付け替える
+    rows = bind.execute(sa.text(
+        "SELECT id, " + ", ".join(STYLE_COLUMNS) + " FROM cell_styles ORDER BY id"
+    )).mappings().all()
+
+    groups = {}
+    for row in rows:
+        groups.setdefault(compute_style_hash(row), []).append(row['id'])
+
+    for style_hash, (canonical_id, *duplicate_ids) in groups.items():
+        bind.execute(sa.text("UPDATE cell_styles SET style_hash = :hash WHERE id = :id"),
+                     {"hash": style_hash, "id": canonical_id})
+        if duplicate_ids:
+            bind.execute(sa.text("UPDATE bulletin_cells SET style_id = :id WHERE style_id = ANY(:ids)"),
+                         {"id": canonical_id, "ids": duplicate_ids})
+            bind.execute(sa.text("DELETE FROM cell_styles WHERE id = ANY(:ids)"), {"ids": duplicate_ids})
+
+    op.drop_constraint('cell_styles_cell_id_fkey', 'cell_styles', type_='foreignkey')
+    op.drop_constraint('cell_styles_cell_id_key', 'cell_styles', type_='unique')
+    op.drop_column('cell_styles', 'cell_id')
+    op.alter_column('cell_styles', 'style_hash', nullable=False)
+    op.create_unique_constraint('cell_styles_style_hash_key', 'cell_styles', ['style_hash'])
+    op.create_foreign_key('bulletin_cells_style_id_fkey', 'bulletin_cells', 'cell_styles', ['style_id'], ['id'])
+
+
+def downgrade() -> None:
+    op.add_column('cell_styles', sa.Column('cell_id', sa.Integer(), nullable=True))
+
+    # 共有スタイルをセルごとの行に展開し直す
+    bind = op.get_bind()
+    columns = ", ".join(STYLE_COLUMNS)
+    source_columns = ", ".join(f"s.{column}" for column in STYLE_COLUMNS)
+    bind.execute(sa.text(
+        f"INSERT INTO cell_styles (cell_id, style_hash, {columns}) "
+        f"SELECT c.id, md5(s.style_hash || c.id::text), {source_columns} "
+        f"FROM bulletin_cells c JOIN cell_styles s ON s.id = c.style_id"
+    ))
+    op.drop_constraint('bulletin_cells_style_id_fkey', 'bulletin_cells', type_='foreignkey')
+    bind.execute(sa.text("DELETE FROM cell_styles WHERE cell_id IS NULL"))
+
+    op.drop_column('bulletin_cells', 'style_id')
+    op.drop_constraint('cell_styles_style_hash_key', 'cell_styles', type_='unique')
+    op.drop_column('cell_styles', 'style_hash')
+    op.alter_column('cell_styles', 'cell_id', nullable=False)
+    op.create_unique_constraint('cell_styles_cell_id_key', 'cell_styles', ['cell_id'])
+    op.create_foreign_key('cell_styles_cell_id_fkey', 'cell_styles', 'bulletin_cells', ['cell_id'], ['id'])
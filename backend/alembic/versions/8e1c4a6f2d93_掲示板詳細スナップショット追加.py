@@ -0,0 +1,40 @@
+"""掲示板詳細スナップショット追加
+
+Revision ID: 8e1c4a6f2d93
+Revises: 3f9d2c8b71a4
+Create Date: 2025-06-15 09:42:18.530127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e1c4a6f2d93'
+down_revision: Union[str, None] = '3f9d2c8b71a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'bulletin_snapshots',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('bulletin_id', sa.Integer(), nullable=False),
+        sa.Column('format', sa.String(length=16), nullable=False),
+        sa.Column('post_updated_at', sa.DateTime(), nullable=False),
+        sa.Column('etag', sa.String(length=64), nullable=False),
+        sa.Column('payload', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['bulletin_id'], ['bulletin_posts.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('bulletin_id', 'format', name='uix_bulletin_snapshot')
+    )
+    op.create_index(op.f('ix_bulletin_snapshots_id'), 'bulletin_snapshots', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_bulletin_snapshots_id'), table_name='bulletin_snapshots')
+    op.drop_table('bulletin_snapshots')
@@ -0,0 +1,90 @@
+"""掲示板画像をハッシュ保存に変更
+
+Revision ID: b72e5d19c0a8
+Revises: 8e1c4a6f2d93
+Create Date: 2025-06-16 14:05:51.208344
+
+"""
+import base64
+import hashlib
+import os
+import tempfile
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b72e5d19c0a8'
+down_revision: Union[str, None] = '8e1c4a6f2d93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 画像ストアの保存先（このリビジョン時点の画像ストアと同じ場所・同じ配置で保存する）
+IMAGE_STORE_DIR = os.environ.get('BULLETIN_IMAGE_DIR', os.path.join('backend', 'storage', 'bulletin_images'))
+
+
+# ハッシュ値から保存先のパスを取得（ハッシュの先頭2文字・次の2文字で2階層に分ける）
+def get_image_path(image_hash: str) -> str:
+    return os.path.join(IMAGE_STORE_DIR, image_hash[:2], image_hash[2:4], image_hash)
+
+
+# 画像データを内容のハッシュ（SHA-256）をファイル名として保存し、ハッシュ値を返す
+def save_image(data: bytes) -> str:
+    image_hash = hashlib.sha256(data).hexdigest()
+    path = get_image_path(image_hash)
+    if os.path.exists(path):
+        return image_hash
+
+    # 書き込み途中のファイルを読まれないよう、一時ファイルに書いてから置き換える
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return image_hash
+
+
+def upgrade() -> None:
+    op.add_column('bulletin_images', sa.Column('image_hash', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_bulletin_images_image_hash'), 'bulletin_images', ['image_hash'], unique=False)
+
+    # Base64で保存されている画像を画像ストアへ移し、DBからは削除する
+    bind = op.get_bind()
+    image_ids = bind.execute(sa.text(
+        "SELECT id FROM bulletin_images WHERE image_data IS NOT NULL ORDER BY id"
+    )).scalars().all()
+
+    for image_id in image_ids:
+        image_data = bind.execute(sa.text(
+            "SELECT image_data FROM bulletin_images WHERE id = :id"
+        ), {"id": image_id}).scalar()
+        image_hash = save_image(base64.b64decode(image_data))
+        bind.execute(sa.text(
+            "UPDATE bulletin_images SET image_hash = :hash, image_data = NULL WHERE id = :id"
+        ), {"hash": image_hash, "id": image_id})
+
+
+def downgrade() -> None:
+    # 画像ストアの画像をBase64に戻す
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT id, image_hash FROM bulletin_images WHERE image_hash IS NOT NULL ORDER BY id"
+    )).all()
+
+    for image_id, image_hash in rows:
+        with open(get_image_path(image_hash), 'rb') as image_file:
+            image_data = base64.b64encode(image_file.read()).decode('utf-8')
+        bind.execute(sa.text(
+            "UPDATE bulletin_images SET image_data = :data WHERE id = :id"
+        ), {"data": image_data, "id": image_id})
+
+    op.drop_index(op.f('ix_bulletin_images_image_hash'), table_name='bulletin_images')
+    op.drop_column('bulletin_images', 'image_hash')
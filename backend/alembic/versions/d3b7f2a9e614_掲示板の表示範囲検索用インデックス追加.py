@@ -0,0 +1,29 @@
+"""掲示板の表示範囲検索用インデックス追加
+
+Revision ID: d3b7f2a9e614
+Revises: c4e8a1f7b320
+Create Date: 2025-06-19 14:22:08.517390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3b7f2a9e614'
+down_revision: Union[str, None] = 'c4e8a1f7b320'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # セルは uix_cell_position (bulletin_id, row, col) のインデックスで範囲検索できるため追加しない
+    op.create_index('ix_bulletin_merges_position', 'bulletin_merges', ['bulletin_id', 'start_row'], unique=False)
+    op.create_index('ix_bulletin_images_position', 'bulletin_images', ['bulletin_id', 'from_row'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_bulletin_images_position', table_name='bulletin_images')
+    op.drop_index('ix_bulletin_merges_position', table_name='bulletin_merges')
@@ -0,0 +1,31 @@
+"""掲示板セル値の検索用インデックス追加
+
+Revision ID: e6a1c9d4b857
+Revises: d3b7f2a9e614
+Create Date: 2025-06-20 09:48:36.102754
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6a1c9d4b857'
+down_revision: Union[str, None] = 'd3b7f2a9e614'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 日本語は空白で単語が区切られないため、tsvectorではなくトライグラムで部分一致を検索する
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_bulletin_cells_value_trgm', 'bulletin_cells', ['value'], unique=False,
+        postgresql_using='gin', postgresql_ops={'value': 'gin_trgm_ops'}
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_bulletin_cells_value_trgm', table_name='bulletin_cells')
@@ -0,0 +1,26 @@
+"""掲示板一覧のページング用インデックス追加
+
+Revision ID: f1d8b3e5a702
+Revises: e6a1c9d4b857
+Create Date: 2025-06-20 16:31:54.884210
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1d8b3e5a702'
+down_revision: Union[str, None] = 'e6a1c9d4b857'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_bulletin_posts_created_at_id', 'bulletin_posts', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_bulletin_posts_created_at_id', table_name='bulletin_posts')
@@ -0,0 +1,187 @@
+from sqlalchemy import Select, Text, case, cast, func, select, true
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+from backend.api.general.models import Employee
+from backend.api.all.models import BulletinPost, BulletinCell, CellStyle, BulletinMerge
+from backend.api.all.models import BulletinColumnDimension, BulletinRowDimension, BulletinImage
+from backend.api.all.bulletin_board import image_store
+
+# 掲示板詳細のJSONをPostgreSQL側で組み立てるクエリ
+# 投稿・セル・スタイル・結合・行列サイズ・画像を1回の問い合わせでまとめ、ORMオブジェクトを作らずにJSON文字列として受け取る
+# キーの順序を保つため、jsonbではなくjson型の関数を使う（構造はexcel_service.get_bulletin_detailと同じ）
+
+
+# 詳細JSON（文字列）と投稿のupdated_atを返すクエリを作成する
+# compact=Trueの場合、セルを列指向の配列とスタイルパレットで返す
+def build_detail_query(bulletin_id: int, thumbnail_variant: str, compact: bool = False) -> Select:
+    # 解析済みデータを共有している場合は共有元の投稿のデータを集計する
+    data_id = (
+        select(func.coalesce(BulletinPost.content_source_id, BulletinPost.id))
+        .where(BulletinPost.id == bulletin_id)
+        .correlate(None)
+        .scalar_subquery()
+    )
+
+    if compact:
+        cells, styles = _compact_cells_subqueries(data_id)
+    else:
+        cells, styles = _cells_subquery(data_id), None
+
+    fields = [
+        "id", BulletinPost.id,
+        "title", BulletinPost.title,
+        "content", BulletinPost.content,
+        "employee_id", BulletinPost.employee_id,
+        "employee_name", Employee.name,
+        "created_at", BulletinPost.created_at,
+        "updated_at", BulletinPost.updated_at,
+        "filename", BulletinPost.filename,
+        "cells", cells,
+        "merges", _merges_subquery(data_id),
+        "column_dimensions", _dimensions_subquery(
+            BulletinColumnDimension, BulletinColumnDimension.col, BulletinColumnDimension.width, data_id
+        ),
+        "row_dimensions", _dimensions_subquery(
+            BulletinRowDimension, BulletinRowDimension.row, BulletinRowDimension.height, data_id
+        ),
+        "images", _images_subquery(data_id, thumbnail_variant),
+        "exists", true(),
+        "parsed_at", BulletinPost.updated_at  # 同じ内容からは同じスナップショット（ETag）になるよう、投稿の更新日時とする
+    ]
+    if compact:
+        fields += ["styles", styles, "format", "compact"]
+
+    # psycopg2がjson型を辞書に変換しないよう、文字列として受け取る
+    return (
+        select(cast(func.json_build_object(*fields), Text).label("detail"), BulletinPost.updated_at)
+        .select_from(BulletinPost)
+        .outerjoin(Employee, Employee.id == BulletinPost.employee_id)
+        .where(BulletinPost.id == bulletin_id)
+    )
+
+
+# セル（スタイルを含む）の配列
+def _cells_subquery(data_id):
+    # スタイルのないセルにはstyleキーを含めない
+    position = ["row", BulletinCell.row, "col", BulletinCell.col, "value", BulletinCell.value]
+    cell = case(
+        (CellStyle.id.is_(None), func.json_build_object(*position)),
+        else_=func.json_build_object(*position, "style", _style_object(CellStyle))
+    )
+
+    return _json_array(
+        select(func.json_agg(aggregate_order_by(cell, BulletinCell.row, BulletinCell.col)))
+        .select_from(BulletinCell)
+        .outerjoin(CellStyle, CellStyle.id == BulletinCell.style_id)
+        .where(BulletinCell.bulletin_id == data_id)
+    )
+
+
+# 列指向のセル配列とスタイルパレット（パレット番号はスタイルIDの昇順）
+def _compact_cells_subqueries(data_id):
+    used_style_ids = (
+        select(BulletinCell.style_id)
+        .where(BulletinCell.bulletin_id == data_id, BulletinCell.style_id.isnot(None))
+        .distinct()
+    )
+    palette = (
+        select(CellStyle, (func.row_number().over(order_by=CellStyle.id) - 1).label("palette_index"))
+        .where(CellStyle.id.in_(used_style_ids))
+        .cte("palette")
+    )
+
+    def column_array(column):
+        return func.coalesce(
+            func.json_agg(aggregate_order_by(column, BulletinCell.row, BulletinCell.col)), func.json_build_array()
+        )
+
+    cells = (
+        select(func.json_build_object(
+            "rows", column_array(BulletinCell.row),
+            "cols", column_array(BulletinCell.col),
+            "values", column_array(BulletinCell.value),
+            "styles", column_array(palette.c.palette_index)
+        ))
+        .select_from(BulletinCell)
+        .outerjoin(palette, palette.c.id == BulletinCell.style_id)
+        .where(BulletinCell.bulletin_id == data_id)
+        .scalar_subquery()
+    )
+
+    styles = _json_array(
+        select(func.json_agg(aggregate_order_by(_style_object(palette.c), palette.c.palette_index)))
+        .select_from(palette)
+    )
+
+    return cells, styles
+
+
+# 結合セルの配列
+def _merges_subquery(data_id):
+    merge = func.json_build_object(
+        "start", func.json_build_object("row", BulletinMerge.start_row, "col", BulletinMerge.start_col),
+        "end", func.json_build_object("row", BulletinMerge.end_row, "col", BulletinMerge.end_col)
+    )
+
+    return _json_array(
+        select(func.json_agg(aggregate_order_by(merge, BulletinMerge.id)))
+        .where(BulletinMerge.bulletin_id == data_id)
+    )
+
+
+# 行・列番号（文字列）をキーとした幅・高さのオブジェクト
+def _dimensions_subquery(model, key_column, value_column, data_id):
+    return func.coalesce(
+        select(func.json_object_agg(cast(key_column, Text), value_column))
+        .where(model.bulletin_id == data_id)
+        .scalar_subquery(),
+        func.json_build_object()
+    )
+
+
+# 画像の配列（画像本体は含めず、画像ストアのURLを返す）
+def _images_subquery(data_id, thumbnail_variant: str):
+    image_url = image_store.IMAGE_URL_PREFIX + "/" + BulletinImage.image_hash
+    image = func.json_build_object(
+        "image_url", image_url,
+        "thumbnail_url", image_url + f"?variant={thumbnail_variant}",
+        "image_type", BulletinImage.image_type,
+        "from_row", BulletinImage.from_row,
+        "from_col", BulletinImage.from_col,
+        "to_row", BulletinImage.to_row,
+        "to_col", BulletinImage.to_col,
+        "width", BulletinImage.width,
+        "height", BulletinImage.height
+    )
+
+    return _json_array(
+        select(func.json_agg(aggregate_order_by(image, BulletinImage.id)))
+        .where(BulletinImage.bulletin_id == data_id)
+    )
+
+
+# スタイルのオブジェクト（excel_service._format_cell_styleと同じ構造）
+def _style_object(columns):
+    def border(side):
+        return func.json_build_object(
+            "style", getattr(columns, f"border_{side}_style"),
+            "color", getattr(columns, f"border_{side}_color")
+        )
+
+    return func.json_build_object(
+        "font", func.json_build_object(
+            "bold", columns.font_bold, "color", columns.font_color, "size", columns.font_size
+        ),
+        "fill", func.json_build_object("bgColor", columns.bg_color),
+        "border", func.json_build_object(
+            "top", border("top"), "right", border("right"), "bottom", border("bottom"), "left", border("left")
+        ),
+        "alignment", func.json_build_object(
+            "horizontal", columns.alignment_horizontal, "vertical", columns.alignment_vertical
+        )
+    )
+
+
+# 集計結果が0件（NULL）の場合は空配列にする
+def _json_array(query: Select):
+    return func.coalesce(query.scalar_subquery(), func.json_build_array())
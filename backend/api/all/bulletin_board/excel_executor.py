@@ -0,0 +1,65 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Optional
+
+# Excelの解析の実行方式
+# thread: スレッドで実行（従来どおり）
+# process: プロセスプールで実行（openpyxlの処理はGILを解放しないため、同時アップロードを複数コアに分散する）
+# ダウンロード用の生成は送信しながら行うため、どちらの場合もスレッドで実行する
+EXECUTOR_THREAD = "thread"
+EXECUTOR_PROCESS = "process"
+EXCEL_EXECUTOR = os.environ.get('BULLETIN_EXCEL_EXECUTOR', EXECUTOR_THREAD)
+
+# プロセスプールのプロセス数
+# プロセスプールはuvicornのワーカーごとに作られるため、既定値はCPU数ではなく少数に抑える
+EXCEL_PROCESS_WORKERS = int(os.environ.get('BULLETIN_EXCEL_PROCESS_WORKERS', 2))
+
+_process_executor: Optional[ProcessPoolExecutor] = None
+
+
+# プロセスプールで実行するかどうか
+def uses_processes() -> bool:
+    return EXCEL_EXECUTOR == EXECUTOR_PROCESS
+
+
+# ワーカープロセス内では入れ子のプロセスプールを作らず、その場で実行する
+def run_inline():
+    global EXCEL_EXECUTOR
+    EXCEL_EXECUTOR = EXECUTOR_THREAD
+
+
+# プロセスプールを取得（初回のみ作成、スレッドを持つ親プロセスをforkしないようspawnで起動）
+def get_process_executor() -> Executor:
+    global _process_executor
+    if _process_executor is None:
+        _process_executor = ProcessPoolExecutor(
+            max_workers=EXCEL_PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker
+        )
+    return _process_executor
+
+
+# ワーカープロセスの初期化（リレーションの解決に必要なモデルを読み込む）
+def init_worker():
+    import backend.api.authority.models  # noqa: F401
+    import backend.api.general.models  # noqa: F401
+    import backend.api.all.models  # noqa: F401
+    run_inline()
+
+
+# 同期処理から呼び出す（プロセスプールの場合は完了まで待機する）
+# 関数はモジュールの最上位で定義し、引数・戻り値はプロセス間で受け渡せる値（ORMオブジェクト以外）とする
+def call(func, *args):
+    if uses_processes():
+        return get_process_executor().submit(func, *args).result()
+    return func(*args)
+
+
+# イベントループから呼び出す（スレッドの場合はイベントループの既定のスレッドプールで実行）
+async def run(func, *args):
+    executor = get_process_executor() if uses_processes() else None
+    return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(func, *args))
@@ -0,0 +1,311 @@
+import logging
+import os
+import pickle
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional
+
+import openpyxl
+from openpyxl.cell.read_only import ReadOnlyCell
+from openpyxl.drawing.spreadsheet_drawing import AbsoluteAnchor, OneCellAnchor, SpreadsheetDrawing, TwoCellAnchor
+from openpyxl.packaging.relationship import get_dependents, get_rels_path
+from openpyxl.utils import column_index_from_string
+from openpyxl.utils.cell import range_boundaries
+from openpyxl.worksheet._reader import WorkSheetParser
+from openpyxl.xml.constants import IMAGE_NS
+from openpyxl.xml.functions import fromstring
+
+logger = logging.getLogger(__name__)
+
+# 描画パーツのリレーションタイプ
+DRAWING_REL_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/drawing"
+
+# 描画パーツの座標単位（EMU）からピクセルへの換算値
+EMU_PER_PIXEL = 9525
+
+# 列幅・行高の既定値とピクセル換算（画面表示と同じ換算を使う）
+DEFAULT_COLUMN_WIDTH = 8.43
+COLUMN_WIDTH_TO_PIXEL = 9
+DEFAULT_ROW_HEIGHT = 20
+
+# シートの最大行・列
+MAX_SHEET_ROW = 1048576
+MAX_SHEET_COL = 16384
+
+# 別プロセスで解析したセルを受け渡す一時ファイルの接頭辞
+CELL_SPILL_PREFIX = 'bulletin-cells-'
+
+
+# xlsxを一度だけ開き、アクティブシートを行単位でストリーム解析するリーダー
+# セル・スタイル・結合・列幅・行高・画像アンカーを1回の走査で取得する
+class ExcelStreamReader:
+
+    def __init__(self, file_data, style_parser):
+        # read_onlyモードではシートXMLを読み込まず、ZIPアーカイブを開いたまま保持する
+        self.workbook = openpyxl.load_workbook(file_data, read_only=True, data_only=True)
+        self.sheet = self.workbook.active
+        self.archive = self.workbook._archive
+        self._style_parser = style_parser
+        self._style_cache: Dict[int, Dict[str, Any]] = {}
+        self._parser: Optional[WorkSheetParser] = None
+
+        self.max_row = 0
+        self.max_col = 0
+        self.merges: List[Dict[str, int]] = []
+        self.column_widths: Dict[int, float] = {}
+        self.row_heights: Dict[int, float] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.workbook.close()
+
+    # シートのdimension要素から取得した行数（記録されていない場合はNone）
+    @property
+    def dimension_rows(self) -> Optional[int]:
+        return self.sheet.max_row
+
+    # 解析済みのスタイル（ブック内のスタイル番号 -> スタイル）
+    @property
+    def styles(self) -> Dict[int, Dict[str, Any]]:
+        return dict(self._style_cache)
+
+    # シートXMLを行単位で解析し、セル情報を1件ずつ返す
+    # 走査完了後に merges / column_widths / row_heights が確定する
+    def iter_cells(self) -> Iterator[Dict[str, Any]]:
+        with self.archive.open(self.sheet._worksheet_path) as src:
+            self._parser = WorkSheetParser(
+                src,
+                self.sheet._shared_strings,
+                data_only=True,
+                epoch=self.workbook.epoch,
+                date_formats=self.workbook._date_formats,
+                timedelta_formats=self.workbook._timedelta_formats
+            )
+
+            for row_idx, row in self._parser.parse():
+                for cell in row:
+                    self.max_row = max(self.max_row, cell['row'])
+                    self.max_col = max(self.max_col, cell['column'])
+                    yield {
+                        'row': cell['row'],
+                        'col': cell['column'],
+                        'value': _format_cell_value(cell['value']),
+                        'style_id': cell['style_id'] or 0,
+                        'style': self._get_style(cell)
+                    }
+
+        self._collect_sheet_properties()
+
+    # スタイルIDごとに解析結果をキャッシュする（同じ書式のセルは解析を1回で済ませる）
+    def _get_style(self, cell) -> Dict[str, Any]:
+        style_id = cell['style_id'] or 0
+        style = self._style_cache.get(style_id)
+        if style is None:
+            read_only_cell = ReadOnlyCell(self.sheet, cell['row'], cell['column'], None, style_id=style_id)
+            style = self._style_parser(read_only_cell)
+            self._style_cache[style_id] = style
+        return style
+
+    # 行走査の完了後にパーサーが蓄積した結合・列幅・行高を整形する
+    def _collect_sheet_properties(self):
+        parser = self._parser
+
+        if parser.merged_cells:
+            for merge_cell in parser.merged_cells.mergeCell:
+                min_col, min_row, max_col, max_row = range_boundaries(merge_cell.ref)
+                self.merges.append({
+                    'start_row': min_row, 'start_col': min_col,
+                    'end_row': max_row, 'end_col': max_col
+                })
+
+        for col_letter, attrs in parser.column_dimensions.items():
+            if attrs.get('width') is None:
+                continue
+            width = float(attrs['width'])
+            min_col = column_index_from_string(col_letter)
+            # <col min max>の範囲指定は使用範囲内に限定して展開する
+            max_col = max(min_col, min(int(attrs.get('max', min_col)), self.max_col))
+            for col in range(min_col, max_col + 1):
+                self.column_widths[col] = width
+
+        for row_idx, attrs in parser.row_dimensions.items():
+            if attrs.get('ht') is not None:
+                self.row_heights[int(row_idx)] = float(attrs['ht'])
+
+    # シートの描画パーツから画像ファイルとアンカー位置を取得する
+    # 2セルアンカーは開始・終了セル、1セルアンカーと絶対位置アンカーは表示サイズからセル範囲を求める
+    # width / height は描画パーツにサイズ指定がある場合のみピクセル値、ない場合はNone
+    # 列幅・行高を使うため iter_cells() の走査後に呼び出す
+    def iter_image_anchors(self) -> Iterator[Dict[str, Any]]:
+        sheet_rels_path = get_rels_path(self.sheet._worksheet_path)
+        if sheet_rels_path not in self.archive.namelist():
+            return
+
+        for drawing_rel in get_dependents(self.archive, sheet_rels_path).find(DRAWING_REL_TYPE):
+            try:
+                drawing = SpreadsheetDrawing.from_tree(fromstring(self.archive.read(drawing_rel.target)))
+            except (KeyError, TypeError) as e:
+                logger.error(f"描画パーツ {drawing_rel.target} の解析中にエラー: {str(e)}")
+                continue
+
+            drawing_rels_path = get_rels_path(drawing_rel.target)
+            if drawing_rels_path not in self.archive.namelist():
+                continue
+            drawing_deps = get_dependents(self.archive, drawing_rels_path)
+
+            for blip in drawing._blip_rels:
+                try:
+                    dep = drawing_deps.get(blip.embed)
+                except KeyError:
+                    continue
+                if dep.Type != IMAGE_NS:
+                    continue
+
+                position = self._resolve_anchor(blip.anchor)
+                if position is None:
+                    continue
+
+                position['path'] = dep.target
+                yield position
+
+    # アンカーの種類ごとに画像の位置（1始まりのセル範囲）とサイズを求める
+    def _resolve_anchor(self, anchor) -> Optional[Dict[str, Any]]:
+        if isinstance(anchor, TwoCellAnchor):
+            # AnchorMarkerは0始まりなので1始まりに変換
+            return {
+                'from_row': anchor._from.row + 1,
+                'from_col': anchor._from.col + 1,
+                'to_row': anchor.to.row + 1,
+                'to_col': anchor.to.col + 1,
+                'width': None,
+                'height': None
+            }
+
+        if anchor.ext is None:
+            return None
+        width = anchor.ext.width / EMU_PER_PIXEL
+        height = anchor.ext.height / EMU_PER_PIXEL
+
+        if isinstance(anchor, OneCellAnchor):
+            from_col = anchor._from.col + 1
+            from_row = anchor._from.row + 1
+            col_offset = anchor._from.colOff / EMU_PER_PIXEL
+            row_offset = anchor._from.rowOff / EMU_PER_PIXEL
+        elif isinstance(anchor, AbsoluteAnchor) and anchor.pos is not None:
+            x = anchor.pos.x / EMU_PER_PIXEL
+            y = anchor.pos.y / EMU_PER_PIXEL
+            from_col, col_offset = self._locate(1, x, self.column_pixels, MAX_SHEET_COL)
+            from_row, row_offset = self._locate(1, y, self.row_pixels, MAX_SHEET_ROW)
+        else:
+            return None
+
+        to_col, _ = self._locate(from_col, col_offset + width, self.column_pixels, MAX_SHEET_COL)
+        to_row, _ = self._locate(from_row, row_offset + height, self.row_pixels, MAX_SHEET_ROW)
+
+        return {
+            'from_row': from_row,
+            'from_col': from_col,
+            'to_row': to_row,
+            'to_col': to_col,
+            'width': width,
+            'height': height
+        }
+
+    # 開始位置からのピクセル距離が含まれる行・列と、その中での残りの距離を返す
+    @staticmethod
+    def _locate(start: int, offset: float, size_of, limit: int):
+        index = start
+        while index < limit and offset > size_of(index):
+            offset -= size_of(index)
+            index += 1
+        return index, offset
+
+    # 列の表示幅（ピクセル）
+    def column_pixels(self, col: int) -> float:
+        return self.column_widths.get(col, DEFAULT_COLUMN_WIDTH) * COLUMN_WIDTH_TO_PIXEL
+
+    # 行の表示高さ（ピクセル）
+    def row_pixels(self, row: int) -> float:
+        return self.row_heights.get(row, DEFAULT_ROW_HEIGHT)
+
+    # ZIP内のファイルを読み込む
+    def read_file(self, path: str) -> bytes:
+        return self.archive.read(path)
+
+    # ZIP内のファイル一覧
+    def namelist(self) -> List[str]:
+        return self.archive.namelist()
+
+
+# 解析したセルを一時ファイルへバッチ単位で書き出し、ファイルのパスを返す（別プロセスでの解析用）
+# 親プロセスにはパスだけを返し、セルはParsedWorkbookがバッチごとに読み出す
+def spill_cells(reader: ExcelStreamReader, batch_size: int) -> str:
+    fd, path = tempfile.mkstemp(prefix=CELL_SPILL_PREFIX)
+    try:
+        with os.fdopen(fd, 'wb') as spill:
+            batch = []
+            for cell in reader.iter_cells():
+                batch.append((cell['row'], cell['col'], cell['value'], cell['style_id']))
+                if len(batch) >= batch_size:
+                    pickle.dump(batch, spill, protocol=pickle.HIGHEST_PROTOCOL)
+                    batch = []
+            if batch:
+                pickle.dump(batch, spill, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+# 別プロセスで解析したワークブックのデータ（プレーンなdict）を、ExcelStreamReaderと同じ形で読み出すラッパー
+# セルはspill_cells()の一時ファイルからバッチ単位で読み出し、閉じるときに一時ファイルを削除する
+# 画像は解析時に画像ストアへ保存済みで、imagesにbulletin_imagesの行データを持つ
+class ParsedWorkbook:
+
+    def __init__(self, data: Dict[str, Any]):
+        self._cells_path = data['cells_path']
+        self._styles = data['styles']
+        self.merges = data['merges']
+        self.column_widths = data['column_widths']
+        self.row_heights = data['row_heights']
+        self.dimension_rows = data['dimension_rows']
+        self.images = data['images']
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        try:
+            os.remove(self._cells_path)
+        except FileNotFoundError:
+            pass
+
+    def iter_cells(self) -> Iterator[Dict[str, Any]]:
+        with open(self._cells_path, 'rb') as spill:
+            while True:
+                try:
+                    batch = pickle.load(spill)
+                except EOFError:
+                    return
+                for row, col, value, style_id in batch:
+                    yield {
+                        'row': row,
+                        'col': col,
+                        'value': value,
+                        'style_id': style_id,
+                        'style': self._styles.get(style_id)
+                    }
+
+
+# セルの値を保存用の文字列に変換
+def _format_cell_value(value) -> Optional[str]:
+    if value is None or value == "":
+        return None
+    return str(value)
@@ -1,25 +1,39 @@
 import io
 import logging
 import unicodedata
-import pandas as pd
 import urllib.parse
 import asyncio
 import base64
 import hashlib
-from typing import Optional, Tuple, Dict, Any, List
+import json
+import os
+from typing import Optional, Tuple, Dict, Any, BinaryIO, Callable, Iterator, List
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
 import re
+import shutil
+import traceback
+import tempfile
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
 
-import openpyxl
 from openpyxl.styles import Border, Side, Alignment, Font, PatternFill
-from openpyxl.utils import get_column_letter
-from sqlalchemy.orm import Session, joinedload
-from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, delete, func, insert, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, defer, joinedload
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from fastapi import HTTPException, status
 
+from backend.models import SessionLocal
+from backend.api.general.models import Employee
 from backend.api.all.models import BulletinPost, BulletinCell, CellStyle, BulletinMerge
-from backend.api.all.models import BulletinColumnDimension, BulletinRowDimension, BulletinImage
+from backend.api.all.models import BulletinColumnDimension, BulletinRowDimension, BulletinImage, BulletinSnapshot
+from backend.api.all.bulletin_board.excel_reader import ExcelStreamReader, ParsedWorkbook, spill_cells
+from backend.api.all.bulletin_board.excel_writer import ExcelStreamWriter
+from backend.api.all.bulletin_board import detail_query, excel_executor, file_cache, image_store
 
 logger = logging.getLogger(__name__)
 
@@ -29,251 +43,64 @@ thread_executor = ThreadPoolExecutor(max_workers=4)
 
 # ============= Excel解析関連関数 =============
 
-import zipfile
-import io
-import base64
-import os
-import logging
-import traceback
+# セルを一括保存する際の1バッチあたりの件数
+CELL_BATCH_SIZE = 1000
 
 
 # 画像抽出関連関数
-async def _extract_images_from_zip(file_data: io.BytesIO, bulletin_id: int, db: Session):
+# 描画パーツから画像を画像ストアへ保存し、bulletin_imagesの行データを返す
+def _extract_images_from_zip(reader: ExcelStreamReader) -> List[Dict[str, Any]]:
     try:
         images = []
-        processed_hashes = set()  # 重複画像チェック用ハッシュセット
-        logger.info(f"ZIPアプローチで画像と実際の位置・サイズ情報を抽出: bulletin_id={bulletin_id}")
-
-        # ファイルポインタを先頭に戻す
-        file_data.seek(0)
-
-        # 列の幅と行の高さの情報を先に取得
-        original_file_for_dims = io.BytesIO(file_data.read())
-        file_data.seek(0)  # ポインタを戻す
-
-        column_widths = {}
-        row_heights = {}
-
-        try:
-            import openpyxl
-            workbook = openpyxl.load_workbook(original_file_for_dims)
-            sheet = workbook.active  # 最初のシートを対象とする
-
-            # 列の幅を取得
-            for col_letter, col_dim in sheet.column_dimensions.items():
-                if col_dim.width is not None:
-                    col_index = openpyxl.utils.column_index_from_string(col_letter)
-                    column_widths[col_index] = col_dim.width
-                    logger.info(f"列 {col_letter} (インデックス {col_index}) の幅: {col_dim.width}")
-
-            # 行の高さを取得
-            for row_index, row_dim in sheet.row_dimensions.items():
-                if row_dim.height is not None:
-                    row_heights[row_index] = row_dim.height
-                    logger.info(f"行 {row_index} の高さ: {row_dim.height}")
-
-            logger.info(f"シートから {len(column_widths)} 列と {len(row_heights)} 行の情報を取得しました")
-        except Exception as e:
-            logger.error(f"列・行情報の取得中にエラー: {str(e)}")
-
-        # 画像情報取得用のインスタンスを作成
-        try:
-            # 新しいインスタンスで再度開く
-            file_data.seek(0)
-            workbook_for_images = openpyxl.load_workbook(file_data)
-
-            # 実際の画像位置情報を格納するリスト
-            actual_image_positions = []
-
-            for sheet_name in workbook_for_images.sheetnames:
-                sheet = workbook_for_images[sheet_name]
-                if not hasattr(sheet, '_images'):
-                    continue
-
-                logger.info(f"シート '{sheet_name}' には {len(sheet._images)} 個の画像があります")
-
-                for img_idx, img in enumerate(sheet._images):
-                    try:
-                        anchor = getattr(img, 'anchor', None)
-                        if not anchor:
-                            continue
-
-                        # アンカーから位置情報を取得
-                        from_row = getattr(anchor, 'anchorMin', None)
-                        to_row = getattr(anchor, 'anchorMax', None)
-
-                        # 異なるアンカー形式も対応
-                        if not from_row and hasattr(anchor, '_from'):
-                            from_row = getattr(anchor._from, 'row', 0) + 1  # 0-indexedから1-indexedへ
-                            from_col = getattr(anchor._from, 'col', 0) + 1
-
-                            if hasattr(anchor, '_to'):
-                                to_row = getattr(anchor._to, 'row', from_row + 5) + 1
-                                to_col = getattr(anchor._to, 'col', from_col + 5) + 1
-                            else:
-                                # _toがない場合は、画像サイズから推定
-                                to_row = from_row + 3  # 仮の値
-                                to_col = from_col + 7  # 仮の値
-                        else:
-                            # デフォルト値（取得できない場合）
-                            from_row = 5
-                            from_col = 1 + (img_idx * 9)  # 画像ごとに列をずらす
-                            to_row = 8
-                            to_col = from_col + 7
-
-                        # 画像ファイル名またはpath属性
-                        img_path = getattr(img, 'path', f"image{img_idx+1}.jpeg")
-
-                        # 画像サイズ
-                        width = getattr(img, 'width', 0) or 300
-                        height = getattr(img, 'height', 0) or 200
-
-                        actual_image_positions.append({
-                            'path': img_path,
-                            'from_row': from_row,
-                            'from_col': from_col,
-                            'to_row': to_row,
-                            'to_col': to_col,
-                            'width': width,
-                            'height': height
-                        })
-
-                        logger.info(f"画像 {img_idx+1} ({img_path}) の位置: ({from_row},{from_col})-({to_row},{to_col}), サイズ: {width}x{height}")
-                    except Exception as e:
-                        logger.error(f"画像 {img_idx} の情報取得中にエラー: {str(e)}")
-
-            # 位置情報の数をログ
-            logger.info(f"合計 {len(actual_image_positions)} 個の画像位置情報を取得しました")
-        except Exception as e:
-            logger.error(f"OpenPyXLによる画像情報取得中にエラー: {str(e)}")
-            actual_image_positions = []
-
-        # ファイルポインタを先頭に戻す
-        file_data.seek(0)
-
-        # ZIPファイルとして開く
-        with zipfile.ZipFile(file_data) as excel_zip:
-            # ZIP内のファイル一覧
-            file_list = excel_zip.namelist()
-            logger.info(f"ZIP内のファイル数: {len(file_list)}")
-
-            # 画像ファイルのパスを探す
-            image_files = [name for name in file_list
-                           if name.startswith('xl/media/') and
-                              (name.lower().endswith('.jpg') or name.lower().endswith('.jpeg'))]
-
-            logger.info(f"見つかったJPEG画像ファイル: {len(image_files)}")
-
-            # 各画像ファイルを処理
-            for idx, img_path in enumerate(image_files):
-                try:
-                    # 画像データを取得
-                    img_data = excel_zip.read(img_path)
-
-                    # 画像データのハッシュを計算して重複チェック
-                    img_hash = hashlib.md5(img_data).hexdigest()
-                    if img_hash in processed_hashes:
-                        logger.info(f"重複画像をスキップ: {img_path}")
-                        continue
-
-                    processed_hashes.add(img_hash)
-
-                    # ヘッダーチェック (JPEGシグネチャ)
-                    if img_data[:2] != b'\xff\xd8':
-                        logger.info(f"JPEG以外の画像をスキップ: {img_path}")
-                        continue
-
-                    # 画像のBase64エンコード
-                    image_b64 = base64.b64encode(img_data).decode('utf-8')
-
-                    # 位置情報を取得 - 実際の画像位置情報から検索
-                    pos_info = None
-                    # 完全一致またはファイル名部分一致で検索
-                    file_name = img_path.split('/')[-1]
-                    for pos in actual_image_positions:
-                        if pos['path'] == img_path or file_name in pos['path'] or f"image{idx+1}" in pos['path']:
-                            pos_info = pos
-                            break
-
-                    if pos_info:
-                        # 取得した位置情報を使用
-                        from_row = pos_info['from_row']
-                        from_col = pos_info['from_col']
-                        to_row = pos_info['to_row']
-                        to_col = pos_info['to_col']
-                        width = pos_info['width']
-                        height = pos_info['height']
-
-                        logger.info(f"画像 {img_path} は実際の位置情報を使用: ({from_row},{from_col})-({to_row},{to_col})")
-                    else:
-                        # 位置情報がない場合はインデックスから推定
-                        # 画像が左右に並ぶように配置
-                        if idx == 0:
-                            from_row = 5
-                            from_col = 1
-                            to_row = 8
-                            to_col = 8
-                        elif idx == 1:
-                            from_row = 5
-                            from_col = 9
-                            to_row = 8
-                            to_col = 16
-                        else:
-                            from_row = 5 + (idx // 2) * 4  # 行方向にも展開
-                            from_col = 1 + (idx % 2) * 9   # 2列で交互に配置
-                            to_row = from_row + 3
-                            to_col = from_col + 7
-
-                        width = 300
-                        height = 200
-
-                        logger.info(f"画像 {img_path} は推定位置を使用: ({from_row},{from_col})-({to_row},{to_col})")
-
-                    # セルの幅と高さから画像の実際のピクセルサイズを計算
-                    pixel_width = 0
-                    for col in range(from_col, to_col + 1):
-                        cell_width = column_widths.get(col, 8.43)  # デフォルト幅
-                        pixel_width += cell_width * 9  # ピクセル変換係数
-
-                    pixel_height = 0
-                    for row in range(from_row, to_row + 1):
-                        cell_height = row_heights.get(row, 20)  # デフォルト高さ
-                        pixel_height += cell_height
-
-                    # 計算したピクセルサイズをログ
-                    logger.info(f"画像 {img_path} のセルから計算したサイズ: {pixel_width}x{pixel_height}px")
-
-                    # セルから計算したサイズを使用するが、最小値は設定
-                    if pixel_width < 50:
-                        pixel_width = 300
-                    if pixel_height < 50:
-                        pixel_height = 200
-
-                    # 画像オブジェクトを作成
-                    bulletin_image = BulletinImage(
-                        bulletin_id=bulletin_id,
-                        image_data=image_b64,
-                        image_type="jpeg",
-                        from_row=from_row,
-                        from_col=from_col,
-                        to_row=to_row,
-                        to_col=to_col,
-                        width=pixel_width,  # セルから計算したピクセル幅
-                        height=pixel_height  # セルから計算したピクセル高さ
-                    )
-
-                    images.append(bulletin_image)
-                except Exception as e:
-                    logger.error(f"画像 {img_path} の処理中にエラー: {str(e)}")
-                    logger.error(traceback.format_exc())
-
-            # 画像データの一括保存
-            if images:
-                db.bulk_save_objects(images)
-                logger.info(f"保存された画像の数: {len(images)}")
-            else:
-                logger.warning("JPEG画像が見つかりませんでした")
-
+        stored_hashes = {}  # 画像ファイルのパス → ハッシュ（同じ画像を複数箇所に配置した場合の再読込を防ぐ）
+        logger.info("描画パーツから画像と位置・サイズ情報を抽出")
+
+        # 描画パーツのアンカーごとに画像を登録する（アンカーのない画像は表示されないため対象外）
+        for pos_info in reader.iter_image_anchors():
+            img_path = pos_info['path']
+            try:
+                img_hash = stored_hashes.get(img_path)
+                if img_hash is None:
+                    img_data = reader.read_file(img_path)
+
+                    # ハッシュをキーに画像ストアへ保存（同じ内容の画像は共有される）
+                    img_hash = image_store.save_image(img_data)
+                    stored_hashes[img_path] = img_hash
+
+                # 画像形式はシグネチャから判定し、判定できない場合は拡張子を使う
+                image_type = image_store.read_image_type(img_hash) or os.path.splitext(img_path)[1].lstrip('.').lower()
+
+                from_row = pos_info['from_row']
+                from_col = pos_info['from_col']
+                to_row = pos_info['to_row']
+                to_col = pos_info['to_col']
+
+                # 描画パーツにサイズ指定がない場合（2セルアンカー）はセルの幅と高さから計算
+                pixel_width = pos_info['width']
+                if pixel_width is None:
+                    pixel_width = sum(reader.column_pixels(col) for col in range(from_col, to_col + 1))
+
+                pixel_height = pos_info['height']
+                if pixel_height is None:
+                    pixel_height = sum(reader.row_pixels(row) for row in range(from_row, to_row + 1))
+
+                logger.info(f"画像 {img_path} ({image_type}): ({from_row},{from_col})-({to_row},{to_col}) {pixel_width}x{pixel_height}px")
+
+                images.append({
+                    "image_hash": img_hash,
+                    "image_type": image_type,
+                    "from_row": from_row,
+                    "from_col": from_col,
+                    "to_row": to_row,
+                    "to_col": to_col,
+                    "width": pixel_width,
+                    "height": pixel_height
+                })
+            except Exception as e:
+                logger.error(f"画像 {img_path} の処理中にエラー: {str(e)}")
+                logger.error(traceback.format_exc())
+
+        logger.info(f"抽出した画像の数: {len(images)}")
         return images
 
     except Exception as e:
@@ -282,44 +109,44 @@ async def _extract_images_from_zip(file_data: io.BytesIO, bulletin_id: int, db:
         return []
 
 # Excelファイルを解析してデータベースに保存する関数
+# progressを指定するとセル保存の進捗（0〜1）がバッチごとに通知される
+# content_hashが解析済みの投稿と一致する場合は解析せず、その投稿のデータを共有する
 async def parse_excel_to_db(
-    file_data: io.BytesIO, filename: str, employee_id: int,
-    title: str, content: Optional[str], db: Session
+    file_data: BinaryIO, filename: str, employee_id: int,
+    title: str, content: Optional[str], db: Session,
+    progress: Optional[Callable[[float], None]] = None,
+    content_hash: Optional[str] = None
 ) -> BulletinPost:
     try:
+        source = _find_content_source(content_hash, db) if content_hash else None
+
         # 掲示板投稿を作成
         bulletin_post = BulletinPost(
             title=title, content=content,
-            employee_id=employee_id, filename=filename
+            employee_id=employee_id, filename=filename,
+            content_hash=content_hash,
+            content_source_id=source.id if source else None
         )
         db.add(bulletin_post)
         db.flush()
 
-        # 従来の方法を試す（DFとOpenpyxlでの処理）
-        df_task = asyncio.create_task(_run_in_thread(
-            lambda: pd.read_excel(file_data, engine='openpyxl')
-        ))
-
-        # ファイルポインタを先頭に戻す
-        file_data.seek(0)
-
-        workbook_task = asyncio.create_task(_run_in_thread(
-            lambda: openpyxl.load_workbook(file_data)
-        ))
-
-        # 両方のタスクが完了するのを待つ
-        df = await df_task
-        workbook = await workbook_task
+        if source:
+            # 解析済みデータと元ファイルを共有する（更新時に分離する）
+            logger.info(f"同じ内容の投稿 ID {source.id} の解析済みデータを共有: ID {bulletin_post.id}")
+            bulletin_post.file_path = source.file_path
+        else:
+            # ワークブックの解析と保存をスレッドプールで実行
+            await _run_in_thread(lambda: _ingest_excel(file_data, bulletin_post.id, db, progress))
 
-        # データ処理
-        cell_id_mapping = await _process_cell_data(df, bulletin_post.id, db)
-        await _process_styles_and_properties(workbook.active, cell_id_mapping, bulletin_post.id, db)
-
-        # ZIP方式で直接抽出 (JPEG画像のみを抽出)
-        file_data.seek(0)
-        images = await _extract_images_from_zip(file_data, bulletin_post.id, db)
+            # ダウンロード用に元ファイルを保存
+            bulletin_post.file_path, bulletin_post.content_hash = await _run_in_thread(
+                lambda: file_cache.store_file(bulletin_post.id, file_data, filename)
+            )
 
         db.commit()
+
+        # 詳細表示用のスナップショットを作成
+        await refresh_bulletin_snapshots(bulletin_post.id, db)
         return bulletin_post
 
     except Exception as e:
@@ -329,144 +156,233 @@ async def parse_excel_to_db(
         raise Exception(error_message)
 
 
-# セルデータを処理しマッピングを返す
-async def _process_cell_data(df, bulletin_id, db):
-    # 一括でセルオブジェクトを作成して処理を効率化
-    cells_to_add = [
-        BulletinCell(
-            bulletin_id=bulletin_id,
-            row=row_idx + 1,  # pandasは0始まりなので+1
-            col=col_idx,
-            value=str(value) if pd.notna(value) else None
-        )
-        for row_idx, row in df.iterrows()
-        for col_idx, value in enumerate(row, 1)
-    ]
+# 同じ内容のファイルから解析済みデータを持つ投稿を探す
+def _find_content_source(content_hash: str, db: Session) -> Optional[BulletinPost]:
+    return (
+        db.query(BulletinPost)
+        .filter(BulletinPost.content_hash == content_hash, BulletinPost.content_source_id.is_(None))
+        .order_by(BulletinPost.id)
+        .first()
+    )
 
-    # セルを一括で追加
-    db.bulk_save_objects(cells_to_add)
-    db.flush()
 
-    # ID取得のためにもう一度クエリ実行（bulk_save_objectsでは自動生成IDが取得できないため）
-    cells = db.query(BulletinCell).filter(BulletinCell.bulletin_id == bulletin_id).all()
-    return {(cell.row, cell.col): cell.id for cell in cells}
+# ZIPを1回だけ開き、シートを行単位で走査しながらセル・スタイル・シート特性・画像を保存する
+def _ingest_excel(file_data: BinaryIO, bulletin_id: int, db: Session, progress=None):
+    with _open_workbook(file_data) as reader:
+        _process_cell_data(reader, bulletin_id, db, progress)
+        _process_sheet_properties(reader, bulletin_id, db)
 
+        images = _read_images(reader)
+        if images:
+            db.execute(insert(BulletinImage), [{"bulletin_id": bulletin_id, **image} for image in images])
 
-# スタイルとシート特性を処理
-async def _process_styles_and_properties(sheet, cell_id_mapping, bulletin_id, db):
-    # データ収集タスクを並行実行
-    style_task = asyncio.create_task(_collect_cell_styles(sheet, cell_id_mapping))
-    merge_task = asyncio.create_task(_collect_merge_ranges(sheet, bulletin_id))
-    col_dim_task = asyncio.create_task(_collect_column_dimensions(sheet, bulletin_id))
-    row_dim_task = asyncio.create_task(_collect_row_dimensions(sheet, bulletin_id))
 
-    # 全てのタスクから結果を取得
-    styles, merges, col_dims, row_dims = await asyncio.gather(
-        style_task, merge_task, col_dim_task, row_dim_task
-    )
+# 実行方式に応じてワークブックを開く
+# プロセスプールの場合はファイルのパスを渡して別プロセスで解析し、セルは一時ファイル経由でバッチ単位に受け取る
+# データベースへの保存はこのプロセス（呼び出し元のトランザクション）で行う
+def _open_workbook(file_data: BinaryIO):
+    file_data.seek(0)
+    if excel_executor.uses_processes():
+        with _workbook_path(file_data) as path:
+            return ParsedWorkbook(excel_executor.call(_parse_workbook, path))
+    return ExcelStreamReader(file_data, _parse_cell_style)
 
-    # 一括でデータベースに保存
-    for data_list in [styles, merges, col_dims, row_dims]:
-        if data_list:
-            db.bulk_save_objects(data_list)
 
+# 別プロセスから開けるファイルのパスを返す
+# 保存済みのファイル（解析ジョブのアップロードファイルなど）はそのまま使い、それ以外は一時ファイルにコピーする
+@contextmanager
+def _workbook_path(file_data: BinaryIO):
+    name = getattr(file_data, 'name', None)
+    if isinstance(name, str) and os.path.isfile(name):
+        yield name
+        return
 
-# シートからセルスタイル情報を収集
-async def _collect_cell_styles(sheet, cell_id_mapping):
-    def process_cells():
-        return [
-            CellStyle(cell_id=cell_id_mapping[(row_idx, col_idx)], **cell_style)
-            for row_idx, row in enumerate(sheet.iter_rows(), 1)
-            for col_idx, cell in enumerate(row, 1)
-            if (cell_style := _parse_cell_style(cell)) and (row_idx, col_idx) in cell_id_mapping
-        ]
+    fd, path = tempfile.mkstemp(suffix='.xlsx')
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            shutil.copyfileobj(file_data, temp_file, file_cache.COPY_CHUNK_SIZE)
+        yield path
+    finally:
+        file_data.seek(0)
+        os.remove(path)
 
-    # スレッドプールで実行
-    return await _run_in_thread(process_cells)
 
+# ワークブックを解析してプレーンなデータにする（プロセスプールで実行される）
+# セルは一時ファイルに書き出し、戻り値にはそのパスとセル以外のデータだけを含める
+def _parse_workbook(path: str) -> Dict[str, Any]:
+    with ExcelStreamReader(path, _parse_cell_style) as reader:
+        cells_path = spill_cells(reader, CELL_BATCH_SIZE)
+        try:
+            return {
+                'cells_path': cells_path,
+                'styles': reader.styles,
+                'merges': reader.merges,
+                'column_widths': reader.column_widths,
+                'row_heights': reader.row_heights,
+                'dimension_rows': reader.dimension_rows,
+                'images': _extract_images_from_zip(reader)
+            }
+        except Exception:
+            os.remove(cells_path)
+            raise
 
-# シートから結合セル情報を収集
-async def _collect_merge_ranges(sheet, bulletin_id):
-    return [
-        BulletinMerge(
-            bulletin_id=bulletin_id,
-            start_row=merged_range.min_row,
-            start_col=merged_range.min_col,
-            end_row=merged_range.max_row,
-            end_col=merged_range.max_col
-        )
-        for merged_range in sheet.merged_cells.ranges
-    ]
 
+# 画像の行データを取得し、縮小画像の生成を登録する
+# 縮小画像はこのプロセスのスレッドプールで生成する（プロセスプールで解析した場合も、ワーカープロセスには登録しない）
+def _read_images(reader) -> List[Dict[str, Any]]:
+    if isinstance(reader, ParsedWorkbook):
+        images = reader.images
+    else:
+        images = _extract_images_from_zip(reader)
+
+    for image_hash in {image['image_hash'] for image in images}:
+        image_store.schedule_variants(image_hash)
+    return images
+
+
+# セルデータとスタイルをバッチ単位で保存する
+def _process_cell_data(reader, bulletin_id: int, db: Session, progress=None):
+    style_ids = {}  # ブック内のスタイル番号 -> cell_styles.id
+    batch = []
+
+    for cell in reader.iter_cells():
+        batch.append(cell)
+
+        # 一定件数ごとに書き出してメモリ上のデータ量を抑える
+        if len(batch) >= CELL_BATCH_SIZE:
+            _insert_cell_batch(batch, bulletin_id, style_ids, db)
+            _report_progress(progress, reader, batch[-1]['row'])
+            batch = []
+
+    if batch:
+        _insert_cell_batch(batch, bulletin_id, style_ids, db)
+        _report_progress(progress, reader, batch[-1]['row'])
 
-# シートから列幅情報を収集
-async def _collect_column_dimensions(sheet, bulletin_id):
-    return [
-        BulletinColumnDimension(
-            bulletin_id=bulletin_id,
-            col=openpyxl.utils.column_index_from_string(col_letter),
-            width=col_dim.width
-        )
-        for col_letter, col_dim in sheet.column_dimensions.items()
-        if col_dim.width is not None
-    ]
 
+# 処理済みの行番号とシートの行数（dimension要素）からセル保存の進捗を通知する
+def _report_progress(progress, reader, row: int):
+    max_row = reader.dimension_rows
+    if progress and max_row:
+        progress(min(row / max_row, 1.0))
+
+
+# バッチ内で初出のスタイルを登録してから、スタイルIDを付けてセルを一括登録する
+def _insert_cell_batch(batch, bulletin_id: int, style_ids: Dict[int, int], db: Session):
+    db.execute(insert(BulletinCell), [
+        {"bulletin_id": bulletin_id, **row}
+        for row in _resolve_cell_rows(batch, style_ids, db)
+    ])
+
+
+# バッチ内で初出のスタイルを登録し、cell_styles.idを付けたセルの行データに変換する
+def _resolve_cell_rows(batch, style_ids: Dict[int, int], db: Session) -> List[Dict[str, Any]]:
+    new_styles = {
+        cell['style_id']: cell['style']
+        for cell in batch
+        if cell['style'] and cell['style_id'] not in style_ids
+    }
+    if new_styles:
+        style_ids.update(_intern_cell_styles(new_styles, db))
 
-# シートから行高情報を収集
-async def _collect_row_dimensions(sheet, bulletin_id):
     return [
-        BulletinRowDimension(
-            bulletin_id=bulletin_id,
-            row=row_idx,
-            height=row_dim.height
-        )
-        for row_idx, row_dim in sheet.row_dimensions.items()
-        if row_dim.height is not None
+        {
+            "row": cell['row'],
+            "col": cell['col'],
+            "value": cell['value'],
+            "style_id": style_ids.get(cell['style_id']) if cell['style'] else None
+        }
+        for cell in batch
     ]
 
 
+# スタイルをハッシュで重複排除して保存し、キーごとのcell_styles.idを返す
+def _intern_cell_styles(styles: Dict[Any, Dict[str, Any]], db: Session) -> Dict[Any, int]:
+    hashes = {key: CellStyle.compute_hash(style) for key, style in styles.items()}
+    rows = {
+        hashes[key]: {"style_hash": hashes[key], **CellStyle.normalize(style)}
+        for key, style in styles.items()
+    }
+
+    # 既に登録済みのスタイル（他の投稿・同時アップロード分を含む）は挿入しない
+    db.execute(
+        _insert_on_conflict(db, CellStyle).on_conflict_do_nothing(index_elements=[CellStyle.style_hash]),
+        list(rows.values())
+    )
+    id_by_hash = dict(db.execute(
+        select(CellStyle.style_hash, CellStyle.id).where(CellStyle.style_hash.in_(list(rows)))
+    ).all())
+
+    return {key: id_by_hash[style_hash] for key, style_hash in hashes.items()}
+
+
+# 結合・列幅・行高を保存
+def _process_sheet_properties(reader, bulletin_id: int, db: Session):
+    # 一括でデータベースに保存
+    for model, data_list in _sheet_property_rows(reader):
+        if data_list:
+            db.execute(insert(model), [{"bulletin_id": bulletin_id, **data} for data in data_list])
+
+
+# 結合・列幅・行高の行データをテーブルごとに返す
+def _sheet_property_rows(reader):
+    merges = list(reader.merges)
+    col_dims = [{"col": col, "width": width} for col, width in reader.column_widths.items()]
+    row_dims = [{"row": row, "height": height} for row, height in reader.row_heights.items()]
+    return [(BulletinMerge, merges), (BulletinColumnDimension, col_dims), (BulletinRowDimension, row_dims)]
+
+
 # 既存の掲示板投稿のExcelデータを更新する
 async def update_excel_in_db(
-    bulletin_id: int, file_data: io.BytesIO,
+    bulletin_id: int, file_data: BinaryIO,
     filename: str, title: str, content: Optional[str], db: Session
 ) -> BulletinPost:
     try:
-        # 関連データ削除
-        await _delete_related_data(bulletin_id, db)
+        post = db.query(BulletinPost).filter(BulletinPost.id == bulletin_id).first()
+        if post is None:
+            # ルーターでの確認後に削除された場合など
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"ID {bulletin_id} の掲示板投稿が見つかりません")
+        old_image_hashes = get_image_hashes(post.data_id, db)
+
+        # 解析済みデータを共有している場合は書き換えずに分離する（コピーオンライト）
+        # 共有元の場合は他の投稿にデータを引き継ぎ、この投稿のデータを新たに作成する
+        if post.content_source_id:
+            post.content_source_id = None
+            detached = True
+        else:
+            detached = hand_over_shared_content(post, db) is not None
 
         # 基本情報更新
-        post = db.query(BulletinPost).filter(BulletinPost.id == bulletin_id).first()
         post.title = title
         post.content = content
         post.filename = filename
         post.updated_at = datetime.utcnow()
         db.flush()
 
-        # 並行処理でデータ読み込み
-        df_task = asyncio.create_task(_run_in_thread(
-            lambda: pd.read_excel(file_data, engine='openpyxl')
-        ))
-
-        file_data.seek(0)
+        if detached:
+            await _run_in_thread(lambda: _ingest_excel(file_data, bulletin_id, db))
+        else:
+            # 保存済みのデータとの差分のみをスレッドプールで反映
+            await _run_in_thread(lambda: _sync_excel(file_data, bulletin_id, db))
 
-        workbook_task = asyncio.create_task(_run_in_thread(
-            lambda: openpyxl.load_workbook(file_data, data_only=True)
-        ))
-
-        df, workbook = await asyncio.gather(df_task, workbook_task)
-        sheet = workbook.active
+        # ダウンロード用の元ファイルを差し替え
+        old_file_path = post.file_path
+        post.file_path, post.content_hash = await _run_in_thread(
+            lambda: file_cache.store_file(bulletin_id, file_data, filename)
+        )
 
-        # データ処理
-        cell_id_mapping = await _process_cell_data(df, bulletin_id, db)
-        await _process_styles_and_properties(sheet, cell_id_mapping, bulletin_id, db)
+        db.commit()
 
-        # ZIP方式でJPEG画像のみを抽出
-        file_data.seek(0)
-        await _extract_images_from_zip(file_data, bulletin_id, db)
+        if old_file_path != post.file_path:
+            release_cached_file(old_file_path, db)
+        release_images(old_image_hashes, db)
 
-        db.commit()
+        # 詳細表示用のスナップショットを作り直す
+        await refresh_bulletin_snapshots(bulletin_id, db)
         return post
 
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         error_message = f"エクセル更新エラー: ID {bulletin_id} - {str(e)}"
@@ -474,95 +390,282 @@ async def update_excel_in_db(
         raise Exception(error_message)
 
 
-# 掲示板投稿の関連データを削除
-async def _delete_related_data(bulletin_id, db):
-    from sqlalchemy import select
-    cell_ids_query = select(BulletinCell.id).where(BulletinCell.bulletin_id == bulletin_id)
+# 投稿間で共有する解析済みデータのテーブルと、投稿側のリレーション名
+SHARED_CONTENT_MODELS = (BulletinCell, BulletinMerge, BulletinColumnDimension, BulletinRowDimension, BulletinImage)
+SHARED_CONTENT_RELATIONSHIPS = ("cells", "merges", "column_dimensions", "row_dimensions", "images")
 
-    # 関連データを一括削除
-    db.query(CellStyle).filter(CellStyle.cell_id.in_(cell_ids_query)).delete(synchronize_session=False)
-    db.query(BulletinCell).filter(BulletinCell.bulletin_id == bulletin_id).delete(synchronize_session=False)
-    db.query(BulletinMerge).filter(BulletinMerge.bulletin_id == bulletin_id).delete(synchronize_session=False)
-    db.query(BulletinColumnDimension).filter(BulletinColumnDimension.bulletin_id == bulletin_id).delete(synchronize_session=False)
-    db.query(BulletinRowDimension).filter(BulletinRowDimension.bulletin_id == bulletin_id).delete(synchronize_session=False)
-    db.query(BulletinImage).filter(BulletinImage.bulletin_id == bulletin_id).delete(synchronize_session=False)
+
+# 解析済みデータを共有している投稿がある場合、最も古い投稿にデータを移して共有元とする
+# 投稿の削除・更新の前に呼び出す（引き継いだ投稿のIDを返す）
+def hand_over_shared_content(post: BulletinPost, db: Session) -> Optional[int]:
+    heir_id = db.execute(
+        select(BulletinPost.id)
+        .where(BulletinPost.content_source_id == post.id)
+        .order_by(BulletinPost.id)
+        .limit(1)
+    ).scalar()
+    if heir_id is None:
+        return None
+
+    for model in SHARED_CONTENT_MODELS:
+        db.execute(
+            update(model).where(model.bulletin_id == post.id).values(bulletin_id=heir_id),
+            execution_options={"synchronize_session": False}
+        )
+    db.execute(
+        update(BulletinPost).where(BulletinPost.id == heir_id).values(content_source_id=None),
+        execution_options={"synchronize_session": False}
+    )
+    db.execute(
+        update(BulletinPost).where(BulletinPost.content_source_id == post.id).values(content_source_id=heir_id),
+        execution_options={"synchronize_session": False}
+    )
+
+    # 移したデータを削除対象として読み込まないよう、関連の状態を破棄する
+    db.expire(post, list(SHARED_CONTENT_RELATIONSHIPS))
+    logger.info(f"投稿 ID {post.id} の解析済みデータを ID {heir_id} に引き継ぎ")
+    return heir_id
+
+
+# ダウンロード用の元ファイルを削除する（他の投稿と共有している場合は残す）
+def release_cached_file(file_path: Optional[str], db: Session):
+    if not file_path:
+        return
+    if db.query(BulletinPost.id).filter(BulletinPost.file_path == file_path).first():
+        return
+    file_cache.remove_file(file_path)
+
+
+# 投稿（解析済みデータを保持している投稿）が参照している画像のハッシュを取得
+def get_image_hashes(data_id: int, db: Session) -> set:
+    return set(db.execute(
+        select(BulletinImage.image_hash).where(BulletinImage.bulletin_id == data_id, BulletinImage.image_hash.isnot(None))
+    ).scalars())
+
+
+# 画像ストアの画像を削除する（他の投稿がまだ参照している画像は残す）
+# 投稿の削除・更新をコミットした後に、変更前に参照していた画像のハッシュを渡す
+def release_images(image_hashes, db: Session):
+    if not image_hashes:
+        return
+    referenced = set(db.execute(
+        select(BulletinImage.image_hash).where(BulletinImage.image_hash.in_(list(image_hashes))).distinct()
+    ).scalars())
+    for image_hash in set(image_hashes) - referenced:
+        image_store.remove_image(image_hash)
+
+
+# 差分更新で行を突き合わせるキー列（キー以外の列は値が変わった場合に更新する）
+SYNC_KEY_COLUMNS = {
+    BulletinCell: ("row", "col"),
+    BulletinMerge: ("start_row", "start_col", "end_row", "end_col"),
+    BulletinColumnDimension: ("col",),
+    BulletinRowDimension: ("row",),
+    BulletinImage: ("image_hash", "from_row", "from_col", "to_row", "to_col"),
+}
+SYNC_VALUE_COLUMNS = {
+    BulletinCell: ("value", "style_id"),
+    BulletinMerge: (),
+    BulletinColumnDimension: ("width",),
+    BulletinRowDimension: ("height",),
+    BulletinImage: ("image_type", "width", "height"),
+}
+
+
+# 新しいワークブックと保存済みデータを突き合わせ、変更のあった行だけを追加・更新・削除する
+def _sync_excel(file_data: BinaryIO, bulletin_id: int, db: Session):
+    with _open_workbook(file_data) as reader:
+        _sync_cell_data(reader, bulletin_id, db)
+
+        for model, data_list in _sheet_property_rows(reader):
+            _sync_rows(model, bulletin_id, data_list, db)
+
+        images = _read_images(reader)
+        _sync_rows(BulletinImage, bulletin_id, images, db)
+
+
+# セルをバッチ単位で保存済みのセルと位置(row, col)で突き合わせる
+def _sync_cell_data(reader, bulletin_id: int, db: Session):
+    existing = _load_sync_rows(BulletinCell, bulletin_id, db)
+    style_ids = {}  # ブック内のスタイル番号 -> cell_styles.id
+    inserted = updated = 0
+    batch = []
+
+    for cell in reader.iter_cells():
+        batch.append(cell)
+        if len(batch) >= CELL_BATCH_SIZE:
+            rows = _resolve_cell_rows(batch, style_ids, db)
+            batch_inserted, batch_updated = _apply_sync_changes(BulletinCell, bulletin_id, existing, rows, db)
+            inserted += batch_inserted
+            updated += batch_updated
+            batch = []
+
+    if batch:
+        rows = _resolve_cell_rows(batch, style_ids, db)
+        batch_inserted, batch_updated = _apply_sync_changes(BulletinCell, bulletin_id, existing, rows, db)
+        inserted += batch_inserted
+        updated += batch_updated
+
+    # 新しいワークブックに存在しなくなったセルを削除
+    deleted = _delete_sync_rows(BulletinCell, existing, db)
+    logger.info(f"セルの差分更新: 追加 {inserted} / 更新 {updated} / 削除 {deleted}")
+
+
+# 行データの集合を保存済みの行と突き合わせて差分を反映する
+def _sync_rows(model, bulletin_id: int, rows: List[Dict[str, Any]], db: Session):
+    existing = _load_sync_rows(model, bulletin_id, db)
+    inserted, updated = _apply_sync_changes(model, bulletin_id, existing, rows, db)
+    deleted = _delete_sync_rows(model, existing, db)
+    if inserted or updated or deleted:
+        logger.info(f"{model.__tablename__} の差分更新: 追加 {inserted} / 更新 {updated} / 削除 {deleted}")
+
+
+# 保存済みの行をキーごとに読み込む（キー -> [(id, 値の組), ...]）
+def _load_sync_rows(model, bulletin_id: int, db: Session) -> Dict[tuple, List[tuple]]:
+    key_columns = SYNC_KEY_COLUMNS[model]
+    value_columns = SYNC_VALUE_COLUMNS[model]
+    columns = [getattr(model, name) for name in (*key_columns, *value_columns)]
+
+    existing = {}
+    for record in db.execute(select(model.id, *columns).where(model.bulletin_id == bulletin_id)):
+        key = tuple(record[1:1 + len(key_columns)])
+        existing.setdefault(key, []).append((record[0], tuple(record[1 + len(key_columns):])))
+    return existing
+
+
+# 新しい行データを保存済みの行と比較し、追加・更新を反映する
+# 突き合わせた保存済みの行はexistingから取り除く（残った行が削除対象）
+def _apply_sync_changes(model, bulletin_id: int, existing, rows, db: Session) -> Tuple[int, int]:
+    key_columns = SYNC_KEY_COLUMNS[model]
+    value_columns = SYNC_VALUE_COLUMNS[model]
+    inserts = []
+    updates = []
+
+    for row in rows:
+        key = tuple(row[name] for name in key_columns)
+        matches = existing.get(key)
+        if not matches:
+            inserts.append({"bulletin_id": bulletin_id, **row})
+            continue
+
+        record_id, current_values = matches.pop()
+        if not matches:
+            del existing[key]
+
+        values = tuple(row[name] for name in value_columns)
+        if values != current_values:
+            updates.append({"id": record_id, **dict(zip(value_columns, values))})
+
+    if inserts:
+        db.execute(insert(model), inserts)
+    if updates:
+        # 主キー指定のORM一括更新（executemanyで実行される）
+        db.execute(update(model), updates)
+
+    return len(inserts), len(updates)
+
+
+# 突き合わせで残った保存済みの行を削除する
+def _delete_sync_rows(model, existing, db: Session) -> int:
+    delete_ids = [record_id for matches in existing.values() for record_id, _ in matches]
+    for start in range(0, len(delete_ids), CELL_BATCH_SIZE):
+        db.execute(
+            delete(model).where(model.id.in_(delete_ids[start:start + CELL_BATCH_SIZE])),
+            execution_options={"synchronize_session": False}
+        )
+    return len(delete_ids)
 
 
 # ============= Excel生成関連関数 =============
 
 # データベースのデータからExcelファイルを生成する
-async def generate_excel_from_db(bulletin_id: int, db: Session) -> Tuple[io.BytesIO, str]:
+# セル以外（スタイル・結合・列幅・行高）を先に取得し、セルはダウンロード中にサーバーサイドカーソルで読み出す
+async def generate_excel_from_db(bulletin_id: int, db: Session) -> Tuple[Iterator[bytes], str]:
     # 掲示板投稿と関連データ取得
     post = db.query(BulletinPost).filter(BulletinPost.id == bulletin_id).first()
     if not post:
         raise Exception(f"ID {bulletin_id} の掲示板投稿が見つかりません")
 
-    # 並行して各種データを取得
-    cells_task = _run_in_thread(
-        lambda: db.query(BulletinCell).filter(BulletinCell.bulletin_id == bulletin_id).all()
+    # 解析済みデータを共有している場合は共有元のデータから生成する
+    data_id = post.data_id
+
+    # 並行して各種データを取得（それぞれ独立したセッションを使用）
+    styles_task = _run_in_session(
+        lambda session: session.query(CellStyle).filter(
+            CellStyle.id.in_(
+                select(BulletinCell.style_id).where(BulletinCell.bulletin_id == data_id).distinct()
+            )
+        ).all()
     )
-    merges_task = _run_in_thread(
-        lambda: db.query(BulletinMerge).filter(BulletinMerge.bulletin_id == bulletin_id).all()
+    merges_task = _run_in_session(
+        lambda session: session.execute(
+            select(BulletinMerge.start_row, BulletinMerge.start_col, BulletinMerge.end_row, BulletinMerge.end_col)
+            .where(BulletinMerge.bulletin_id == data_id)
+        ).all()
     )
-    column_dims_task = _run_in_thread(
-        lambda: db.query(BulletinColumnDimension).filter(BulletinColumnDimension.bulletin_id == bulletin_id).all()
+    column_dims_task = _run_in_session(
+        lambda session: session.execute(
+            select(BulletinColumnDimension.col, BulletinColumnDimension.width)
+            .where(BulletinColumnDimension.bulletin_id == data_id)
+        ).all()
     )
-    row_dims_task = _run_in_thread(
-        lambda: db.query(BulletinRowDimension).filter(BulletinRowDimension.bulletin_id == bulletin_id).all()
+    row_dims_task = _run_in_session(
+        lambda session: session.execute(
+            select(BulletinRowDimension.row, BulletinRowDimension.height)
+            .where(BulletinRowDimension.bulletin_id == data_id)
+        ).all()
     )
 
     # 各タスクの完了を待機
-    cells, merges, column_dims, row_dims = await asyncio.gather(
-        cells_task, merges_task, column_dims_task, row_dims_task
+    styles, merges, column_dims, row_dims = await asyncio.gather(
+        styles_task, merges_task, column_dims_task, row_dims_task
     )
 
-    # セルスタイル情報を効率的に取得
-    cell_ids = [cell.id for cell in cells]
-    styles = db.query(CellStyle).filter(CellStyle.cell_id.in_(cell_ids)).all() if cell_ids else []
-    style_map = {style.cell_id: style for style in styles}
+    style_map = {style.id: {column: getattr(style, column) for column in CellStyle.STYLE_COLUMNS} for style in styles}
+    column_widths = dict(column_dims)
+    row_heights = dict(row_dims)
+    merge_ranges = [tuple(merge) for merge in merges]
 
-    # Excelファイル作成処理をスレッドプールで実行
-    output = await _run_in_thread(
-        lambda: _create_excel_file(cells, merges, column_dims, row_dims, style_map)
-    )
+    # プロセスプールを使う設定でも、ダウンロードは送信しながら生成する
+    # （別プロセスで生成すると全体を一時ファイルに書き出すまで送信を始められないため、CPUの分散よりストリーミングを優先する）
+    output = _iter_workbook(data_id, style_map, column_widths, row_heights, merge_ranges)
 
     return output, _generate_safe_filename(post)
 
 
-# Excelファイルを作成する
-def _create_excel_file(cells, merges, column_dims, row_dims, style_map):
-    workbook = openpyxl.Workbook()
-    sheet = workbook.active
+# スタイル・結合・列幅・行高とセルからxlsxのバイト列を順に生成する
+def _iter_workbook(bulletin_id: int, style_map, column_widths, row_heights, merges) -> Iterator[bytes]:
+    writer = ExcelStreamWriter(_apply_cell_style)
+    styles = {style_id: SimpleNamespace(**style) for style_id, style in style_map.items()}
+    return writer.iter_workbook(styles, column_widths, row_heights, merges, _iter_bulletin_cells(bulletin_id))
 
-    # セルデータとスタイル適用
-    for cell_data in cells:
-        sheet_cell = sheet.cell(row=cell_data.row, column=cell_data.col, value=cell_data.value)
-        if cell_data.id in style_map:
-            _apply_cell_style(sheet_cell, style_map[cell_data.id])
 
-    # セル結合適用
-    for merge in merges:
-        sheet.merge_cells(
-            start_row=merge.start_row, start_column=merge.start_col,
-            end_row=merge.end_row, end_column=merge.end_col
+# セルを行・列の順にサーバーサイドカーソルで少しずつ読み出す
+# レスポンス送信中に実行されるため、リクエストとは別のセッションを使う
+def _iter_bulletin_cells(bulletin_id: int) -> Iterator[Tuple[int, int, Any, Any]]:
+    session = SessionLocal()
+    try:
+        result = session.execute(
+            select(BulletinCell.row, BulletinCell.col, BulletinCell.value, BulletinCell.style_id)
+            .where(BulletinCell.bulletin_id == bulletin_id)
+            .order_by(BulletinCell.row, BulletinCell.col)
+            .execution_options(yield_per=CELL_BATCH_SIZE)
         )
+        for cell in result:
+            yield tuple(cell)
+    finally:
+        session.close()
 
-    # 列幅と行高設定
-    for col_dim in column_dims:
-        sheet.column_dimensions[get_column_letter(col_dim.col)].width = col_dim.width
-
-    for row_dim in row_dims:
-        sheet.row_dimensions[row_dim.row].height = row_dim.height
-
-    # ファイル出力
-    output = io.BytesIO()
-    workbook.save(output)
-    output.seek(0)
 
-    return output
+# ============= レスポンス関連関数 =============
 
+# 一覧表示で使用する縮小画像の種類
+THUMBNAIL_VARIANT = "thumb"
 
-# ============= レスポンス関連関数 =============
+# 詳細レスポンスの列指向形式（クエリパラメータ format=compact またはAcceptヘッダーで指定）
+DETAIL_FORMAT_DEFAULT = "default"
+DETAIL_FORMAT_COMPACT = "compact"
+COMPACT_MEDIA_TYPE = "application/vnd.bulletin.compact+json"
 
 # 掲示板投稿をレスポンス形式に整形する
 async def format_bulletin_response(post: BulletinPost, employee_name: str, db: Session) -> Dict[str, Any]:
@@ -578,28 +681,53 @@ async def format_bulletin_response(post: BulletinPost, employee_name: str, db: S
     }
 
 
+# 投稿総数のキャッシュの有効期間（秒）
+# 投稿はジョブのワーカープロセスでも作成されるため、無効化に加えて期限切れでも取得し直す
+POST_COUNT_TTL = 30
+
+_post_count_cache: Dict[str, Any] = {"value": None, "expires_at": 0.0}
+
+
 # 掲示板投稿一覧を取得する
-async def get_bulletin_list(skip: int, limit: int, db: Session) -> Dict[str, Any]:
-    # 並行してデータ取得
-    count_task = asyncio.create_task(_run_in_thread(
-        lambda: db.query(BulletinPost).count()
-    ))
-
-    # 投稿データをjoinedloadを使って従業員情報と画像情報を一緒に取得
-    posts_task = asyncio.create_task(_run_in_thread(
-        lambda: db.query(BulletinPost)
-               .options(
-                   joinedload(BulletinPost.employee),
-                   joinedload(BulletinPost.images)
-               )
-               .order_by(BulletinPost.created_at.desc())
-               .offset(skip)
-               .limit(limit)
-               .all()
-    ))
-
-    # データ取得を待機
-    total_count, posts = await asyncio.gather(count_task, posts_task)
+# cursorを指定した場合は(created_at, id)によるキーセットページング、省略時はskipによるページングで取得する
+# thumbnails_only=Trueの場合、各投稿の1枚目の画像（縮小画像のURL）のみ返す
+async def get_bulletin_list(
+    skip: int, limit: int, db: Session, thumbnails_only: bool = False, cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    keyset = _decode_list_cursor(cursor) if cursor else None
+
+    def load(session: Session):
+        # 一覧に必要なカラムのみ取得する
+        query = (
+            select(
+                BulletinPost.id,
+                BulletinPost.title,
+                BulletinPost.content,
+                BulletinPost.employee_id,
+                Employee.name.label("employee_name"),
+                BulletinPost.created_at,
+                BulletinPost.updated_at,
+                BulletinPost.filename,
+                func.coalesce(BulletinPost.content_source_id, BulletinPost.id).label("data_id")
+            )
+            .outerjoin(Employee, Employee.id == BulletinPost.employee_id)
+            .order_by(BulletinPost.created_at.desc(), BulletinPost.id.desc())
+            .limit(limit)
+        )
+        if keyset:
+            query = query.where(tuple_(BulletinPost.created_at, BulletinPost.id) < keyset)
+        else:
+            query = query.offset(skip)
+
+        posts = session.execute(query).all()
+        return posts, _load_list_images(session, list({post.data_id for post in posts}), thumbnails_only)
+
+    # 並行してデータ取得（それぞれ独立したセッションを使用）
+    total_count, (posts, images) = await asyncio.gather(_get_post_count(), _run_in_session(load))
+
+    images_by_post: Dict[int, List[Dict[str, Any]]] = {}
+    for image in images:
+        images_by_post.setdefault(image.bulletin_id, []).append(_format_image_data(image))
 
     # レスポンスデータを作成
     posts_data = [
@@ -608,34 +736,79 @@ async def get_bulletin_list(skip: int, limit: int, db: Session) -> Dict[str, Any
             "title": post.title,
             "content": post.content,
             "employee_id": post.employee_id,
-            "employee_name": post.employee.name if post.employee else None,
+            "employee_name": post.employee_name,
             "created_at": post.created_at,
             "updated_at": post.updated_at,
             "filename": post.filename,
-            "images": [
-                {
-                    "image_data": image.image_data,
-                    "image_type": image.image_type,
-                    "from_row": image.from_row,
-                    "from_col": image.from_col,
-                    "to_row": image.to_row,
-                    "to_col": image.to_col,
-                    "width": image.width,
-                    "height": image.height
-                }
-                for image in post.images
-            ] if post.images else []
+            "images": images_by_post.get(post.data_id, [])
         }
         for post in posts
     ]
 
     return {
         "posts": posts_data,
-        "total": total_count
+        "total": total_count,
+        "next_cursor": _encode_list_cursor(posts[-1]) if len(posts) == limit else None
     }
 
+
+# 一覧に表示する画像の位置情報を取得（旧形式の画像データのカラムは読み込まない）
+# post_idsは解析済みデータを保持している投稿のID
+def _load_list_images(session: Session, post_ids: List[int], thumbnails_only: bool):
+    if not post_ids:
+        return []
+
+    columns = [
+        BulletinImage.bulletin_id, BulletinImage.image_hash, BulletinImage.image_type,
+        BulletinImage.from_row, BulletinImage.from_col, BulletinImage.to_row, BulletinImage.to_col,
+        BulletinImage.width, BulletinImage.height
+    ]
+    query = select(*columns).where(BulletinImage.bulletin_id.in_(post_ids))
+
+    if not thumbnails_only:
+        return session.execute(query.order_by(BulletinImage.bulletin_id, BulletinImage.id)).all()
+
+    # 各投稿の1枚目の画像のみ
+    ranked = query.add_columns(
+        func.row_number().over(partition_by=BulletinImage.bulletin_id, order_by=BulletinImage.id).label("image_rank")
+    ).subquery()
+    return session.execute(
+        select(*[ranked.c[column.key] for column in columns]).where(ranked.c.image_rank == 1)
+    ).all()
+
+
+# 投稿総数を取得（一定時間キャッシュする）
+async def _get_post_count() -> int:
+    now = time.monotonic()
+    if _post_count_cache["value"] is not None and now < _post_count_cache["expires_at"]:
+        return _post_count_cache["value"]
+
+    count = await _run_in_session(lambda session: session.query(func.count(BulletinPost.id)).scalar())
+    _post_count_cache.update(value=count, expires_at=now + POST_COUNT_TTL)
+    return count
+
+
+# 投稿の作成・削除時に投稿総数のキャッシュを破棄する
+def invalidate_post_count():
+    _post_count_cache.update(value=None, expires_at=0.0)
+
+
+# 次ページのカーソル（最後の投稿のcreated_atとid）を作成する
+def _encode_list_cursor(post) -> str:
+    raw = f"{post.created_at.isoformat()}|{post.id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+# カーソルを(created_at, id)に戻す
+def _decode_list_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, post_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        return datetime.fromisoformat(created_at), int(post_id)
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="カーソルの形式が正しくありません")
+
 # エクセルファイルをダウンロードするためのレスポンスを作成する
-async def create_excel_response(output: io.BytesIO, filename: str) -> StreamingResponse:
+async def create_excel_response(output: Iterator[bytes], filename: str) -> StreamingResponse:
     # ファイル名をURLエンコード
     encoded_filename = urllib.parse.quote(filename)
 
@@ -647,26 +820,91 @@ async def create_excel_response(output: io.BytesIO, filename: str) -> StreamingR
     )
 
 
+# アップロード時の元ファイルが残っていれば、再生成せずにそのまま返すレスポンスを作成する
+# 元ファイルは更新のたびに差し替えるため、常に現在の投稿内容と一致する
+async def create_cached_excel_response(bulletin_id: int, db: Session) -> Optional[FileResponse]:
+    post = db.query(BulletinPost).filter(BulletinPost.id == bulletin_id).first()
+    if not post:
+        return None
+
+    path = file_cache.get_cached_path(post.file_path)
+    if not path:
+        return None
+
+    encoded_filename = urllib.parse.quote(_generate_safe_filename(post))
+    return FileResponse(
+        path,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={"Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}"}
+    )
+
+
+# 画像ストアの画像を返すレスポンスを作成する（Rangeリクエストに対応、If-None-Matchが一致すれば304を返す）
+# variantを指定した場合は縮小画像を返す（未作成であればその場で作成する）
+async def create_image_response(
+    image_hash: str, variant: Optional[str] = None, if_none_match: Optional[str] = None
+) -> Response:
+    if not image_store.is_valid_image_hash(image_hash):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="画像が見つかりません")
+    if variant and variant not in image_store.IMAGE_VARIANTS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"不明な画像サイズです: {variant}")
+
+    path = image_store.get_image_path(image_hash)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="画像が見つかりません")
+
+    etag = image_hash
+    image_type = None
+    if variant:
+        variant_path = await _run_in_thread(lambda: image_store.generate_variant(image_hash, variant))
+        # 縮小できない形式の場合は元画像を返す
+        if variant_path:
+            path = variant_path
+            image_type = image_store.get_variant_type(variant)
+            etag = f"{image_hash}-{variant}"
+
+    headers = {
+        # 内容が変わるとURLも変わるため、ブラウザに長期間キャッシュさせる
+        "Cache-Control": "private, max-age=31536000, immutable",
+        "ETag": f'"{etag}"'
+    }
+    if _etag_matches(headers["ETag"], if_none_match):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if not image_type:
+        image_type = image_store.read_image_type(image_hash)
+
+    return FileResponse(
+        path,
+        media_type=f"image/{image_type}" if image_type else "application/octet-stream",
+        headers=headers
+    )
+
+
 # 掲示板投稿の詳細情報を取得する
-async def get_bulletin_detail(bulletin_id: int, db: Session) -> Dict[str, Any]:
+# compact=Trueの場合、セルを列指向の配列とスタイルパレットで返す
+async def get_bulletin_detail(bulletin_id: int, db: Session, compact: bool = False) -> Dict[str, Any]:
     # 投稿の取得（employeeとjoinedloadで一緒に取得）
     post = db.query(BulletinPost).options(joinedload(BulletinPost.employee)).filter(BulletinPost.id == bulletin_id).first()
     if not post:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"ID {bulletin_id} の掲示板投稿が見つかりません")
 
-    # 並行して各データを取得
+    fetch_cells = _fetch_bulletin_cells_compact if compact else _fetch_bulletin_cells_with_styles
+    data_id = post.data_id
+
+    # 並行して各データを取得（それぞれ独立したセッションを使用）
     cells_data, merges_data, column_dimensions_data, row_dimensions_data, images_data = await asyncio.gather(
-        _fetch_bulletin_cells_with_styles(db, bulletin_id),
-        _fetch_bulletin_merges(db, bulletin_id),
-        _fetch_bulletin_column_dimensions(db, bulletin_id),
-        _fetch_bulletin_row_dimensions(db, bulletin_id),
-        _fetch_bulletin_images(db, bulletin_id)  # 画像データの取得を追加
+        fetch_cells(data_id),
+        _fetch_bulletin_merges(data_id),
+        _fetch_bulletin_column_dimensions(data_id),
+        _fetch_bulletin_row_dimensions(data_id),
+        _fetch_bulletin_images(data_id)  # 画像データの取得を追加
     )
 
     employee_name = post.employee.name if post.employee else None
 
     # レスポンスデータを作成
-    return {
+    detail = {
         "id": post.id,
         "title": post.title,
         "content": post.content,
@@ -681,41 +919,436 @@ async def get_bulletin_detail(bulletin_id: int, db: Session) -> Dict[str, Any]:
         "row_dimensions": row_dimensions_data,
         "images": images_data,  # 画像データを追加
         "exists": True,
-        "parsed_at": datetime.now().isoformat()
+        "parsed_at": post.updated_at.isoformat()  # 同じ内容からは同じスナップショット（ETag）になるよう、投稿の更新日時とする
     }
 
+    if compact:
+        detail["cells"], detail["styles"] = cells_data
+        detail["format"] = DETAIL_FORMAT_COMPACT
 
-# ============= データ取得関連関数 =============
+    return detail
 
-# セルデータとスタイル情報を効率的に取得
-async def _fetch_bulletin_cells_with_styles(db: Session, bulletin_id: int) -> List[Dict[str, Any]]:
-    # セルデータとスタイル情報を並行して取得
-    cells = await _run_in_thread(
-        lambda: db.query(BulletinCell).filter(BulletinCell.bulletin_id == bulletin_id).all()
+
+# ============= 表示範囲（ウィンドウ）取得関連関数 =============
+
+# 1回のウィンドウ取得で指定できる最大の行数・列数
+MAX_WINDOW_ROWS = 500
+MAX_WINDOW_COLS = 200
+
+
+# 掲示板投稿のメタデータ（シートの範囲・行列サイズ）を取得する
+# クライアントはこれを元にスクロール領域を確保し、表示範囲のセルをウィンドウ単位で取得する
+async def get_bulletin_metadata(bulletin_id: int, db: Session) -> Dict[str, Any]:
+    post = db.query(BulletinPost).options(joinedload(BulletinPost.employee)).filter(BulletinPost.id == bulletin_id).first()
+    if not post:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"ID {bulletin_id} の掲示板投稿が見つかりません")
+
+    extent, column_dimensions_data, row_dimensions_data = await asyncio.gather(
+        _fetch_bulletin_extent(post.data_id),
+        _fetch_bulletin_column_dimensions(post.data_id),
+        _fetch_bulletin_row_dimensions(post.data_id)
     )
 
-    cell_ids = [cell.id for cell in cells]
+    return {
+        **await format_bulletin_response(post, post.employee.name if post.employee else None, db),
+        **extent,
+        "column_dimensions": column_dimensions_data,
+        "row_dimensions": row_dimensions_data
+    }
+
+
+# 指定した矩形（行・列とも両端を含む）と重なるセル・結合セル・画像を取得する
+async def get_bulletin_window(
+    bulletin_id: int, start_row: int, end_row: int, start_col: int, end_col: int, db: Session
+) -> Dict[str, Any]:
+    if end_row < start_row or end_col < start_col:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="表示範囲の指定が正しくありません")
+    if end_row - start_row + 1 > MAX_WINDOW_ROWS or end_col - start_col + 1 > MAX_WINDOW_COLS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"一度に取得できる範囲は{MAX_WINDOW_ROWS}行×{MAX_WINDOW_COLS}列までです"
+        )
+
+    data_id = db.query(func.coalesce(BulletinPost.content_source_id, BulletinPost.id)).filter(
+        BulletinPost.id == bulletin_id
+    ).scalar()
+    if data_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"ID {bulletin_id} の掲示板投稿が見つかりません")
+
+    window = (start_row, end_row, start_col, end_col)
+    cells_data, merges_data, images_data = await asyncio.gather(
+        _fetch_window_cells(data_id, *window),
+        _fetch_window_merges(data_id, *window),
+        _fetch_window_images(data_id, *window)
+    )
+
+    return {
+        "id": bulletin_id,
+        "start_row": start_row,
+        "end_row": end_row,
+        "start_col": start_col,
+        "end_col": end_col,
+        "cells": cells_data,
+        "merges": merges_data,
+        "images": images_data
+    }
+
+
+# シートの範囲（セル・結合セル・画像を含む最大の行・列）とセル数を取得
+async def _fetch_bulletin_extent(bulletin_id: int) -> Dict[str, int]:
+    def load(session: Session):
+        cell_row, cell_col, cell_count = session.query(
+            func.max(BulletinCell.row), func.max(BulletinCell.col), func.count(BulletinCell.id)
+        ).filter(BulletinCell.bulletin_id == bulletin_id).one()
+        merge_row, merge_col = session.query(
+            func.max(BulletinMerge.end_row), func.max(BulletinMerge.end_col)
+        ).filter(BulletinMerge.bulletin_id == bulletin_id).one()
+        image_row, image_col = session.query(
+            func.max(BulletinImage.to_row), func.max(BulletinImage.to_col)
+        ).filter(BulletinImage.bulletin_id == bulletin_id).one()
+
+        return {
+            "max_row": max(cell_row or 0, merge_row or 0, image_row or 0),
+            "max_col": max(cell_col or 0, merge_col or 0, image_col or 0),
+            "cell_count": cell_count
+        }
+
+    return await _run_in_session(load)
+
+
+# 範囲内のセルをスタイル付きで取得（uix_cell_positionのインデックスで行の範囲を絞り込む）
+async def _fetch_window_cells(
+    bulletin_id: int, start_row: int, end_row: int, start_col: int, end_col: int
+) -> List[Dict[str, Any]]:
+    def load(session: Session):
+        cells = (
+            session.query(BulletinCell)
+            .filter(
+                BulletinCell.bulletin_id == bulletin_id,
+                BulletinCell.row.between(start_row, end_row),
+                BulletinCell.col.between(start_col, end_col)
+            )
+            .order_by(BulletinCell.row, BulletinCell.col)
+            .all()
+        )
+
+        style_ids = {cell.style_id for cell in cells if cell.style_id}
+        styles = session.query(CellStyle).filter(CellStyle.id.in_(style_ids)).all() if style_ids else []
+
+        return cells, styles
+
+    cells, styles = await _run_in_session(load)
+    style_data_map = {style.id: _format_cell_style(style) for style in styles}
+
+    return [_format_cell_data(cell, style_data_map.get(cell.style_id)) for cell in cells]
 
-    if not cell_ids:
-        return []
 
-    # joinedloadを使用してセルとスタイルを一緒に取得
-    cells_with_styles = await _run_in_thread(
-        lambda: db.query(BulletinCell).options(
-            joinedload(BulletinCell.style)
-        ).filter(
-            BulletinCell.id.in_(cell_ids)
+# 範囲と重なる結合セルを取得（範囲外から始まる結合も含める）
+async def _fetch_window_merges(
+    bulletin_id: int, start_row: int, end_row: int, start_col: int, end_col: int
+) -> List[Dict[str, Any]]:
+    merges = await _run_in_session(
+        lambda session: session.query(BulletinMerge).filter(
+            BulletinMerge.bulletin_id == bulletin_id,
+            BulletinMerge.start_row <= end_row,
+            BulletinMerge.end_row >= start_row,
+            BulletinMerge.start_col <= end_col,
+            BulletinMerge.end_col >= start_col
         ).all()
     )
 
+    return [
+        {
+            "start": {"row": merge.start_row, "col": merge.start_col},
+            "end": {"row": merge.end_row, "col": merge.end_col}
+        }
+        for merge in merges
+    ]
+
+
+# 範囲と重なる画像を取得
+async def _fetch_window_images(
+    bulletin_id: int, start_row: int, end_row: int, start_col: int, end_col: int
+) -> List[Dict[str, Any]]:
+    images = await _run_in_session(
+        lambda session: session.query(BulletinImage).filter(
+            BulletinImage.bulletin_id == bulletin_id,
+            BulletinImage.from_row <= end_row,
+            BulletinImage.to_row >= start_row,
+            BulletinImage.from_col <= end_col,
+            BulletinImage.to_col >= start_col
+        ).all()
+    )
+
+    return [_format_image_data(image) for image in images]
+
+
+# ============= 検索関連関数 =============
+
+# 検索結果として返す投稿数の上限と、1投稿あたりに返す一致セル数
+MAX_SEARCH_RESULTS = 50
+MAX_SEARCH_MATCHES_PER_POST = 5
+
+# 検索語の最小文字数（トライグラムインデックスは3文字未満の部分一致に使えず、全セルの走査になるため）
+MIN_SEARCH_LENGTH = 3
+
+# 関連度を計算する一致セルの上限（よくある語で大量のセルが一致しても、関連度の計算と並べ替えをこの件数に抑える）
+MAX_SEARCH_CANDIDATES = 2000
+
+
+# セルの値で掲示板投稿を検索し、関連度の高い順に一致したセルの位置とともに返す
+# 部分一致（ILIKE）はトライグラムインデックスで絞り込み、関連度はword_similarityで計算する
+async def search_bulletins(query: str, limit: int, db: Session) -> Dict[str, Any]:
+    query = query.strip()
+    if len(query) < MIN_SEARCH_LENGTH:
+        return {"query": query, "results": []}
+
+    limit = min(limit, MAX_SEARCH_RESULTS)
+    pattern = f"%{_escape_like(query)}%"
+
+    def load(session: Session):
+        # 部分一致するセルをインデックスで絞り込んでから、その範囲で関連度と投稿内の順位を計算する
+        candidates = (
+            select(BulletinCell.bulletin_id, BulletinCell.row, BulletinCell.col, BulletinCell.value)
+            .where(BulletinCell.value.ilike(pattern, escape="\\"))
+            .limit(MAX_SEARCH_CANDIDATES)
+            .subquery()
+        )
+        score = func.word_similarity(query, candidates.c.value)
+        matched = (
+            select(
+                candidates.c.bulletin_id,
+                candidates.c.row,
+                candidates.c.col,
+                candidates.c.value,
+                score.label("score"),
+                func.row_number().over(
+                    partition_by=candidates.c.bulletin_id,
+                    order_by=(score.desc(), candidates.c.row, candidates.c.col)
+                ).label("match_rank")
+            )
+            .subquery()
+        )
+
+        # 投稿ごとの関連度（最も近いセルの値）と一致セル数（解析済みデータを共有している投稿も含める）
+        data_id = func.coalesce(BulletinPost.content_source_id, BulletinPost.id)
+        posts = session.execute(
+            select(
+                BulletinPost.id,
+                BulletinPost.title,
+                BulletinPost.updated_at,
+                data_id.label("data_id"),
+                func.max(matched.c.score).label("score"),
+                func.count().label("match_count")
+            )
+            .join(matched, matched.c.bulletin_id == data_id)
+            .group_by(BulletinPost.id)
+            .order_by(func.max(matched.c.score).desc(), BulletinPost.updated_at.desc())
+            .limit(limit)
+        ).all()
+        if not posts:
+            return [], []
+
+        matches = session.execute(
+            select(matched.c.bulletin_id, matched.c.row, matched.c.col, matched.c.value)
+            .where(
+                matched.c.bulletin_id.in_({post.data_id for post in posts}),
+                matched.c.match_rank <= MAX_SEARCH_MATCHES_PER_POST
+            )
+            .order_by(matched.c.bulletin_id, matched.c.match_rank)
+        ).all()
+
+        return posts, matches
+
+    posts, matches = await _run_in_session(load)
+
+    matches_by_post: Dict[int, List[Dict[str, Any]]] = {}
+    for match in matches:
+        matches_by_post.setdefault(match.bulletin_id, []).append(
+            {"row": match.row, "col": match.col, "value": match.value}
+        )
+
+    return {
+        "query": query,
+        "results": [
+            {
+                "id": post.id,
+                "title": post.title,
+                "updated_at": post.updated_at,
+                "score": post.score,
+                "match_count": post.match_count,
+                "matches": matches_by_post.get(post.data_id, [])
+            }
+            for post in posts
+        ]
+    }
+
+
+# LIKEのワイルドカード文字をエスケープする
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+# ============= スナップショット関連関数 =============
+
+# 詳細レスポンスの形式ごとにスナップショットを作成し直す
+# 失敗してもアップロード自体は成功扱いとし、次回の閲覧時に作成する
+async def refresh_bulletin_snapshots(bulletin_id: int, db: Session):
+    try:
+        for compact in (False, True):
+            await _build_bulletin_snapshot(bulletin_id, db, compact)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"スナップショット作成エラー: ID {bulletin_id} - {str(e)}")
+        logger.error(traceback.format_exc())
+
+
+# 社員名の変更時に、その社員の投稿のスナップショットを削除する（コミットは呼び出し元で行う）
+# スナップショットは投稿者名を含むが、有効性は投稿のupdated_atでしか判定しないため、次回の閲覧時に作り直させる
+def invalidate_author_snapshots(employee_id: int, db: Session):
+    db.execute(
+        delete(BulletinSnapshot).where(BulletinSnapshot.bulletin_id.in_(
+            select(BulletinPost.id).where(BulletinPost.employee_id == employee_id)
+        ))
+    )
+
+
+# 詳細レスポンスのスナップショットを取得する（投稿が更新されていれば作成し直す）
+async def get_bulletin_detail_snapshot(bulletin_id: int, db: Session, compact: bool = False) -> BulletinSnapshot:
+    response_format = DETAIL_FORMAT_COMPACT if compact else DETAIL_FORMAT_DEFAULT
+
+    # 投稿のupdated_atと一致するスナップショットのみ有効とする
+    snapshot = (
+        db.query(BulletinSnapshot)
+        .join(BulletinPost, and_(
+            BulletinPost.id == BulletinSnapshot.bulletin_id,
+            BulletinPost.updated_at == BulletinSnapshot.post_updated_at
+        ))
+        .options(defer(BulletinSnapshot.payload))
+        .filter(BulletinSnapshot.bulletin_id == bulletin_id, BulletinSnapshot.format == response_format)
+        .first()
+    )
+    if snapshot:
+        return snapshot
+
+    snapshot = await _build_bulletin_snapshot(bulletin_id, db, compact)
+    db.commit()
+    return snapshot
+
+
+# 詳細レスポンスを作成してJSONエンコード済みの状態で保存する
+# PostgreSQLでは詳細JSONをデータベース側で組み立て、それ以外（SQLite）ではORMで取得して組み立てる
+async def _build_bulletin_snapshot(bulletin_id: int, db: Session, compact: bool) -> BulletinSnapshot:
+    if db.get_bind().dialect.name == "postgresql":
+        payload, post_updated_at = await _load_bulletin_detail_json(bulletin_id, compact)
+    else:
+        detail = await get_bulletin_detail(bulletin_id, db, compact=compact)
+        payload = json.dumps(jsonable_encoder(detail), ensure_ascii=False).encode('utf-8')
+        post_updated_at = detail["updated_at"]
+
+    values = {
+        "bulletin_id": bulletin_id,
+        "format": DETAIL_FORMAT_COMPACT if compact else DETAIL_FORMAT_DEFAULT,
+        "post_updated_at": post_updated_at,
+        "etag": hashlib.sha256(payload).hexdigest(),
+        "payload": payload,
+        "created_at": datetime.now()
+    }
+    db.execute(
+        _insert_on_conflict(db, BulletinSnapshot).values(**values).on_conflict_do_update(
+            index_elements=[BulletinSnapshot.bulletin_id, BulletinSnapshot.format],
+            set_={key: value for key, value in values.items() if key not in ("bulletin_id", "format")}
+        )
+    )
+
+    return BulletinSnapshot(**values)
+
+
+# PostgreSQLで組み立てた詳細JSONを1回の問い合わせで取得する（ORMオブジェクトを作らずそのまま保存・返却する）
+async def _load_bulletin_detail_json(bulletin_id: int, compact: bool) -> Tuple[bytes, datetime]:
+    query = detail_query.build_detail_query(bulletin_id, THUMBNAIL_VARIANT, compact=compact)
+    row = await _run_in_session(lambda session: session.execute(query).first())
+    if not row:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"ID {bulletin_id} の掲示板投稿が見つかりません")
+
+    return row.detail.encode('utf-8'), row.updated_at
+
+
+# スナップショットからレスポンスを作成する（If-None-Matchが一致すれば304を返す）
+# 同じURLでもAcceptヘッダーで形式が変わるため、キャッシュがAcceptごとに区別するようVaryを付ける
+def create_snapshot_response(snapshot: BulletinSnapshot, if_none_match: Optional[str]) -> Response:
+    etag = f'"{snapshot.etag}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept"}
+
+    if _etag_matches(etag, if_none_match):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(content=snapshot.payload, media_type="application/json", headers=headers)
+
+
+# If-None-Matchのいずれか（弱いETagを含む）がETagと一致するかを確認する
+def _etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    if not if_none_match:
+        return False
+    client_etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in client_etags or "*" in client_etags
+
+
+# ============= データ取得関連関数 =============
+
+# セルと使用されているスタイルを取得（セルは行・列の順、スタイルはIDの順）
+# PostgreSQLで組み立てる詳細JSON（detail_query）と同じ順序にする
+async def _load_bulletin_cells_and_styles(bulletin_id: int):
+    def load(session: Session):
+        cells = (
+            session.query(BulletinCell)
+            .filter(BulletinCell.bulletin_id == bulletin_id)
+            .order_by(BulletinCell.row, BulletinCell.col)
+            .all()
+        )
+
+        style_ids = {cell.style_id for cell in cells if cell.style_id}
+        styles = (
+            session.query(CellStyle).filter(CellStyle.id.in_(style_ids)).order_by(CellStyle.id).all()
+            if style_ids else []
+        )
+
+        return cells, styles
+
+    return await _run_in_session(load)
+
+
+# セルデータとスタイル情報を効率的に取得
+async def _fetch_bulletin_cells_with_styles(bulletin_id: int) -> List[Dict[str, Any]]:
+    cells, styles = await _load_bulletin_cells_and_styles(bulletin_id)
+
+    # 共有されているスタイルは1回だけ整形する
+    style_data_map = {style.id: _format_cell_style(style) for style in styles}
+
     # セルデータを整形
-    return [_format_cell_data(cell, cell.style) for cell in cells_with_styles]
+    return [_format_cell_data(cell, style_data_map.get(cell.style_id)) for cell in cells]
+
+
+# セルを列指向の配列（行・列・値・スタイル番号）とスタイルパレットに整形して取得
+async def _fetch_bulletin_cells_compact(bulletin_id: int) -> Tuple[Dict[str, List[Any]], List[Dict[str, Any]]]:
+    cells, styles = await _load_bulletin_cells_and_styles(bulletin_id)
+
+    palette_index = {style.id: index for index, style in enumerate(styles)}
+    columns = {
+        "rows": [cell.row for cell in cells],
+        "cols": [cell.col for cell in cells],
+        "values": [cell.value for cell in cells],
+        "styles": [palette_index.get(cell.style_id) for cell in cells]
+    }
+
+    return columns, [_format_cell_style(style) for style in styles]
 
 
 # 結合セル情報を取得
-async def _fetch_bulletin_merges(db: Session, bulletin_id: int) -> List[Dict[str, Any]]:
-    merges = await _run_in_thread(
-        lambda: db.query(BulletinMerge).filter(BulletinMerge.bulletin_id == bulletin_id).all()
+async def _fetch_bulletin_merges(bulletin_id: int) -> List[Dict[str, Any]]:
+    merges = await _run_in_session(
+        lambda session: session.query(BulletinMerge).filter(BulletinMerge.bulletin_id == bulletin_id).all()
     )
 
     return [
@@ -728,9 +1361,9 @@ async def _fetch_bulletin_merges(db: Session, bulletin_id: int) -> List[Dict[str
 
 
 # 列の幅情報を取得
-async def _fetch_bulletin_column_dimensions(db: Session, bulletin_id: int) -> Dict[str, float]:
-    column_dimensions = await _run_in_thread(
-        lambda: db.query(BulletinColumnDimension).filter(
+async def _fetch_bulletin_column_dimensions(bulletin_id: int) -> Dict[str, float]:
+    column_dimensions = await _run_in_session(
+        lambda session: session.query(BulletinColumnDimension).filter(
             BulletinColumnDimension.bulletin_id == bulletin_id
         ).all()
     )
@@ -739,9 +1372,9 @@ async def _fetch_bulletin_column_dimensions(db: Session, bulletin_id: int) -> Di
 
 
 # 行の高さ情報を取得
-async def _fetch_bulletin_row_dimensions(db: Session, bulletin_id: int) -> Dict[str, float]:
-    row_dimensions = await _run_in_thread(
-        lambda: db.query(BulletinRowDimension).filter(
+async def _fetch_bulletin_row_dimensions(bulletin_id: int) -> Dict[str, float]:
+    row_dimensions = await _run_in_session(
+        lambda session: session.query(BulletinRowDimension).filter(
             BulletinRowDimension.bulletin_id == bulletin_id
         ).all()
     )
@@ -750,26 +1383,14 @@ async def _fetch_bulletin_row_dimensions(db: Session, bulletin_id: int) -> Dict[
 
 
 # 画像情報を取得
-async def _fetch_bulletin_images(db: Session, bulletin_id: int) -> List[Dict[str, Any]]:
-    images = await _run_in_thread(
-        lambda: db.query(BulletinImage).filter(
+async def _fetch_bulletin_images(bulletin_id: int) -> List[Dict[str, Any]]:
+    images = await _run_in_session(
+        lambda session: session.query(BulletinImage).filter(
             BulletinImage.bulletin_id == bulletin_id
         ).all()
     )
 
-    return [
-        {
-            "image_data": image.image_data,
-            "image_type": image.image_type,
-            "from_row": image.from_row,
-            "from_col": image.from_col,
-            "to_row": image.to_row,
-            "to_col": image.to_col,
-            "width": image.width,
-            "height": image.height
-        }
-        for image in images
-    ]
+    return [_format_image_data(image) for image in images]
 
 
 # ============= ユーティリティ関数 =============
@@ -896,8 +1517,23 @@ def _generate_safe_filename(post):
         safe_title = ''.join(c if c.isalnum() or c in '_- ' else '_' for c in ascii_title)
         return f"{safe_title}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
 
+# 画像情報をフロントエンド用にフォーマット（画像本体はURLから取得する）
+def _format_image_data(image):
+    return {
+        "image_url": image_store.get_image_url(image.image_hash),
+        "thumbnail_url": image_store.get_image_url(image.image_hash, THUMBNAIL_VARIANT),
+        "image_type": image.image_type,
+        "from_row": image.from_row,
+        "from_col": image.from_col,
+        "to_row": image.to_row,
+        "to_col": image.to_col,
+        "width": image.width,
+        "height": image.height
+    }
+
+
 # セルデータをフロントエンド用にフォーマット
-def _format_cell_data(cell, style):
+def _format_cell_data(cell, style_data):
     cell_data = {
         "row": cell.row,
         "col": cell.col,
@@ -905,43 +1541,67 @@ def _format_cell_data(cell, style):
     }
 
     # スタイル情報があれば追加
-    if style:
-        cell_data["style"] = {
-            "font": {
-                "bold": style.font_bold,
-                "color": style.font_color,
-                "size": style.font_size
+    if style_data:
+        cell_data["style"] = style_data
+
+    return cell_data
+
+
+# セルスタイルをフロントエンド用にフォーマット
+def _format_cell_style(style):
+    return {
+        "font": {
+            "bold": style.font_bold,
+            "color": style.font_color,
+            "size": style.font_size
+        },
+        "fill": {
+            "bgColor": style.bg_color
+        },
+        "border": {
+            "top": {
+                "style": style.border_top_style,
+                "color": style.border_top_color
             },
-            "fill": {
-                "bgColor": style.bg_color
+            "right": {
+                "style": style.border_right_style,
+                "color": style.border_right_color
             },
-            "border": {
-                "top": {
-                    "style": style.border_top_style,
-                    "color": style.border_top_color
-                },
-                "right": {
-                    "style": style.border_right_style,
-                    "color": style.border_right_color
-                },
-                "bottom": {
-                    "style": style.border_bottom_style,
-                    "color": style.border_bottom_color
-                },
-                "left": {
-                    "style": style.border_left_style,
-                    "color": style.border_left_color
-                }
+            "bottom": {
+                "style": style.border_bottom_style,
+                "color": style.border_bottom_color
             },
-            "alignment": {
-                "horizontal": style.alignment_horizontal,
-                "vertical": style.alignment_vertical
+            "left": {
+                "style": style.border_left_style,
+                "color": style.border_left_color
             }
+        },
+        "alignment": {
+            "horizontal": style.alignment_horizontal,
+            "vertical": style.alignment_vertical
         }
+    }
 
-    return cell_data
+
+# 接続先のデータベースに合わせたINSERT ... ON CONFLICT文を作成する
+# PostgreSQLとSQLiteはon_conflict_do_nothing / on_conflict_do_updateを同じ書き方で使える
+def _insert_on_conflict(db: Session, model):
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite_insert(model)
+    return pg_insert(model)
 
 
 # スレッドプールエグゼキューターでCPU負荷の高い処理を実行
 async def _run_in_thread(func):
-    return await asyncio.get_event_loop().run_in_executor(thread_executor, func)
\ No newline at end of file
+    return await asyncio.get_event_loop().run_in_executor(thread_executor, func)
+
+
+# 接続プールから取得した専用のセッションで、スレッドプール上でデータ取得を実行する
+# Sessionはスレッドセーフではないため、並行して実行する取得処理でリクエストのセッションを共有しない
+# 戻り値のORMオブジェクトはセッションから切り離されるため、必要な属性・リレーションは取得時に読み込んでおく
+async def _run_in_session(func):
+    def run():
+        with SessionLocal() as session:
+            return func(session)
+
+    return await _run_in_thread(run)
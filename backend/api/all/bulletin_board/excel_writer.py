@@ -0,0 +1,192 @@
+import zipfile
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+from xml.sax.saxutils import escape
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles.stylesheet import write_stylesheet
+from openpyxl.utils import get_column_letter
+from openpyxl.xml.functions import tostring
+
+# 1回の出力で送り出すおおよそのバイト数
+CHUNK_SIZE = 64 * 1024
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+CONTENT_TYPES_XML = XML_HEADER + (
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+ROOT_RELS_XML = XML_HEADER + (
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+WORKBOOK_XML = XML_HEADER + (
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Sheet" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+WORKBOOK_RELS_XML = XML_HEADER + (
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+
+# ZipFileの書き込み先（書き込まれたバイト列を溜めておき、まとめて取り出す）
+class _ChunkBuffer:
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        self.size = 0
+        return data
+
+
+# xlsxを先頭から順に書き出し、ZIPのバイト列を少しずつ返すライター
+# セルは行・列の昇順で受け取り、シートXMLを行単位で書き込むためメモリ使用量はセル数に依存しない
+class ExcelStreamWriter:
+
+    def __init__(self, style_applier: Callable[[Any, Any], None]):
+        self._style_applier = style_applier
+
+    # ブック全体を生成し、ZIPのバイト列をチャンク単位で返す
+    # styles: {スタイルID: スタイル}、cells: (行, 列, 値, スタイルID) を行・列の昇順で返すイテラブル
+    def iter_workbook(
+        self,
+        styles: Dict[int, Any],
+        column_widths: Dict[int, float],
+        row_heights: Dict[int, float],
+        merges: List[Tuple[int, int, int, int]],
+        cells: Iterable[Tuple[int, int, Any, Any]]
+    ) -> Iterator[bytes]:
+        buffer = _ChunkBuffer()
+        style_xml, style_index = self._build_stylesheet(styles)
+
+        # 出力先はシーク不可のため、各エントリはデータディスクリプタ付きで書き込まれる
+        with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('[Content_Types].xml', CONTENT_TYPES_XML)
+            archive.writestr('_rels/.rels', ROOT_RELS_XML)
+            archive.writestr('xl/workbook.xml', WORKBOOK_XML)
+            archive.writestr('xl/_rels/workbook.xml.rels', WORKBOOK_RELS_XML)
+            archive.writestr('xl/styles.xml', style_xml)
+            yield buffer.pop()
+
+            with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+                for xml in self._iter_sheet_xml(style_index, column_widths, row_heights, merges, cells):
+                    sheet.write(xml.encode('utf-8'))
+                    if buffer.size >= CHUNK_SIZE:
+                        yield buffer.pop()
+
+        yield buffer.pop()
+
+    # 使用するスタイルをopenpyxlのスタイル表に登録し、styles.xmlとスタイルID→書式番号の対応を返す
+    def _build_stylesheet(self, styles: Dict[int, Any]) -> Tuple[str, Dict[int, int]]:
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+
+        style_index = {}
+        for style_id, style in styles.items():
+            cell = WriteOnlyCell(sheet)
+            self._style_applier(cell, style)
+            style_index[style_id] = cell.style_id
+
+        return XML_HEADER + tostring(write_stylesheet(workbook)).decode('utf-8'), style_index
+
+    # シートXMLを断片ごとに返す（行高のみ指定された空行も行番号順に出力する）
+    def _iter_sheet_xml(self, style_index, column_widths, row_heights, merges, cells) -> Iterator[str]:
+        yield XML_HEADER + '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+
+        if column_widths:
+            yield '<cols>' + ''.join(
+                f'<col min="{col}" max="{col}" width="{width}" customWidth="1"/>'
+                for col, width in sorted(column_widths.items())
+            ) + '</cols>'
+
+        yield '<sheetData>'
+
+        pending_heights = sorted(row_heights.items(), reverse=True)
+        current_row = None
+        row_parts: List[str] = []
+
+        for row, col, value, style_id in cells:
+            if row != current_row:
+                if current_row is not None:
+                    yield self._row_xml(current_row, row_heights, row_parts)
+                # 現在の行より前にある、セルを持たない行高指定を出力
+                while pending_heights and pending_heights[-1][0] < row:
+                    yield self._row_xml(pending_heights.pop()[0], row_heights, [])
+                if pending_heights and pending_heights[-1][0] == row:
+                    pending_heights.pop()
+                current_row = row
+                row_parts = []
+
+            row_parts.append(self._cell_xml(row, col, value, style_index.get(style_id)))
+
+        if current_row is not None:
+            yield self._row_xml(current_row, row_heights, row_parts)
+        while pending_heights:
+            yield self._row_xml(pending_heights.pop()[0], row_heights, [])
+
+        yield '</sheetData>'
+
+        if merges:
+            yield f'<mergeCells count="{len(merges)}">' + ''.join(
+                f'<mergeCell ref="{get_column_letter(start_col)}{start_row}:{get_column_letter(end_col)}{end_row}"/>'
+                for start_row, start_col, end_row, end_col in merges
+            ) + '</mergeCells>'
+
+        yield '</worksheet>'
+
+    @staticmethod
+    def _row_xml(row: int, row_heights: Dict[int, float], parts: List[str]) -> str:
+        height = row_heights.get(row)
+        height_attrs = f' ht="{height}" customHeight="1"' if height is not None else ''
+        return f'<row r="{row}"{height_attrs}>' + ''.join(parts) + '</row>'
+
+    # 値は文字列として保存されているため、共有文字列表を使わずインライン文字列で出力する
+    @staticmethod
+    def _cell_xml(row: int, col: int, value, xf_index) -> str:
+        ref = f'{get_column_letter(col)}{row}'
+        style_attr = f' s="{xf_index}"' if xf_index else ''
+        if value is None or value == '':
+            return f'<c r="{ref}"{style_attr}/>'
+
+        text = ILLEGAL_CHARACTERS_RE.sub('', str(value))
+        return (
+            f'<c r="{ref}"{style_attr} t="inlineStr"><is>'
+            f'<t xml:space="preserve">{escape(text)}</t></is></c>'
+        )
@@ -0,0 +1,100 @@
+import hashlib
+import logging
+import os
+import tempfile
+from typing import BinaryIO, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# アップロードされた元ファイルの保存先ディレクトリ
+FILE_CACHE_DIR = os.environ.get('BULLETIN_FILE_CACHE_DIR', os.path.join('backend', 'storage', 'bulletin_files'))
+
+# キャッシュの合計サイズの上限（超えた場合は最後に使われた時刻が古いものから削除）
+FILE_CACHE_MAX_BYTES = int(os.environ.get('BULLETIN_FILE_CACHE_MAX_BYTES', 1024 * 1024 * 1024))
+
+# 書き込み中の一時ファイルの接頭辞（削除対象から除外する）
+TEMP_FILE_PREFIX = '.upload-'
+
+# ハッシュ計算・コピー時の読み込み単位
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+# 元ファイルを保存して保存先のパスと内容のハッシュを返す（ファイル名は投稿IDと内容のハッシュ）
+def store_file(bulletin_id: int, file_data: BinaryIO, filename: str) -> Tuple[str, str]:
+    os.makedirs(FILE_CACHE_DIR, exist_ok=True)
+    extension = os.path.splitext(filename)[1].lower() or '.xlsx'
+
+    # 書き込み途中のファイルを読まれないよう、一時ファイルに書きながらハッシュを計算する
+    digest = hashlib.sha256()
+    fd, temp_path = tempfile.mkstemp(dir=FILE_CACHE_DIR, prefix=TEMP_FILE_PREFIX)
+    try:
+        file_data.seek(0)
+        with os.fdopen(fd, 'wb') as temp_file:
+            for chunk in iter(lambda: file_data.read(COPY_CHUNK_SIZE), b''):
+                digest.update(chunk)
+                temp_file.write(chunk)
+
+        path = os.path.join(FILE_CACHE_DIR, f"{bulletin_id}_{digest.hexdigest()}{extension}")
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    finally:
+        file_data.seek(0)
+
+    evict()
+    return path, digest.hexdigest()
+
+
+# キャッシュ済みのファイルがあればパスを返す（使用時刻を更新してLRUの対象から外す）
+def get_cached_path(path: Optional[str]) -> Optional[str]:
+    if not path or not _is_cache_path(path):
+        return None
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+# キャッシュ済みのファイルを削除
+def remove_file(path: Optional[str]):
+    if not path or not _is_cache_path(path):
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# 合計サイズが上限を超えている場合、使用時刻（mtime）が古いファイルから削除する
+def evict():
+    entries = []
+    total_size = 0
+    with os.scandir(FILE_CACHE_DIR) as scanner:
+        for entry in scanner:
+            if not entry.is_file() or entry.name.startswith(TEMP_FILE_PREFIX):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total_size += stat.st_size
+
+    if total_size <= FILE_CACHE_MAX_BYTES:
+        return
+
+    for _, size, path in sorted(entries):
+        remove_file(path)
+        total_size -= size
+        logger.info(f"元ファイルのキャッシュを削除: {path}")
+        if total_size <= FILE_CACHE_MAX_BYTES:
+            break
+
+
+# キャッシュディレクトリ内のパスかを確認（DBの値を信用しすぎないため）
+def _is_cache_path(path: str) -> bool:
+    cache_dir = os.path.abspath(FILE_CACHE_DIR)
+    return os.path.dirname(os.path.abspath(path)) == cache_dir
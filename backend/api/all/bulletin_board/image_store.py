@@ -0,0 +1,195 @@
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# 掲示板画像の保存先ディレクトリ（内容のハッシュをファイル名とする）
+IMAGE_STORE_DIR = os.environ.get('BULLETIN_IMAGE_DIR', os.path.join('backend', 'storage', 'bulletin_images'))
+
+# 画像URLのプレフィックス
+IMAGE_URL_PREFIX = "/api/all/bulletin_board/images"
+
+# ハッシュ値の形式（SHA-256の16進表記）
+IMAGE_HASH_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+# 縮小画像の種類（最大辺のピクセル数, 保存形式）
+IMAGE_VARIANTS = {
+    "thumb": (320, "JPEG"),
+    "thumb_webp": (320, "WEBP"),
+}
+
+# 縮小画像の生成用ワーカー（アップロード処理を待たせないようバックグラウンドで実行）
+variant_executor = ThreadPoolExecutor(max_workers=2)
+
+# 画像形式ごとのファイルシグネチャ
+IMAGE_SIGNATURES = [
+    (b'\xff\xd8', 'jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+    (b'BM', 'bmp'),
+    (b'II*\x00', 'tiff'),
+    (b'MM\x00*', 'tiff'),
+    (b'\xd7\xcd\xc6\x9a', 'wmf'),
+]
+
+# 画像形式の判定に読み込む先頭バイト数
+IMAGE_HEADER_SIZE = 64
+
+# Pillowで縮小できないベクター形式
+VECTOR_IMAGE_TYPES = {'emf', 'wmf'}
+
+
+# 画像データのハッシュ値を計算
+def compute_image_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+# ハッシュ値から保存先のパスを取得（1ディレクトリのファイル数を抑えるため2階層に分ける）
+def get_image_path(image_hash: str) -> str:
+    return os.path.join(IMAGE_STORE_DIR, image_hash[:2], image_hash[2:4], image_hash)
+
+
+# ハッシュ値が正しい形式かを確認
+def is_valid_image_hash(image_hash: str) -> bool:
+    return bool(IMAGE_HASH_PATTERN.match(image_hash))
+
+
+# 画像データを保存してハッシュ値を返す（同じ内容の画像は1つだけ保存される）
+def save_image(data: bytes) -> str:
+    image_hash = compute_image_hash(data)
+    path = get_image_path(image_hash)
+    if os.path.exists(path):
+        return image_hash
+
+    _write_file_atomic(path, data)
+    return image_hash
+
+
+# 書き込み途中のファイルを読まれないよう、一時ファイルに書いてから置き換える
+def _write_file_atomic(path: str, data: bytes):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+
+    fd, temp_path = tempfile.mkstemp(dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+# 縮小画像の保存先のパスを取得
+def get_variant_path(image_hash: str, variant: str) -> str:
+    return f"{get_image_path(image_hash)}_{variant}"
+
+
+# 縮小画像の形式を取得
+def get_variant_type(variant: str) -> str:
+    return IMAGE_VARIANTS[variant][1].lower()
+
+
+# 縮小画像を作成してパスを返す（作成済みの場合はそのまま返す、作成できない形式はNone）
+def generate_variant(image_hash: str, variant: str) -> Optional[str]:
+    path = get_variant_path(image_hash, variant)
+    if os.path.exists(path):
+        return path
+    if read_image_type(image_hash) in VECTOR_IMAGE_TYPES:
+        return None
+
+    max_size, image_format = IMAGE_VARIANTS[variant]
+    try:
+        with Image.open(get_image_path(image_hash)) as image:
+            image.thumbnail((max_size, max_size))
+            image = _convert_for_format(image, image_format)
+            output = io.BytesIO()
+            image.save(output, image_format, quality=80)
+    except (OSError, ValueError) as e:
+        logger.warning(f"縮小画像を作成できませんでした: {image_hash} ({variant}) - {str(e)}")
+        return None
+
+    _write_file_atomic(path, output.getvalue())
+    return path
+
+
+# 保存形式に合わせて画像のモードを変換する
+# 透過のある画像は、透過を扱える形式（WebP）ではそのまま残し、JPEGでは白背景に合成する（そのまま変換すると透過部分が黒になる）
+def _convert_for_format(image: Image.Image, image_format: str) -> Image.Image:
+    has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+    if not has_alpha:
+        return image if image.mode in ("RGB", "L") else image.convert("RGB")
+
+    image = image.convert("RGBA")
+    if image_format != "JPEG":
+        return image
+
+    background = Image.new("RGB", image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel("A"))
+    return background
+
+
+# 全種類の縮小画像を作成
+def generate_variants(image_hash: str):
+    for variant in IMAGE_VARIANTS:
+        try:
+            generate_variant(image_hash, variant)
+        except Exception as e:
+            logger.error(f"縮小画像の作成中にエラー: {image_hash} ({variant}) - {str(e)}")
+
+
+# 縮小画像の作成をバックグラウンドワーカーに登録
+def schedule_variants(image_hash: str):
+    variant_executor.submit(generate_variants, image_hash)
+
+
+# 画像と縮小画像を削除する（参照している投稿がないことは呼び出し側で確認する）
+def remove_image(image_hash: str):
+    if not is_valid_image_hash(image_hash):
+        return
+    paths = [get_image_path(image_hash)] + [get_variant_path(image_hash, variant) for variant in IMAGE_VARIANTS]
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"画像ファイルを削除できませんでした: {path} - {str(e)}")
+
+
+# ファイル先頭のシグネチャから画像形式を判定
+def detect_image_type(header: bytes) -> Optional[str]:
+    for signature, image_type in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return image_type
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    # EMFはヘッダーレコード内（先頭から40バイト目）にシグネチャを持つ
+    if header[:4] == b'\x01\x00\x00\x00' and header[40:44] == b' EMF':
+        return 'emf'
+    return None
+
+
+# 保存済み画像の形式を判定
+def read_image_type(image_hash: str) -> Optional[str]:
+    with open(get_image_path(image_hash), 'rb') as image_file:
+        return detect_image_type(image_file.read(IMAGE_HEADER_SIZE))
+
+
+# 画像のURLを取得（variantを指定すると縮小画像のURL）
+def get_image_url(image_hash: Optional[str], variant: Optional[str] = None) -> Optional[str]:
+    if not image_hash:
+        return None
+    if variant:
+        return f"{IMAGE_URL_PREFIX}/{image_hash}?variant={variant}"
+    return f"{IMAGE_URL_PREFIX}/{image_hash}"
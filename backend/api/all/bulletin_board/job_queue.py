@@ -0,0 +1,267 @@
+import asyncio
+import json
+import logging
+import os
+import traceback
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from fastapi import UploadFile
+from sqlalchemy import update
+
+from backend.models import SessionLocal
+from backend.api.all.models import BulletinJob
+from backend.api.general.models import Employee
+from backend.change_notifier import change_notifier
+from backend.utils import upload_service
+from backend.api.all.bulletin_board import excel_executor
+from backend.scripts.get_time import now
+
+logger = logging.getLogger(__name__)
+
+# 解析待ちのアップロードファイルの保存先
+UPLOAD_DIR = os.environ.get('BULLETIN_UPLOAD_DIR', os.path.join('backend', 'storage', 'bulletin_uploads'))
+
+# 進捗をデータベースに書き込む最小の変化量（%）
+PROGRESS_STEP = 5
+
+# ジョブの状態
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+ACTIVE_JOB_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+
+# 待機中・実行中のジョブの生存をupdated_atに記録する間隔（秒）
+JOB_HEARTBEAT_SECONDS = 30
+
+# 生存の記録がこの時間（秒）途絶えたジョブは、実行していたワーカーが停止したものとみなして失敗にする
+JOB_STALE_SECONDS = 120
+
+# 実行中のジョブ監視タスク（ガベージコレクションで消えないよう参照を保持）
+_monitor_tasks = set()
+_recovery_task: Optional[asyncio.Task] = None
+
+
+# アップロードファイルを解析待ちのファイルとして保存する（保存しながら内容のハッシュを計算する）
+async def save_upload(file: UploadFile) -> upload_service.StoredUpload:
+    extension = os.path.splitext(file.filename)[1].lower() or '.xlsx'
+    return await upload_service.save_upload(file, UPLOAD_DIR, suffix=extension)
+
+
+# ジョブを登録し、解析をバックグラウンドで開始する
+async def enqueue_job(
+    db, employee_id: int, employee_no: str, upload_path: str,
+    filename: str, title: str, content: Optional[str], content_hash: Optional[str] = None
+) -> BulletinJob:
+    job = BulletinJob(
+        employee_id=employee_id,
+        status=JOB_QUEUED,
+        progress=0,
+        title=title,
+        content=content,
+        filename=filename,
+        upload_path=upload_path,
+        content_hash=content_hash
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    task = asyncio.create_task(_monitor_job(job.id, employee_no))
+    _monitor_tasks.add(task)
+    task.add_done_callback(_monitor_tasks.discard)
+    return job
+
+
+# ジョブの情報をレスポンス・通知用に整形
+def format_job(job) -> Dict[str, Any]:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "progress": job.progress,
+        "message": job.message,
+        "bulletin_id": job.bulletin_id
+    }
+
+
+# Excelの解析・生成と同じ実行方式（スレッドまたはプロセスプール）で解析を実行し、完了を待って最終状態を投稿者にWebSocketで通知する
+# 実行中の進捗はジョブ本体が状態の更新ごとに通知する（投稿者が別のワーカーに接続していても届く）
+async def _monitor_job(job_id: int, employee_no: str):
+    loop = asyncio.get_running_loop()
+    future = asyncio.ensure_future(excel_executor.run(run_job, job_id))
+    try:
+        # 完了まで生存を記録し、他のワーカーから中断されたジョブと判定されないようにする
+        while True:
+            done, _ = await asyncio.wait({future}, timeout=JOB_HEARTBEAT_SECONDS)
+            if done:
+                break
+            await loop.run_in_executor(None, lambda: _update_job(job_id, updated_at=now()))
+        future.result()
+    except Exception as e:
+        # ワーカープロセスの異常終了など、ジョブ内で記録できなかったエラー
+        logger.error(f"掲示板解析ジョブ {job_id} の実行中にエラー: {str(e)}")
+        await loop.run_in_executor(None, lambda: _update_job(job_id, status=JOB_FAILED, message=str(e)))
+
+    # ワーカープロセスからの通知が届かない場合（PostgreSQL以外など）に備え、最終状態は必ず通知する
+    state = await loop.run_in_executor(None, _load_job_state, job_id)
+    if state is None:
+        return
+    await change_notifier.notify_user(employee_no, _job_message(state), _job_key(job_id))
+
+    if state["status"] == JOB_SUCCEEDED:
+        from backend.api.all.bulletin_board import excel_service
+        excel_service.invalidate_post_count()
+
+
+# 通知のキー（未送信の進捗は最新の状態で置き換える）
+def _job_key(job_id: int) -> str:
+    return f"bulletin_job:{job_id}"
+
+
+# ジョブの状態の通知メッセージ
+def _job_message(state: Dict[str, Any]) -> str:
+    return json.dumps({"type": "bulletin_job", "job": state})
+
+
+# ジョブの現在の状態を取得
+def _load_job_state(job_id: int) -> Optional[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        job = db.get(BulletinJob, job_id)
+        return format_job(job) if job else None
+    finally:
+        db.close()
+
+
+# ジョブの状態を更新（解析中のトランザクションとは別のセッションでコミットする）
+# 完了・失敗したジョブ（中断とみなして失敗にしたジョブを含む）は更新しない
+def _update_job(job_id: int, **values):
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(BulletinJob)
+            .where(BulletinJob.id == job_id, BulletinJob.status.in_(ACTIVE_JOB_STATUSES))
+            .values(**values)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+# ジョブ本体（プロセスプールで実行する場合に備え、ジョブIDのみを受け渡す）
+def run_job(job_id: int):
+    from backend.api.all.bulletin_board import excel_service
+
+    db = SessionLocal()
+    job = db.get(BulletinJob, job_id)
+    if job is None:
+        # 登録直後に削除された場合など
+        logger.error(f"掲示板解析ジョブ {job_id} が見つかりません")
+        db.close()
+        return
+    if job.status not in ACTIVE_JOB_STATUSES:
+        # 実行を待つ間に中断されたジョブとして失敗にされた場合
+        logger.error(f"掲示板解析ジョブ {job_id} は既に終了しています（状態: {job.status}）")
+        db.close()
+        return
+    upload_path = job.upload_path
+    employee_no = db.query(Employee.employee_no).filter(Employee.id == job.employee_id).scalar()
+
+    # 状態を更新し、投稿者に通知する
+    def update(**values):
+        _update_job(job_id, **values)
+        state = _load_job_state(job_id)
+        if state and employee_no:
+            change_notifier.send_to_user(employee_no, _job_message(state), _job_key(job_id))
+
+    update(status=JOB_RUNNING, progress=0)
+
+    # セルの保存を全体の90%として進捗を記録する
+    last_percent = 0
+
+    def report(ratio: float):
+        nonlocal last_percent
+        percent = int(ratio * 90)
+        if percent - last_percent >= PROGRESS_STEP:
+            last_percent = percent
+            update(progress=percent)
+
+    try:
+        with open(upload_path, 'rb') as file_data:
+            post = asyncio.run(excel_service.parse_excel_to_db(
+                file_data, job.filename, job.employee_id, job.title, job.content, db,
+                progress=report, content_hash=job.content_hash
+            ))
+        update(status=JOB_SUCCEEDED, progress=100, bulletin_id=post.id, upload_path=None)
+
+    except Exception as e:
+        logger.error(f"掲示板解析ジョブ {job_id} でエラー: {str(e)}")
+        logger.error(traceback.format_exc())
+        update(status=JOB_FAILED, message=str(e), upload_path=None)
+
+    finally:
+        db.close()
+        _remove_upload(upload_path)
+
+
+# 解析待ちのアップロードファイルを削除
+def _remove_upload(upload_path: Optional[str]):
+    if upload_path and os.path.exists(upload_path):
+        os.remove(upload_path)
+
+
+# 中断されたジョブの回収を開始する（アプリケーションのイベントループ上で呼び出す）
+async def start_recovery():
+    global _recovery_task
+    if _recovery_task is None:
+        _recovery_task = asyncio.create_task(_recover_periodically())
+
+
+# 中断されたジョブの回収を停止する
+async def stop_recovery():
+    global _recovery_task
+    if _recovery_task is None:
+        return
+    _recovery_task.cancel()
+    try:
+        await _recovery_task
+    except asyncio.CancelledError:
+        pass
+    _recovery_task = None
+
+
+# 起動時と、その後は一定間隔で中断されたジョブを回収する（停止したワーカーのジョブは、他のワーカーが回収する）
+async def _recover_periodically():
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            await loop.run_in_executor(None, recover_stale_jobs)
+        except Exception as e:
+            logger.error(f"中断された掲示板解析ジョブの回収中にエラー: {str(e)}")
+        await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+
+
+# 生存の記録が途絶えた（実行していたワーカーが停止した）待機中・実行中のジョブを失敗にし、アップロードファイルを削除する
+# 各ワーカーは自分のジョブの生存を記録しているため、実行中の他のワーカーのジョブは対象にならない
+# 実行中のジョブはワーカーとともに失われるため、再開はせずに投稿者に再アップロードしてもらう
+def recover_stale_jobs():
+    db = SessionLocal()
+    try:
+        jobs = db.query(BulletinJob).filter(
+            BulletinJob.status.in_(ACTIVE_JOB_STATUSES),
+            BulletinJob.updated_at < now() - timedelta(seconds=JOB_STALE_SECONDS)
+        ).all()
+        for job in jobs:
+            try:
+                _remove_upload(job.upload_path)
+            except OSError as e:
+                logger.error(f"中断された掲示板解析ジョブ {job.id} のファイルを削除できませんでした: {str(e)}")
+            job.status = JOB_FAILED
+            job.message = "解析を実行していたサーバーが停止したため、解析が中断されました。再度アップロードしてください"
+            job.upload_path = None
+        db.commit()
+        if jobs:
+            logger.info(f"中断された掲示板解析ジョブを失敗にしました: {[job.id for job in jobs]}")
+    finally:
+        db.close()
@@ -1,16 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request, status
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, status
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Optional, Union
 import logging
-import io
 import traceback
 
 from backend.models import get_db
-from backend.api.all.bulletin_board import excel_service
+from backend.api.all.bulletin_board import excel_service, job_queue
+from backend.utils import upload_service
 from backend.utils.auth_service import authenticate_user, authenticate_and_authorize_post_owner
-from backend.api.all.models import BulletinPost
+from backend.api.all.models import BulletinJob, BulletinPost
 from backend.api.all.bulletin_board.schemas import BulletinPostResponse, BulletinListResponse, BulletinDetailResponse
+from backend.api.all.bulletin_board.schemas import BulletinCompactDetailResponse, BulletinJobResponse
+from backend.api.all.bulletin_board.schemas import BulletinMetadataResponse, BulletinWindowResponse, BulletinSearchResponse
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -20,7 +22,8 @@ DOWNLOAD_PATH_PREFIX = "/api/all/bulletin_board/download"
 
 
 # エクセルファイルをアップロードして掲示板投稿
-@router.post("/upload-excel", response_model=BulletinPostResponse)
+# 解析はバックグラウンドのジョブで行い、ジョブIDをすぐに返す（進捗はWebSocketで通知）
+@router.post("/upload-excel", response_model=BulletinJobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def upload_excel(
     request: Request,
     file: UploadFile = File(...),
@@ -36,49 +39,95 @@ async def upload_excel(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Excel形式のファイルをアップロードしてください")
 
     try:
-        # ファイルの内容を読み込み
-        contents = await file.read()
-
-        # ExcelServiceを使ってファイルをパースしデータベースに保存
-        bulletin_post = await excel_service.parse_excel_to_db(
-            io.BytesIO(contents),
-            file.filename,
+        # ファイルを解析待ちとして保存し、解析ジョブを登録
+        upload = await job_queue.save_upload(file)
+        job = await job_queue.enqueue_job(
+            db,
             current_user.id,  # 認証されたユーザーIDを使用
+            current_user.employee_no,
+            upload.path,
+            file.filename,
             title,
             content,
-            db
+            upload.sha256
         )
 
-        # 投稿データをレスポンス用に整形
-        return await excel_service.format_bulletin_response(bulletin_post, current_user.name, db)
+        return job_queue.format_job(job)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"エラー発生: {str(e)}")
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"ファイル処理中にエラーが発生しました: {str(e)}")
 
 
+# 解析ジョブの状態を取得（WebSocketに接続できない場合の確認用）
+@router.get("/jobs/{job_id}", response_model=BulletinJobResponse)
+async def get_bulletin_job(
+    job_id: int,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    # 認証確認
+    current_user = await authenticate_user(request, db)
+
+    job = db.query(BulletinJob).filter(
+        BulletinJob.id == job_id,
+        BulletinJob.employee_id == current_user.id
+    ).first()
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"ID {job_id} の解析ジョブが見つかりません")
+
+    return job_queue.format_job(job)
+
+
 # 掲示板投稿一覧を取得
 @router.get("/list", response_model=BulletinListResponse)
 async def get_bulletin_list(
     request: Request,
     skip: int = 0,
     limit: int = 10,
+    thumbnail: bool = False,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     # 認証確認
     await authenticate_user(request, db)
 
     try:
-        # 投稿一覧を取得
-        return await excel_service.get_bulletin_list(skip, limit, db)
+        # 投稿一覧を取得（cursorを指定した場合はその続きから取得）
+        # thumbnail=trueの場合、画像は各投稿の1枚目のみ返す（一覧のサムネイル表示用、全画像は詳細で取得する）
+        return await excel_service.get_bulletin_list(skip, limit, db, thumbnails_only=thumbnail, cursor=cursor)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"掲示板リスト取得エラー: {str(e)}")
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"掲示板リストの取得中にエラーが発生しました: {str(e)}")
 
 
+# セルの値で掲示板投稿を検索（入力中の逐次検索を想定し、関連度の高い順に返す）
+@router.get("/search", response_model=BulletinSearchResponse)
+async def search_bulletins(
+    request: Request,
+    q: str = Query(..., min_length=excel_service.MIN_SEARCH_LENGTH, max_length=100),
+    limit: int = Query(20, ge=1, le=excel_service.MAX_SEARCH_RESULTS),
+    db: Session = Depends(get_db)
+):
+    # 認証確認
+    await authenticate_user(request, db)
+
+    try:
+        return await excel_service.search_bulletins(q, limit, db)
+
+    except Exception as e:
+        logger.error(f"掲示板検索エラー: {str(e)}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"掲示板の検索中にエラーが発生しました: {str(e)}")
+
+
 # 掲示板データからエクセルファイルを生成してダウンロード
 @router.get("/download/{bulletin_id}")
 async def download_bulletin_excel(
@@ -90,6 +139,11 @@ async def download_bulletin_excel(
     await authenticate_user(request, db)
 
     try:
+        # アップロード時の元ファイルがあればそのまま返す
+        cached_response = await excel_service.create_cached_excel_response(bulletin_id, db)
+        if cached_response:
+            return cached_response
+
         # Excelファイルを生成
         output, filename = await excel_service.generate_excel_from_db(bulletin_id, db)
 
@@ -102,19 +156,87 @@ async def download_bulletin_excel(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"エクセルファイルの生成中にエラーが発生しました: {str(e)}")
 
 
+# 掲示板画像を取得
+@router.get("/images/{image_hash}")
+async def get_bulletin_image(
+    image_hash: str,
+    request: Request,
+    variant: Optional[str] = Query(None),
+    db: Session = Depends(get_db)
+):
+    # 認証確認
+    await authenticate_user(request, db)
+
+    return await excel_service.create_image_response(image_hash, variant, request.headers.get("if-none-match"))
+
+
+# 掲示板投稿のメタデータ（シートの範囲・行列サイズ）を取得
+@router.get("/{bulletin_id}/meta", response_model=BulletinMetadataResponse)
+async def get_bulletin_metadata(
+    bulletin_id: int,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    # 認証確認
+    await authenticate_user(request, db)
+
+    try:
+        return await excel_service.get_bulletin_metadata(bulletin_id, db)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"掲示板メタデータ取得エラー: {str(e)}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"掲示板情報の取得中にエラーが発生しました: {str(e)}")
+
+
+# 指定した表示範囲と重なるセル・結合セル・画像を取得（スクロールに合わせて少しずつ読み込む）
+@router.get("/{bulletin_id}/cells", response_model=BulletinWindowResponse)
+async def get_bulletin_window(
+    bulletin_id: int,
+    request: Request,
+    start_row: int = Query(1, ge=1),
+    end_row: int = Query(..., ge=1),
+    start_col: int = Query(1, ge=1),
+    end_col: int = Query(..., ge=1),
+    db: Session = Depends(get_db)
+):
+    # 認証確認
+    await authenticate_user(request, db)
+
+    try:
+        return await excel_service.get_bulletin_window(bulletin_id, start_row, end_row, start_col, end_col, db)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"掲示板セル取得エラー: {str(e)}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"セル情報の取得中にエラーが発生しました: {str(e)}")
+
+
 # 掲示板投稿の詳細情報を取得
-@router.get("/{bulletin_id}", response_model=BulletinDetailResponse)
+@router.get("/{bulletin_id}", response_model=Union[BulletinDetailResponse, BulletinCompactDetailResponse])
 async def get_bulletin_detail(
     bulletin_id: int,
     request: Request,
+    response_format: Optional[str] = Query(None, alias="format"),
     db: Session = Depends(get_db)
 ):
     # 認証確認
     await authenticate_user(request, db)
 
+    # クエリパラメータまたはAcceptヘッダーで列指向形式を選択
+    compact = (
+        response_format == excel_service.DETAIL_FORMAT_COMPACT
+        or excel_service.COMPACT_MEDIA_TYPE in request.headers.get("accept", "")
+    )
+
     try:
-        # 投稿詳細を取得
-        return await excel_service.get_bulletin_detail(bulletin_id, db)
+        # 作成済みのスナップショットから投稿詳細を返す
+        snapshot = await excel_service.get_bulletin_detail_snapshot(bulletin_id, db, compact=compact)
+        return excel_service.create_snapshot_response(snapshot, request.headers.get("if-none-match"))
 
     except HTTPException:
         raise
@@ -147,13 +269,10 @@ async def update_bulletin_post(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Excel形式のファイルをアップロードしてください")
 
     try:
-        # ファイルの内容を読み込み
-        contents = await file.read()
-
-        # 更新処理
+        # 更新処理（アップロードされた一時ファイルをコピーせずに渡す）
         updated_post = await excel_service.update_excel_in_db(
             bulletin_id,
-            io.BytesIO(contents),
+            upload_service.open_upload(file),
             file.filename,
             title,
             content,
@@ -163,6 +282,8 @@ async def update_bulletin_post(
         # 投稿データをレスポンス用に整形
         return await excel_service.format_bulletin_response(updated_post, current_user.name, db)
 
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         logger.error(f"更新エラー: {str(e)}")
@@ -186,9 +307,17 @@ async def delete_bulletin_post(
     await authenticate_and_authorize_post_owner(request, db, post, admin_override=True)
 
     try:
-        # 投稿を削除
+        # 解析済みデータを共有している投稿があれば引き継いでから削除
+        file_path = post.file_path
+        excel_service.hand_over_shared_content(post, db)
+        image_hashes = excel_service.get_image_hashes(post.id, db)
         db.delete(post)
         db.commit()
+        excel_service.invalidate_post_count()
+
+        # ダウンロード用の元ファイルと画像を削除（他の投稿が参照していない場合のみ）
+        excel_service.release_cached_file(file_path, db)
+        excel_service.release_images(image_hashes, db)
         return {"message": "掲示板投稿が正常に削除されました"}
 
     except Exception as e:
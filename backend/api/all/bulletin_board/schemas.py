@@ -10,7 +10,8 @@ class BulletinPostCreate(BaseModel):
 
 # 画像情報のスキーマ
 class ImageData(BaseModel):
-    image_data: str
+    image_url: Optional[str]
+    thumbnail_url: Optional[str] = None
     image_type: str
     from_row: int
     from_col: int
@@ -38,10 +39,19 @@ class BulletinPostBase(BaseModel):
 class BulletinPostResponse(BulletinPostBase):
     pass
 
+# 解析ジョブのレスポンス用スキーマ
+class BulletinJobResponse(BaseModel):
+    job_id: int
+    status: str
+    progress: int
+    message: Optional[str] = None
+    bulletin_id: Optional[int] = None
+
 # 一覧表示用スキーマ
 class BulletinListResponse(BaseModel):
     posts: List[BulletinPostBase]
     total: int
+    next_cursor: Optional[str] = None  # 次ページ取得用のカーソル（最終ページの場合はNone）
 
 # セルスタイル情報
 class CellStyle(BaseModel):
@@ -70,4 +80,62 @@ class BulletinDetailResponse(BulletinPostBase):
     row_dimensions: Dict[str, float]
     exists: bool
     parsed_at: str
-    images: List[ImageData]
\ No newline at end of file
+    images: List[ImageData]
+
+# 列指向形式のセル情報（同じ位置の要素が1つのセルを表す）
+class CompactCells(BaseModel):
+    rows: List[int]
+    cols: List[int]
+    values: List[Optional[str]]
+    styles: List[Optional[int]]  # スタイルパレットの番号
+
+# 詳細表示用スキーマ（列指向形式）
+class BulletinCompactDetailResponse(BulletinPostBase):
+    cells: CompactCells
+    styles: List[CellStyle]
+    merges: List[MergeInfo]
+    column_dimensions: Dict[str, float]
+    row_dimensions: Dict[str, float]
+    exists: bool
+    parsed_at: str
+    images: List[ImageData]
+    format: str
+
+# メタデータ用スキーマ（シートの範囲と行列サイズ、セルは含まない）
+class BulletinMetadataResponse(BulletinPostBase):
+    max_row: int
+    max_col: int
+    cell_count: int
+    column_dimensions: Dict[str, float]
+    row_dimensions: Dict[str, float]
+
+# 表示範囲（ウィンドウ）取得用スキーマ
+class BulletinWindowResponse(BaseModel):
+    id: int
+    start_row: int
+    end_row: int
+    start_col: int
+    end_col: int
+    cells: List[CellData]
+    merges: List[MergeInfo]
+    images: List[ImageData]
+
+# 検索で一致したセル
+class BulletinSearchMatch(BaseModel):
+    row: int
+    col: int
+    value: Optional[str]
+
+# 検索結果の投稿
+class BulletinSearchResult(BaseModel):
+    id: int
+    title: str
+    updated_at: datetime
+    score: float
+    match_count: int
+    matches: List[BulletinSearchMatch]
+
+# 検索用スキーマ
+class BulletinSearchResponse(BaseModel):
+    query: str
+    results: List[BulletinSearchResult]
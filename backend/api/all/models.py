@@ -1,6 +1,10 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Text, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Text, LargeBinary, UniqueConstraint, Index
+from sqlalchemy import DDL, event
 from sqlalchemy.orm import relationship
 from datetime import datetime
+import hashlib
+import json
+from backend.models import Base
 from backend.models.base_model import BaseModel
 from backend.api.general.models import Employee
 
@@ -18,6 +22,8 @@ class BulletinPost(BaseModel):
     updated_at = Column(DateTime, default=now, onupdate=now)
     file_path = Column(String(255), nullable=True)  # 元のExcelファイルパス
     filename = Column(String(255), nullable=True)   # 元のExcelファイル名
+    content_hash = Column(String(64), nullable=True, index=True)  # 元のExcelファイルの内容のハッシュ（SHA-256）
+    content_source_id = Column(Integer, ForeignKey("bulletin_posts.id"), nullable=True)  # 解析済みデータを共有している投稿
 
     # リレーションシップ
     employee = relationship("Employee", back_populates="bulletin_posts")  # author から employee に変更
@@ -26,6 +32,18 @@ class BulletinPost(BaseModel):
     column_dimensions = relationship("BulletinColumnDimension", back_populates="bulletin_post", cascade="all, delete-orphan")
     row_dimensions = relationship("BulletinRowDimension", back_populates="bulletin_post", cascade="all, delete-orphan")
     images = relationship("BulletinImage", back_populates="bulletin_post", cascade="all, delete-orphan")
+    snapshots = relationship("BulletinSnapshot", back_populates="bulletin_post", cascade="all, delete-orphan")
+
+    # 一覧のキーセットページング用インデックス（created_at, idの降順で取得する）
+    __table_args__ = (
+        Index('ix_bulletin_posts_created_at_id', 'created_at', 'id'),
+    )
+
+    # セル・スタイル・画像などの解析済みデータを保持している投稿のID
+    # 同じ内容のファイルがアップロードされた場合、解析済みデータは最初の投稿のものを共有する
+    @property
+    def data_id(self):
+        return self.content_source_id or self.id
 
 
 # 掲示板のセルデータテーブル
@@ -37,23 +55,45 @@ class BulletinCell(BaseModel):
     row = Column(Integer, nullable=False)
     col = Column(Integer, nullable=False)
     value = Column(Text, nullable=True)
+    style_id = Column(Integer, ForeignKey("cell_styles.id"), nullable=True)
 
     # リレーションシップ
     bulletin_post = relationship("BulletinPost", back_populates="cells")
-    style = relationship("CellStyle", back_populates="cell", uselist=False, cascade="all, delete-orphan", single_parent=True)
+    style = relationship("CellStyle", back_populates="cells")
 
     # 複合インデックス（掲示板ID、行、列の組み合わせでユニーク）
     __table_args__ = (
         UniqueConstraint('bulletin_id', 'row', 'col', name='uix_cell_position'),
+        # セル値の部分一致検索用（pg_trgmのトライグラムインデックス）
+        Index(
+            'ix_bulletin_cells_value_trgm', 'value',
+            postgresql_using='gin', postgresql_ops={'value': 'gin_trgm_ops'}
+        ),
     )
 
 
-# 掲示板のセルスタイルテーブル
+
+# トライグラムインデックスの演算子クラス（gin_trgm_ops）はpg_trgm拡張が提供するため、
+# init_db()のcreate_allでテーブルを作成する前に拡張を有効にしておく
+event.listen(
+    Base.metadata, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
+# 掲示板のセルスタイルテーブル（同じ書式は1行だけ保存し、セルから参照する）
 class CellStyle(BaseModel):
     __tablename__ = "cell_styles"
 
+    # スタイルの同一性判定に使うカラム
+    STYLE_COLUMNS = [
+        'font_bold', 'font_color', 'font_size', 'bg_color',
+        'border_top_style', 'border_top_color', 'border_right_style', 'border_right_color',
+        'border_bottom_style', 'border_bottom_color', 'border_left_style', 'border_left_color',
+        'alignment_horizontal', 'alignment_vertical'
+    ]
+
     id = Column(Integer, primary_key=True, index=True)
-    cell_id = Column(Integer, ForeignKey("bulletin_cells.id"), nullable=False, unique=True)
+    style_hash = Column(String(64), nullable=False, unique=True)  # スタイル内容のハッシュ
 
     # フォント関連
     font_bold = Column(Boolean, default=False)
@@ -78,7 +118,18 @@ class CellStyle(BaseModel):
     alignment_vertical = Column(String(16), nullable=True)
 
     # リレーションシップ
-    cell = relationship("BulletinCell", back_populates="style")
+    cells = relationship("BulletinCell", back_populates="style")
+
+    # スタイル辞書を全カラムが揃った形に正規化する
+    @classmethod
+    def normalize(cls, style):
+        return {column: style.get(column) for column in cls.STYLE_COLUMNS}
+
+    # スタイル辞書からハッシュを計算する
+    @classmethod
+    def compute_hash(cls, style):
+        payload = json.dumps([style.get(column) for column in cls.STYLE_COLUMNS])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
 
 
 # 掲示板のセル結合情報テーブル
@@ -95,6 +146,11 @@ class BulletinMerge(BaseModel):
     # リレーションシップ
     bulletin_post = relationship("BulletinPost", back_populates="merges")
 
+    # 表示範囲と重なる結合セルの検索用インデックス
+    __table_args__ = (
+        Index('ix_bulletin_merges_position', 'bulletin_id', 'start_row'),
+    )
+
 
 # 掲示板の列の幅情報テーブル
 class BulletinColumnDimension(BaseModel):
@@ -137,7 +193,8 @@ class BulletinImage(BaseModel):
 
     id = Column(Integer, primary_key=True, index=True)
     bulletin_id = Column(Integer, ForeignKey("bulletin_posts.id"), nullable=False)
-    image_data = Column(Text, nullable=True)  # Base64エンコードされた画像データ
+    image_data = Column(Text, nullable=True)  # Base64エンコードされた画像データ（旧形式、移行済み）
+    image_hash = Column(String(64), nullable=True, index=True)  # 画像ストアのキー（SHA-256）
     image_type = Column(String(64), nullable=True)  # 画像の種類（例：png, jpeg）
 
     # 画像の位置情報
@@ -150,4 +207,48 @@ class BulletinImage(BaseModel):
     width = Column(Float, nullable=True)
     height = Column(Float, nullable=True)
 
-    bulletin_post = relationship("BulletinPost", back_populates="images")
\ No newline at end of file
+    bulletin_post = relationship("BulletinPost", back_populates="images")
+
+    # 表示範囲と重なる画像の検索用インデックス
+    __table_args__ = (
+        Index('ix_bulletin_images_position', 'bulletin_id', 'from_row'),
+    )
+
+
+# 掲示板詳細レスポンスのスナップショットテーブル（アップロード・更新時に作成）
+class BulletinSnapshot(BaseModel):
+    __tablename__ = "bulletin_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    bulletin_id = Column(Integer, ForeignKey("bulletin_posts.id"), nullable=False)
+    format = Column(String(16), nullable=False)  # レスポンス形式（default, compact）
+    post_updated_at = Column(DateTime, nullable=False)  # 作成元の投稿のupdated_at
+    etag = Column(String(64), nullable=False)
+    payload = Column(LargeBinary, nullable=False)  # JSONエンコード済みのレスポンス
+    created_at = Column(DateTime, default=now)
+
+    bulletin_post = relationship("BulletinPost", back_populates="snapshots")
+
+    # 複合インデックス
+    __table_args__ = (
+        UniqueConstraint('bulletin_id', 'format', name='uix_bulletin_snapshot'),
+    )
+
+
+# 掲示板Excel解析ジョブテーブル（アップロード後にバックグラウンドで解析する）
+class BulletinJob(BaseModel):
+    __tablename__ = "bulletin_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
+    bulletin_id = Column(Integer, ForeignKey("bulletin_posts.id", ondelete="SET NULL"), nullable=True)  # 解析完了後に作成された投稿
+    status = Column(String(16), nullable=False, default="queued")  # queued, running, succeeded, failed
+    progress = Column(Integer, nullable=False, default=0)  # 進捗（0〜100）
+    message = Column(Text, nullable=True)  # 失敗時のエラーメッセージ
+    title = Column(String(255), nullable=False)
+    content = Column(Text, nullable=True)
+    filename = Column(String(255), nullable=False)
+    upload_path = Column(String(255), nullable=True)  # 解析待ちのアップロードファイル（解析後に削除）
+    content_hash = Column(String(64), nullable=True)  # アップロードファイルの内容のハッシュ（SHA-256）
+    created_at = Column(DateTime, default=now)
+    updated_at = Column(DateTime, default=now, onupdate=now)
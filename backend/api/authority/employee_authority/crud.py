@@ -1,4 +1,3 @@
-import asyncio
 
 from fastapi import BackgroundTasks
 from sqlalchemy.orm import joinedload, Session
@@ -9,16 +8,16 @@ from backend.api.general.models import Employee, Department
 
 from backend.scripts.validations.existing_employee import existing_employee
 from backend.api.authority.employee_authority import schemas
-from backend.websocket import websocket_manager
+from backend.change_notifier import change_notifier
 from backend.utils.logger import logger
 
 
-# 従業員の変更をWebSocketで通知
-async def noti_websocket(db: Session):
-    await websocket_manager.broadcast_filtered(db, get_employees)
+# WebSocketの購読トピック（フロントエンドの接続パス）
+WEBSOCKET_TOPIC = "authority/employee_authority"
 
-def run_websocket(db: Session):
-    asyncio.run(noti_websocket(db))
+# 従業員の変更をWebSocketで通知
+def run_websocket():
+    change_notifier.publish(WEBSOCKET_TOPIC)
 
 
 def get_employees(db: Session, search: str = "", page: int = 1, limit: int = 10, department_id: int = None, return_total_count=True):
@@ -126,6 +125,9 @@ def get_employees(db: Session, search: str = "", page: int = 1, limit: int = 10,
         )
         return {"success": False, "message": "情報の取得に失敗しました", "field": ""}, 0
 
+# 一覧の変更通知で配信する一覧取得関数を登録
+change_notifier.register(WEBSOCKET_TOPIC, get_employees)
+
 def create_employee(db: Session, employee: schemas.EmployeeCreate, background_tasks: BackgroundTasks):
     from backend.scripts.init_employee import init_employee
     try:
@@ -148,7 +150,7 @@ def create_employee(db: Session, employee: schemas.EmployeeCreate, background_ta
 
         db.commit()
 
-        background_tasks.add_task(run_websocket, db)
+        background_tasks.add_task(run_websocket)
         return {"success": True, "message": "従業員権限の登録に成功しました"}
 
     except Exception as e:
@@ -192,7 +194,7 @@ def update_employee(db: Session, employee_id: int, employee_data: schemas.Employ
 
         db.commit()
 
-        background_tasks.add_task(run_websocket, db)
+        background_tasks.add_task(run_websocket)
 
         return {"message": "従業員情報を更新しました"}
     except Exception as e:
@@ -214,7 +216,7 @@ def delete_employee(db: Session, employee_id: int, background_tasks: BackgroundT
         db.delete(employee)
         db.commit()
 
-        background_tasks.add_task(run_websocket, db)
+        background_tasks.add_task(run_websocket)
 
         return {"message": "削除に成功しました。"}
     except Exception as e:
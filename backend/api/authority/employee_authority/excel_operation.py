@@ -37,7 +37,7 @@ def import_excel_employees(db: Session, file, background_tasks=BackgroundTasks):
 
     model = Employee
     required_columns = {"操作", "ID", "従業員名", "社員番号", "メールアドレス"}
-    websocket_func = lambda: background_tasks.add_task(run_websocket, db)
+    websocket_func = lambda: background_tasks.add_task(run_websocket)
 
     def before_add_func(row_data):
         if row_data["employee_no"]:
@@ -1,19 +1,18 @@
-import asyncio
 from fastapi import BackgroundTasks
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from backend.api.authority.models import EmployeeAuthority
 from backend.api.general.models import Department
 from backend.api.general.department import schemas
-from backend.websocket import websocket_manager
+from backend.change_notifier import change_notifier
 from backend.utils.logger import logger
 
-# 部署の変更をWebSocketで通知
-async def department_websocket(db: Session):
-    await websocket_manager.broadcast_filtered(db, get_departments)
+# WebSocketの購読トピック（フロントエンドの接続パス）
+WEBSOCKET_TOPIC = "general/department"
 
-def run_websocket(db: Session):
-    asyncio.run(department_websocket(db))
+# 部署の変更をWebSocketで通知
+def run_websocket():
+    change_notifier.publish(WEBSOCKET_TOPIC)
 
 # 部署一覧取得
 def get_departments(db: Session, search: str = "", page: int = 1, limit: int = 10, return_total_count=True):
@@ -47,6 +46,9 @@ def get_departments(db: Session, search: str = "", page: int = 1, limit: int = 1
         )
         return {"success": False, "message": "情報の取得に失敗しました", "field": ""}, 0
 
+# 一覧の変更通知で配信する一覧取得関数を登録
+change_notifier.register(WEBSOCKET_TOPIC, get_departments)
+
 # 部署作成
 def create_department(db: Session, department: schemas.DepartmentBase, background_tasks: BackgroundTasks):
     try:
@@ -60,7 +62,7 @@ def create_department(db: Session, department: schemas.DepartmentBase, backgroun
         db.commit()
         db.refresh(db_department)
 
-        background_tasks.add_task(run_websocket, db)
+        background_tasks.add_task(run_websocket)
 
         return {
             "success": True,
@@ -95,7 +97,7 @@ def update_department(db: Session, department_id: int, department_data: schemas.
         db.commit()
         db.refresh(department)
 
-        background_tasks.add_task(run_websocket, db)
+        background_tasks.add_task(run_websocket)
 
         return {
             "success": True,
@@ -128,7 +130,7 @@ def delete_department(db: Session, department_id: int, background_tasks: Backgro
         db.delete(department)
         db.commit()
 
-        background_tasks.add_task(run_websocket, db)
+        background_tasks.add_task(run_websocket)
 
         return {
             "id": department.id,
@@ -154,7 +156,7 @@ def sort_departments(db: Session, department_order: list[dict], background_tasks
             )
         db.commit()
 
-        background_tasks.add_task(run_websocket, db)
+        background_tasks.add_task(run_websocket)
 
         return {
             "success": True,
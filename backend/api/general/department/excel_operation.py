@@ -31,7 +31,7 @@ def import_excel_departments(db: Session, file, background_tasks=BackgroundTasks
 
         model = Department
         required_columns = {"操作", "ID", "部署名"}
-        websocket_func = lambda: background_tasks.add_task(run_websocket, db)
+        websocket_func = lambda: background_tasks.add_task(run_websocket)
 
         def delete_check_func(db, department, department_id):
             employee_count = db.query(EmployeeAuthority.department_id).filter(
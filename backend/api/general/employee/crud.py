@@ -1,4 +1,3 @@
-import asyncio
 
 from fastapi import BackgroundTasks
 from sqlalchemy.orm import joinedload, Session
@@ -10,15 +9,16 @@ from backend.api.general.models import Employee, EmployeeInfo
 
 from backend.api.general.employee import schemas
 from backend.api.general import models as general_models
-from backend.websocket import websocket_manager
+from backend.api.all.bulletin_board import excel_service
+from backend.change_notifier import change_notifier
 from backend.utils.logger import logger
 
-# 従業員の変更をWebSocketで通知
-async def noti_websocket(db: Session):
-    await websocket_manager.broadcast_filtered(db, get_employees)
+# WebSocketの購読トピック（フロントエンドの接続パス）
+WEBSOCKET_TOPIC = "general/employee"
 
-def run_websocket(db: Session):
-    asyncio.run(noti_websocket(db))
+# 従業員の変更をWebSocketで通知
+def run_websocket():
+    change_notifier.publish(WEBSOCKET_TOPIC)
 
 # 従業員一覧取得
 def get_employees(db: Session, search: str = "", page: int = 1, limit: int = 10, return_total_count=True):
@@ -105,6 +105,8 @@ def get_employees(db: Session, search: str = "", page: int = 1, limit: int = 10,
         )
         return {"success": False, "message": "情報の取得に失敗しました", "field": ""}, 0
 
+# 一覧の変更通知で配信する一覧取得関数を登録
+change_notifier.register(WEBSOCKET_TOPIC, get_employees)
 
 def existing_employee(db: Session, employee_no: str):
     return db.query(Employee).filter(Employee.employee_no == employee_no).first()
@@ -129,7 +131,7 @@ def create_employee(db: Session, employee: schemas.EmployeeCreate, background_ta
 
         db.commit()
 
-        background_tasks.add_task(run_websocket, db)
+        background_tasks.add_task(run_websocket)
 
         return {"success": True, "message": "従業員登録に成功しました"}
 
@@ -148,6 +150,7 @@ def update_employee(db: Session, employee_id: int, employee_data: schemas.Employ
         if not employee:
             return {"success": False, "message": "対象の従業員が存在しません", "field": ""}
 
+        renamed = employee.name != employee_data.name
         employee.name = employee_data.name
         employee.employee_no = employee_data.employee_no
         employee.email = employee_data.email
@@ -164,9 +167,13 @@ def update_employee(db: Session, employee_id: int, employee_data: schemas.Employ
         employee_info.leave_date = employee_data.leave_date if employee_data.leave_date else None
         employee_info.contract_expiration = employee_data.contract_expiration if employee_data.contract_expiration else None
 
+        # 投稿者名を含む掲示板のスナップショットを作り直させる
+        if renamed:
+            excel_service.invalidate_author_snapshots(employee.id, db)
+
         db.commit()
 
-        background_tasks.add_task(run_websocket, db)
+        background_tasks.add_task(run_websocket)
 
         return {"success": True, "message": "従業員情報を更新しました"}
 
@@ -189,7 +196,7 @@ def delete_employee(db: Session, employee_id: int, background_tasks: BackgroundT
         db.delete(employee)
         db.commit()
 
-        background_tasks.add_task(run_websocket, db)
+        background_tasks.add_task(run_websocket)
 
         return {"message": "削除に成功しました。"}
     except Exception as e:
@@ -1,18 +1,17 @@
-import asyncio
 from fastapi import BackgroundTasks
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from backend.api.manufacturing.model.machine_models import Line
 from backend.api.manufacturing.line import schemas
-from backend.websocket import websocket_manager
+from backend.change_notifier import change_notifier
 from backend.utils.logger import logger
 
-# ラインの変更をWebSocketで通知
-async def line_websocket(db: Session):
-    await websocket_manager.broadcast_filtered(db, get_lines)
+# WebSocketの購読トピック（フロントエンドの接続パス）
+WEBSOCKET_TOPIC = "manufacturing/line"
 
-def run_websocket(db: Session):
-    asyncio.run(line_websocket(db))
+# ラインの変更をWebSocketで通知
+def run_websocket():
+    change_notifier.publish(WEBSOCKET_TOPIC)
 
 # ライン一覧取得
 def get_lines(db: Session, search: str = "", page: int = 1, limit: int = 10, return_total_count=True):
@@ -53,6 +52,9 @@ def get_lines(db: Session, search: str = "", page: int = 1, limit: int = 10, ret
         )
         return {"success": False, "message": "情報の取得に失敗しました", "field": ""}, 0
 
+# 一覧の変更通知で配信する一覧取得関数を登録
+change_notifier.register(WEBSOCKET_TOPIC, get_lines)
+
 # ライン作成
 def create_line(db: Session, line: schemas.LineCreate, background_tasks: BackgroundTasks):
     try:
@@ -66,7 +68,7 @@ def create_line(db: Session, line: schemas.LineCreate, background_tasks: Backgro
         db.commit()
         db.refresh(db_line)
 
-        background_tasks.add_task(run_websocket, db)
+        background_tasks.add_task(run_websocket)
 
         return {
             "success": True,
@@ -107,7 +109,7 @@ def update_line(db: Session, line_id: int, line_data: schemas.LineUpdate, backgr
         db.commit()
         db.refresh(line)
 
-        background_tasks.add_task(run_websocket, db)
+        background_tasks.add_task(run_websocket)
 
         return {
             "success": True,
@@ -139,7 +141,7 @@ def delete_line(db: Session, line_id: int, background_tasks: BackgroundTasks):
         db.delete(line)
         db.commit()
 
-        background_tasks.add_task(run_websocket, db)
+        background_tasks.add_task(run_websocket)
 
         return {
             "id": line.id,
@@ -165,7 +167,7 @@ def sort_lines(db: Session, line_order: list[dict], background_tasks: Background
             )
         db.commit()
 
-        background_tasks.add_task(run_websocket, db)
+        background_tasks.add_task(run_websocket)
 
         return {
             "success": True,
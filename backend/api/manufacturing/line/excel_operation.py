@@ -37,7 +37,7 @@ def import_excel_lines(db: Session, file, background_tasks=BackgroundTasks):
 
         model = Line
         required_columns = {"操作", "ID", "ライン名", "位置X", "位置Y", "有効"}
-        websocket_func = lambda: background_tasks.add_task(run_websocket, db)
+        websocket_func = lambda: background_tasks.add_task(run_websocket)
 
         return import_excel(db, file, "line", model, required_columns, websocket_func)
     except Exception as e:
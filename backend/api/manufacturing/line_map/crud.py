@@ -1,9 +1,7 @@
-import asyncio
 from fastapi import BackgroundTasks
 from sqlalchemy.orm import Session
 from backend.api.manufacturing.model.machine_models import Line
 from backend.api.manufacturing.line_map import schemas
-from backend.websocket import websocket_manager
 from backend.utils.logger import logger
 
 # ライン一覧取得
@@ -1,20 +1,19 @@
-import asyncio
 from fastapi import BackgroundTasks
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from backend.api.manufacturing.model.machine_models import Machine, Line
 from backend.api.manufacturing.machine import schemas
-from backend.websocket import websocket_manager
+from backend.change_notifier import change_notifier
 from backend.utils.logger import logger
 from sqlalchemy.orm import joinedload
 from sqlalchemy import or_
 
-# ラインの変更をWebSocketで通知
-async def machine_websocket(db: Session):
-    await websocket_manager.broadcast_filtered(db, get_machines)
+# WebSocketの購読トピック（フロントエンドの接続パス）
+WEBSOCKET_TOPIC = "manufacturing/machine"
 
-def run_websocket(db: Session):
-    asyncio.run(machine_websocket(db))
+# ラインの変更をWebSocketで通知
+def run_websocket():
+    change_notifier.publish(WEBSOCKET_TOPIC)
 
 # 設備一覧取得
 def get_machines(db: Session, search: str = "", page: int = 1, limit: int = 10, return_total_count=True):
@@ -67,6 +66,9 @@ def get_machines(db: Session, search: str = "", page: int = 1, limit: int = 10,
         )
         return {"success": False, "message": "情報の取得に失敗しました", "field": ""}, 0
 
+# 一覧の変更通知で配信する一覧取得関数を登録
+change_notifier.register(WEBSOCKET_TOPIC, get_machines)
+
 # 設備作成
 def create_machine(db: Session, machine: schemas.MachineCreate, background_tasks: BackgroundTasks):
     try:
@@ -98,7 +100,7 @@ def create_machine(db: Session, machine: schemas.MachineCreate, background_tasks
         db.commit()
         db.refresh(db_machine)
 
-        background_tasks.add_task(run_websocket, db)
+        background_tasks.add_task(run_websocket)
 
         return {
             "success": True,
@@ -168,7 +170,7 @@ def update_machine(db: Session, machine_id: int, machine_data: schemas.MachineUp
         print(machine.operating_condition)
         print('-------------------------------')
 
-        background_tasks.add_task(run_websocket, db)
+        background_tasks.add_task(run_websocket)
 
         return {
             "success": True,
@@ -208,7 +210,7 @@ def delete_machine(db: Session, machine_id: int, background_tasks: BackgroundTas
         db.delete(machine)
         db.commit()
 
-        background_tasks.add_task(run_websocket, db)
+        background_tasks.add_task(run_websocket)
 
         return {
             "id": machine.id,
@@ -234,7 +236,7 @@ def sort_machines(db: Session, machine_order: list[dict], background_tasks: Back
             )
         db.commit()
 
-        background_tasks.add_task(run_websocket, db)
+        background_tasks.add_task(run_websocket)
 
         return {
             "success": True,
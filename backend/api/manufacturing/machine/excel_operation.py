@@ -26,11 +26,11 @@ def export_excel_lines(db: Session, search: str):
 
 def import_excel_lines(db: Session, file, background_tasks=BackgroundTasks):
     try:
-        from backend.api.manufacturing.line.crud import run_websocket
+        from backend.api.manufacturing.machine.crud import run_websocket
 
         model = Line
         required_columns = {"操作", "ID", "ライン名"}
-        websocket_func = lambda: background_tasks.add_task(run_websocket, db)
+        websocket_func = lambda: background_tasks.add_task(run_websocket)
 
         return import_excel(db, file, "line", model, required_columns, websocket_func)
     except Exception as e:
@@ -0,0 +1,234 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, Optional, Set
+
+from sqlalchemy import text
+
+from backend.models import engine
+from backend.websocket import websocket_manager
+
+logger = logging.getLogger(__name__)
+
+# 最後の変更からこの時間（秒）変更がなければ一覧を配信する（連続した変更を1回の配信にまとめる）
+DEBOUNCE_SECONDS = 0.3
+
+# 変更が続いていても、最初の変更からこの時間（秒）が経過したら配信する
+MAX_DELAY_SECONDS = 2.0
+
+# ワーカー間で変更を通知するPostgreSQLのチャンネル
+NOTIFY_CHANNEL = "websocket_changes"
+
+# NOTIFYで送れるペイロードの上限（PostgreSQLの既定値8000バイトより少し小さくする）
+MAX_NOTIFY_PAYLOAD = 7900
+
+# LISTEN用の接続が切れた場合に再接続するまでの待ち時間（秒）
+RECONNECT_SECONDS = 5
+
+
+# データ変更の通知バス
+# CRUD処理は変更のあったトピックを通知するだけで、WebSocketへの配信はメインのイベントループ上の常駐タスクが行う
+# 通知はどのスレッドからでも行える（同期のルートやバックグラウンドタスクはスレッドプールで実行されるため）
+# uvicornを複数ワーカーで起動しても全ワーカーの接続に届くよう、通知はPostgreSQLのLISTEN/NOTIFYで全ワーカーに配る
+# 通知バスを起動していないプロセス（解析ジョブのワーカーなど）からもNOTIFYで通知できる
+# NOTIFY・LISTENできない場合（PostgreSQL以外、接続断）は、自ワーカーの接続にも直接配信する
+class ChangeNotifier:
+    def __init__(self):
+        # トピック -> 一覧取得関数（get_func(db, search, page, limit)）
+        self.handlers: Dict[str, Callable] = {}
+        self._pending: Set[str] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changed: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._listen_connection = None
+
+    def register(self, topic: str, get_func: Callable):
+        """トピックの一覧取得関数を登録する"""
+        self.handlers[topic] = get_func
+
+    def publish(self, topic: str):
+        """トピックのデータが変更されたことを全ワーカーに通知する（配信の完了は待たない）"""
+        self._notify({"topic": topic})
+
+    async def notify_user(self, employee_no: str, message: str, key: Optional[str] = None):
+        """指定したユーザーの接続（どのワーカーに接続していても）にメッセージを送信する"""
+        event = {"user": employee_no, "message": message, "key": key}
+        await asyncio.get_running_loop().run_in_executor(None, self._notify_blocking, event)
+
+    def send_to_user(self, employee_no: str, message: str, key: Optional[str] = None):
+        """notify_userの同期版（スレッドや解析ジョブのワーカープロセスから呼び出す）"""
+        self._notify({"user": employee_no, "message": message, "key": key})
+
+    async def start(self):
+        """配信タスクを起動し、ワーカー間の通知の受信を開始する（アプリケーションのイベントループ上で呼び出す）"""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._changed = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+        if engine.dialect.name == "postgresql":
+            await self._listen()
+
+    async def stop(self):
+        """配信タスクとワーカー間の通知の受信を停止する"""
+        if self._task is None:
+            return
+        for task in (self._task, self._reconnect_task):
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._close_listen_connection()
+        self._task = None
+        self._reconnect_task = None
+        self._loop = None
+
+    # イベントを全ワーカーに通知する
+    # engine.begin()で待機するため、イベントループ上から呼ばれた場合はスレッドプールに回してループを止めない
+    def _notify(self, event: Dict[str, Any]):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._notify_blocking(event)
+        else:
+            loop.run_in_executor(None, self._notify_blocking, event)
+
+    # NOTIFYを送信する（同期処理専用。イベントループ上のコルーチンから直接呼び出さないこと）
+    # 通知バスを起動していないプロセス（解析ジョブのワーカー、スクリプト、alembic）からもNOTIFYで各ワーカーに届ける
+    # NOTIFYできない場合や、自ワーカーがLISTENしていない場合は、自ワーカーの接続にも直接配る
+    def _notify_blocking(self, event: Dict[str, Any]):
+        payload = json.dumps(event, ensure_ascii=False)
+        notified = False
+        if engine.dialect.name == "postgresql" and len(payload.encode()) <= MAX_NOTIFY_PAYLOAD:
+            try:
+                with engine.begin() as connection:
+                    connection.execute(text("SELECT pg_notify(:channel, :payload)"), {
+                        "channel": NOTIFY_CHANNEL,
+                        "payload": payload
+                    })
+                notified = True
+            except Exception as e:
+                logger.error(f"ワーカー間の変更通知に失敗したため、このワーカーにのみ配信します: {str(e)}")
+
+        if not (notified and self._listen_connection is not None):
+            self._dispatch_local(event)
+
+    # 自ワーカーの接続に配る（通知バスを起動していないプロセスでは何もしない）
+    def _dispatch_local(self, event: Dict[str, Any]):
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._dispatch, event)
+
+    # 受信したイベントを処理する（イベントループ上で実行）
+    def _dispatch(self, event: Dict[str, Any]):
+        if "topic" in event:
+            self._pending.add(event["topic"])
+            self._changed.set()
+        elif "user" in event:
+            websocket_manager.send_to_user(event["user"], event["message"], event.get("key"))
+
+    # LISTEN専用の接続を作成し、通知の到着をイベントループで監視する
+    async def _listen(self):
+        try:
+            self._listen_connection = await self._loop.run_in_executor(None, _open_listen_connection)
+        except Exception as e:
+            logger.error(f"ワーカー間の変更通知の受信を開始できませんでした: {str(e)}")
+            self._schedule_reconnect()
+            return
+        self._loop.add_reader(self._listen_connection.fileno(), self._read_notifications)
+
+    def _read_notifications(self):
+        connection = self._listen_connection
+        try:
+            connection.poll()
+        except Exception as e:
+            logger.error(f"ワーカー間の変更通知の受信が切断されました: {str(e)}")
+            self._close_listen_connection()
+            self._schedule_reconnect()
+            return
+
+        while connection.notifies:
+            notification = connection.notifies.pop(0)
+            try:
+                self._dispatch(json.loads(notification.payload))
+            except (ValueError, KeyError) as e:
+                logger.error(f"不正な変更通知を無視しました: {str(e)}")
+
+    def _schedule_reconnect(self):
+        async def reconnect():
+            await asyncio.sleep(RECONNECT_SECONDS)
+            self._reconnect_task = None
+            await self._listen()
+            # 切断中の変更を取りこぼさないよう、登録済みの一覧を配信し直す
+            if self._listen_connection is not None:
+                self._pending.update(self.handlers)
+                self._changed.set()
+
+        if self._reconnect_task is None:
+            self._reconnect_task = asyncio.create_task(reconnect())
+
+    def _close_listen_connection(self):
+        connection, self._listen_connection = self._listen_connection, None
+        if connection is None:
+            return
+        try:
+            self._loop.remove_reader(connection.fileno())
+        except Exception:
+            pass
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    async def _run(self):
+        while True:
+            await self._changed.wait()
+            await self._wait_until_quiet()
+
+            topics, self._pending = self._pending, set()
+            for topic in topics:
+                await self._broadcast(topic)
+
+    # 変更が落ち着くまで待つ（ただし最大MAX_DELAY_SECONDSまで）
+    async def _wait_until_quiet(self):
+        deadline = time.monotonic() + MAX_DELAY_SECONDS
+        while True:
+            self._changed.clear()
+            timeout = min(DEBOUNCE_SECONDS, deadline - time.monotonic())
+            if timeout <= 0:
+                return
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                return
+
+    async def _broadcast(self, topic: str):
+        get_func = self.handlers.get(topic)
+        if get_func is None:
+            logger.warning(f"一覧取得関数が登録されていないトピックです: {topic}")
+            return
+        try:
+            await websocket_manager.broadcast_filtered(get_func, topic)
+        except Exception as e:
+            logger.error(f"WebSocketへの一覧配信中にエラー（トピック: {topic}）: {str(e)}")
+
+
+# 接続プールから切り離したLISTEN専用の接続を作成する（自動コミットにしないと通知を受け取れない）
+def _open_listen_connection():
+    pooled = engine.raw_connection()
+    pooled.detach()
+    connection = pooled.driver_connection
+    connection.autocommit = True
+    with connection.cursor() as cursor:
+        cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+    return connection
+
+
+change_notifier = ChangeNotifier()
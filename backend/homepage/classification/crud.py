@@ -1,4 +1,3 @@
-import asyncio
 from fastapi import BackgroundTasks
 from sqlalchemy import func
 from sqlalchemy.exc import SQLAlchemyError
@@ -6,16 +5,16 @@ from sqlalchemy.orm import Session
 
 from backend.homepage.models import Type, Classification
 from backend.homepage.classification import schemas
-from backend.websocket import websocket_manager
+from backend.change_notifier import change_notifier
 from backend.utils.logger import logger
 
 
-# 項目の変更をWebSocketで通知
-async def classification_websocket(db: Session):
-    await websocket_manager.broadcast_filtered(db, get_classifications)
+# WebSocketの購読トピック（フロントエンドの接続パス）
+WEBSOCKET_TOPIC = "api/homepage/classification"
 
-def run_websocket(db: Session):
-    asyncio.run(classification_websocket(db))
+# 項目の変更をWebSocketで通知
+def run_websocket():
+    change_notifier.publish(WEBSOCKET_TOPIC)
 
 # 項目一覧取得
 def get_classifications(db: Session, search_query: str = "", current_page: int = 1, items_per_page: int = 10):
@@ -47,6 +46,9 @@ def get_classifications(db: Session, search_query: str = "", current_page: int =
 
     return classification_list, total_count
 
+# 一覧の変更通知で配信する一覧取得関数を登録
+change_notifier.register(WEBSOCKET_TOPIC, get_classifications)
+
 # 項目作成
 def create_classification(db: Session, classification: schemas.ClassificationCreate, background_tasks: BackgroundTasks):
     try:
@@ -66,7 +68,7 @@ def create_classification(db: Session, classification: schemas.ClassificationCre
         db.commit()
         db.refresh(db_classification)
 
-        background_tasks.add_task(run_websocket, db)
+        background_tasks.add_task(run_websocket)
 
         return {
             "success": True,
@@ -99,7 +101,7 @@ def update_classification(db: Session, classification_id: int, classification_da
         db.commit()
         db.refresh(classification)
 
-        background_tasks.add_task(run_websocket, db)
+        background_tasks.add_task(run_websocket)
 
         return {
             "id": classification.id,
@@ -120,7 +122,7 @@ def delete_classification(db: Session, classification_id: int, background_tasks:
         db.delete(classification)
         db.commit()
 
-        background_tasks.add_task(run_websocket, db)
+        background_tasks.add_task(run_websocket)
 
         return {
             "id": classification.id,
@@ -140,7 +142,7 @@ def sort_classifications(db: Session, classification_order: list[dict], backgrou
             )
         db.commit()
 
-        background_tasks.add_task(run_websocket, db)
+        background_tasks.add_task(run_websocket)
 
         return {
             "message": "項目並び替えが完了しました。",
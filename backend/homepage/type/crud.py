@@ -1,4 +1,3 @@
-import asyncio
 from fastapi import BackgroundTasks
 from sqlalchemy import func, update
 from sqlalchemy.exc import SQLAlchemyError
@@ -6,15 +5,15 @@ from sqlalchemy.orm import Session
 
 from backend.homepage.models import Type
 from backend.homepage.type import schemas
-from backend.websocket import websocket_manager
+from backend.change_notifier import change_notifier
 from backend.utils.logger import logger
 
-# 項目の変更をWebSocketで通知
-async def type_websocket(db: Session):
-    await websocket_manager.broadcast_filtered(db, get_types)
+# WebSocketの購読トピック（フロントエンドの接続パス）
+WEBSOCKET_TOPIC = "api/homepage/type"
 
-def run_websocket(db: Session):
-    asyncio.run(type_websocket(db))
+# 項目の変更をWebSocketで通知
+def run_websocket():
+    change_notifier.publish(WEBSOCKET_TOPIC)
 
 # 項目一覧取得
 def get_types(db: Session, search_query: str = "", current_page: int = 1, items_per_page: int = 10):
@@ -41,6 +40,9 @@ def get_types(db: Session, search_query: str = "", current_page: int = 1, items_
 
     return type_list, total_count
 
+# 一覧の変更通知で配信する一覧取得関数を登録
+change_notifier.register(WEBSOCKET_TOPIC, get_types)
+
 # 項目作成
 def create_type(db: Session, type: schemas.TypeCreate, background_tasks: BackgroundTasks):
     try:
@@ -59,7 +61,7 @@ def create_type(db: Session, type: schemas.TypeCreate, background_tasks: Backgro
         db.commit()
         db.refresh(db_type)
 
-        background_tasks.add_task(run_websocket, db)
+        background_tasks.add_task(run_websocket)
 
         return {
             "success": True,
@@ -91,7 +93,7 @@ def update_type(db: Session, type_id: int, type_data: schemas.Type, background_t
         db.commit()
         db.refresh(type)
 
-        background_tasks.add_task(run_websocket, db)
+        background_tasks.add_task(run_websocket)
 
         return {
             "id": type.id,
@@ -118,7 +120,7 @@ def delete_type(db: Session, type_id: int, background_tasks: BackgroundTasks):
         db.delete(type)
         db.commit()
 
-        background_tasks.add_task(run_websocket, db)
+        background_tasks.add_task(run_websocket)
 
         return {
             "id": type.id,
@@ -144,7 +146,7 @@ def sort_types(db: Session, type_order: list[dict], background_tasks: Background
 
         db.commit()
 
-        background_tasks.add_task(run_websocket, db)
+        background_tasks.add_task(run_websocket)
 
         return {
             "message": "項目の並び替えが完了しました。",
@@ -1,17 +1,34 @@
+from contextlib import asynccontextmanager
+
 from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from backend.middleware.set_current_user_middleware import set_current_user_middleware
+from backend.middleware.upload_size_middleware import upload_size_middleware
 from backend.auth import router as auth_router
 from backend.auth import verify_token
 from backend import models
 from backend.router import router as main_router
-from backend.websocket import router as ws_router
+from backend.websocket import router as ws_router, websocket_manager
+from backend.change_notifier import change_notifier
+from backend.api.all.bulletin_board import job_queue
 from backend.public_router import router as public_router
 from backend.utils.logger import request_context
 from backend.api.general.department.router import router as department_router
 
-app = FastAPI()
+# データ変更をWebSocketで配信する常駐タスクを、アプリケーションのイベントループ上で起動・停止する
+# あわせて、停止したワーカーで中断された掲示板解析ジョブの回収と、WebSocket送信キューの状況の記録を行う
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await change_notifier.start()
+    await job_queue.start_recovery()
+    await websocket_manager.start_metrics_log()
+    yield
+    await websocket_manager.stop_metrics_log()
+    await job_queue.stop_recovery()
+    await change_notifier.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 # テーブル作成
 models.init_db()
@@ -41,6 +58,9 @@ async def set_request_context(request, call_next):
 # ユーザー情報を設定するミドルウェアを追加
 app.middleware("http")(set_current_user_middleware)
 
+# アップロードサイズの上限を確認するミドルウェアを追加
+app.middleware("http")(upload_size_middleware)
+
 # ルーターの追加順序を変更
 app.include_router(public_router, prefix="/public", tags=["Public"])
 app.include_router(auth_router, prefix="/auth")
@@ -0,0 +1,22 @@
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
+
+from backend.utils.upload_service import MAX_UPLOAD_BYTES, UPLOAD_CHUNK_SIZE
+
+# フォームの他の項目やマルチパートの区切りの分として許容するサイズ
+FORM_OVERHEAD_BYTES = UPLOAD_CHUNK_SIZE
+
+
+# ファイルアップロードのリクエストがサイズ上限を超えている場合、本文を受信する前に413を返す
+async def upload_size_middleware(request: Request, call_next):
+    content_type = request.headers.get("content-type", "")
+    content_length = request.headers.get("content-length")
+
+    if content_type.startswith("multipart/form-data") and content_length and content_length.isdigit():
+        if int(content_length) > MAX_UPLOAD_BYTES + FORM_OVERHEAD_BYTES:
+            return JSONResponse(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                content={"detail": f"ファイルサイズが上限（{MAX_UPLOAD_BYTES // (1024 * 1024)}MB）を超えています"}
+            )
+
+    return await call_next(request)
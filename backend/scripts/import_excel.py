@@ -1,17 +1,17 @@
-from io import BytesIO
 import pandas as pd
+from fastapi import HTTPException
 
 from backend.column_name import COLUMN_NAME
 from backend.utils.logger import logger
+from backend.utils.upload_service import open_upload
 
 
 def import_excel(db, file, model_name, model, required_columns, websocket_func, before_add_func=None,
                  after_add_func=None, delete_check_func=None, name_duplication_check=True):
     try:
       # ExcelファイルをDataFrameに変換
-      contents = file.file.read()  # 非同期でファイルを読み込む
-      excel_data = BytesIO(contents)
-      df = pd.read_excel(excel_data, engine="openpyxl")
+      # アップロードされた一時ファイルをコピーせずに読み込む（サイズ上限を超えていればエラー）
+      df = pd.read_excel(open_upload(file), engine="openpyxl")
 
         # 必須カラムの確認
       if not required_columns.issubset(df.columns):
@@ -105,6 +105,8 @@ def import_excel(db, file, model_name, model, required_columns, websocket_func,
       websocket_func()
 
       return {"success": True, "message": "Excelデータをインポートしました"}
+    except HTTPException as e:
+      return {"success": False, "message": e.detail, "field": ""}
     except Exception as e:
       db.rollback()
       logger.write_error_log(
@@ -0,0 +1,131 @@
+import io
+import os
+import sys
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# モジュールは「backend.」から始まるパスとbackend直下からのパスの両方で読み込まれるため、どちらも通す
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.dirname(BACKEND_DIR), BACKEND_DIR]
+
+from backend.models import Base  # noqa: E402
+from backend.models.base_model import BaseModel  # noqa: E402
+import backend.homepage.models  # noqa: E402,F401
+import backend.api.authority.models  # noqa: E402,F401
+import backend.api.general.models  # noqa: E402,F401
+import backend.api.all.models  # noqa: E402,F401
+import backend.api.manufacturing.model.machine_models  # noqa: E402,F401
+import backend.websocket  # noqa: E402
+from backend.api.general.models import Employee  # noqa: E402
+from backend.models import get_db  # noqa: E402
+from backend.api.all.bulletin_board import excel_service, file_cache, image_store, job_queue, router  # noqa: E402
+
+
+# テストごとにSQLiteのデータベースファイルを作成し、各モジュールの専用セッションもこのデータベースを使う
+# （スレッドプールで並行して使うセッションのトランザクションが混ざらないよう、セッションごとに接続を分ける）
+@pytest.fixture
+def session_factory(tmp_path, monkeypatch):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+
+    for module in (excel_service, job_queue, backend.websocket):
+        monkeypatch.setattr(module, "SessionLocal", factory)
+    # コミット後のSQLログ出力は行わない
+    monkeypatch.setattr(BaseModel, "after_commit", lambda self, session, operation_type=None: None)
+
+    yield factory
+    engine.dispose()
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+# 画像ストア・元ファイル・アップロードファイルの保存先を一時ディレクトリにする
+# 縮小画像の生成は登録されたハッシュを記録するだけにする
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_store, "IMAGE_STORE_DIR", str(tmp_path / "images"))
+    monkeypatch.setattr(file_cache, "FILE_CACHE_DIR", str(tmp_path / "files"))
+    monkeypatch.setattr(job_queue, "UPLOAD_DIR", str(tmp_path / "uploads"))
+
+    scheduled = []
+    monkeypatch.setattr(image_store, "schedule_variants", scheduled.append)
+    excel_service.invalidate_post_count()
+    return scheduled
+
+
+@pytest.fixture
+def employee(db):
+    employee = Employee(employee_no="E001", name="山田太郎", email="yamada@example.com")
+    db.add(employee)
+    db.commit()
+    return employee
+
+
+# 掲示板のルーターだけを載せたアプリケーションのクライアント（認証はテスト用の社員で通す）
+@pytest.fixture
+def client(session_factory, employee, monkeypatch):
+    async def authenticate_user(request, db):
+        return employee
+
+    def get_test_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    monkeypatch.setattr(router, "authenticate_user", authenticate_user)
+    app = FastAPI()
+    app.include_router(router.router, prefix="/bulletin_board")
+    app.dependency_overrides[get_db] = get_test_db
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+# テスト用のワークブックを作成する
+# セルの値は「r{行}c{列}」、1行目は太字、2列目は背景色付き、A1:C1を結合、B列の幅と3行目の高さを指定
+@pytest.fixture
+def make_workbook():
+    def make(rows=20, cols=5, with_image=True, value=None):
+        import openpyxl
+        from openpyxl.drawing.image import Image
+        from openpyxl.styles import Font, PatternFill
+        from PIL import Image as PILImage
+
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        for row in range(1, rows + 1):
+            for col in range(1, cols + 1):
+                cell = sheet.cell(row, col, value=value(row, col) if value else f"r{row}c{col}")
+                if row == 1:
+                    cell.font = Font(bold=True, color="FFFF0000")
+                if col == 2:
+                    cell.fill = PatternFill("solid", fgColor="FF00FF00")
+        sheet.merge_cells("A1:C1")
+        sheet.column_dimensions["B"].width = 20
+        sheet.row_dimensions[3].height = 30
+
+        if with_image:
+            image_data = io.BytesIO()
+            PILImage.new("RGB", (40, 30), "red").save(image_data, "PNG")
+            image_data.seek(0)
+            sheet.add_image(Image(image_data), "D5")
+
+        output = io.BytesIO()
+        workbook.save(output)
+        output.seek(0)
+        return output
+
+    return make
@@ -0,0 +1,126 @@
+import io
+import os
+
+import pytest
+from PIL import Image
+
+from backend.api.all.bulletin_board import image_store
+
+
+def _png(size=(40, 30), mode="RGB", color="red") -> bytes:
+    output = io.BytesIO()
+    Image.new(mode, size, color).save(output, "PNG")
+    return output.getvalue()
+
+
+def _get(client, image_hash, **kwargs):
+    return client.get(f"/bulletin_board/images/{image_hash}", **kwargs)
+
+
+def test_image_is_stored_once_by_content_hash(storage):
+    data = _png()
+
+    image_hash = image_store.save_image(data)
+
+    assert image_store.save_image(data) == image_hash
+    assert image_hash == image_store.compute_image_hash(data)
+    assert open(image_store.get_image_path(image_hash), "rb").read() == data
+    assert image_store.read_image_type(image_hash) == "png"
+
+
+def test_image_is_served_with_long_lived_cache_headers(storage, client):
+    data = _png()
+    image_hash = image_store.save_image(data)
+
+    response = _get(client, image_hash)
+
+    assert response.status_code == 200
+    assert response.content == data
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["etag"] == f'"{image_hash}"'
+    assert "immutable" in response.headers["cache-control"]
+
+
+@pytest.mark.parametrize("if_none_match", ['"{hash}"', 'W/"{hash}"', '"other", "{hash}"', "*"])
+def test_matching_etag_returns_not_modified(storage, client, if_none_match):
+    image_hash = image_store.save_image(_png())
+
+    response = _get(client, image_hash, headers={"If-None-Match": if_none_match.format(hash=image_hash)})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == f'"{image_hash}"'
+
+
+def test_stale_etag_and_range_requests_return_content(storage, client):
+    data = _png()
+    image_hash = image_store.save_image(data)
+
+    assert _get(client, image_hash, headers={"If-None-Match": '"stale"'}).content == data
+
+    response = _get(client, image_hash, headers={"Range": "bytes=0-7"})
+    assert response.status_code == 206
+    assert response.content == data[:8]
+
+
+@pytest.mark.parametrize("image_hash", ["0" * 64, "not-a-hash", "A" * 64])
+def test_unknown_or_invalid_hashes_are_not_found(storage, client, image_hash):
+    assert _get(client, image_hash).status_code == 404
+
+
+@pytest.mark.parametrize("variant", list(image_store.IMAGE_VARIANTS))
+def test_variant_is_generated_once_within_max_size(storage, variant):
+    image_hash = image_store.save_image(_png(size=(1000, 500)))
+    max_size, image_format = image_store.IMAGE_VARIANTS[variant]
+
+    path = image_store.generate_variant(image_hash, variant)
+
+    with Image.open(path) as image:
+        assert image.format == image_format
+        assert image.size == (max_size, max_size // 2)
+    assert image_store.generate_variant(image_hash, variant) == path
+
+
+def test_transparent_image_gets_white_background_in_jpeg(storage):
+    image_hash = image_store.save_image(_png(mode="RGBA", color=(0, 0, 0, 0)))
+
+    with Image.open(image_store.generate_variant(image_hash, "thumb")) as image:
+        assert image.getpixel((0, 0)) == pytest.approx((255, 255, 255), abs=2)
+    with Image.open(image_store.generate_variant(image_hash, "thumb_webp")) as image:
+        assert image.mode == "RGBA"
+
+
+def test_vector_images_have_no_variants(storage, client):
+    # WMF（Pillowで縮小できない形式）のシグネチャを持つデータ
+    data = b"\xd7\xcd\xc6\x9a" + b"\x00" * 60
+    image_hash = image_store.save_image(data)
+
+    assert image_store.generate_variant(image_hash, "thumb") is None
+    response = _get(client, image_hash, params={"variant": "thumb"})
+    assert response.content == data
+    assert response.headers["etag"] == f'"{image_hash}"'
+
+
+def test_variant_is_served_with_its_own_etag(storage, client):
+    image_hash = image_store.save_image(_png(size=(1000, 500)))
+
+    response = _get(client, image_hash, params={"variant": "thumb"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/jpeg"
+    assert response.headers["etag"] == f'"{image_hash}-thumb"'
+    assert _get(client, image_hash, params={"variant": "thumb"},
+                headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+    assert _get(client, image_hash, params={"variant": "huge"}).status_code == 400
+
+
+def test_generate_variants_creates_all_and_remove_image_deletes_them(storage):
+    image_hash = image_store.save_image(_png())
+    image_store.generate_variants(image_hash)
+    paths = [image_store.get_image_path(image_hash)] + [
+        image_store.get_variant_path(image_hash, variant) for variant in image_store.IMAGE_VARIANTS
+    ]
+    assert all(os.path.exists(path) for path in paths)
+
+    image_store.remove_image(image_hash)
+    assert not any(os.path.exists(path) for path in paths)
@@ -0,0 +1,67 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from backend.api.all.bulletin_board import excel_service
+from backend.api.all.models import BulletinImage, BulletinPost
+
+
+# 作成日時が同じ投稿を含む7件の投稿を作成する（idの昇順が作成順）
+@pytest.fixture
+def posts(db, storage, employee):
+    created = [datetime(2024, 1, day) for day in (1, 2, 2, 2, 3, 4, 4)]
+    posts = [BulletinPost(title=f"投稿{index}", employee_id=employee.id, created_at=created_at)
+             for index, created_at in enumerate(created)]
+    db.add_all(posts)
+    db.commit()
+    return posts
+
+
+def _list(db, **kwargs):
+    return asyncio.run(excel_service.get_bulletin_list(0, 3, db, **kwargs))
+
+
+def test_cursor_pages_follow_offset_order_without_gaps(db, posts):
+    expected = [post.id for post in sorted(posts, key=lambda post: (post.created_at, post.id), reverse=True)]
+
+    ids = []
+    cursor = None
+    while True:
+        page = _list(db, cursor=cursor)
+        ids.extend(post["id"] for post in page["posts"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert ids == expected
+    assert page["total"] == len(posts)
+    assert page["posts"][0]["employee_name"] == "山田太郎"
+
+
+def test_offset_paging_is_kept_without_cursor(db, posts):
+    page = asyncio.run(excel_service.get_bulletin_list(3, 3, db))
+    assert [post["title"] for post in page["posts"]] == ["投稿3", "投稿2", "投稿1"]
+
+
+def test_thumbnail_mode_returns_first_image_per_post(db, posts):
+    for index in range(3):
+        db.add(BulletinImage(
+            bulletin_id=posts[-1].id, image_hash=f"{index:064x}", image_type="png",
+            from_row=index + 1, from_col=1, to_row=index + 2, to_col=2
+        ))
+    db.commit()
+
+    full = _list(db)["posts"][0]["images"]
+    thumbnails = _list(db, thumbnails_only=True)["posts"][0]["images"]
+
+    assert len(full) == 3
+    assert len(thumbnails) == 1
+    assert thumbnails[0]["from_row"] == 1
+
+
+def test_invalid_cursor_is_rejected(db, posts):
+    with pytest.raises(HTTPException) as error:
+        _list(db, cursor="not-a-cursor")
+    assert error.value.status_code == 400
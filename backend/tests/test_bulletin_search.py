@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event
+
+from backend.api.all.bulletin_board import excel_service
+from backend.api.all.models import BulletinCell, BulletinPost
+
+
+# SQLiteにはpg_trgmのword_similarityがないため、検索語を含むセルの値が短いほど高くなる関連度で代用する
+@pytest.fixture
+def search_db(session_factory, db):
+    @event.listens_for(session_factory.kw["bind"], "connect")
+    def register(connection, _):
+        connection.create_function(
+            "word_similarity", 2,
+            lambda query, value: len(query) / len(value) if query.lower() in value.lower() else 0.0
+        )
+
+    session_factory.kw["bind"].dispose()
+    return db
+
+
+# セルの値を指定して投稿を作成する
+def _post(db, employee, title, values, **kwargs):
+    post = BulletinPost(title=title, employee_id=employee.id, **kwargs)
+    db.add(post)
+    db.flush()
+    db.add_all(BulletinCell(bulletin_id=post.id, row=row, col=1, value=value)
+               for row, value in enumerate(values, start=1))
+    db.commit()
+    return post
+
+
+def _search(db, query, limit=20):
+    return asyncio.run(excel_service.search_bulletins(query, limit, db))
+
+
+def test_results_are_ranked_by_best_matching_cell(search_db, employee):
+    loose = _post(search_db, employee, "長い値", ["部品ABCの検査記録（第一工場）"])
+    close = _post(search_db, employee, "短い値", ["abc", "ABC部品", "なし"])
+    shared = _post(search_db, employee, "共有", [], content_source_id=close.id)
+    _post(search_db, employee, "一致なし", ["xyz"])
+
+    results = _search(search_db, "  abc ")["results"]
+
+    # 解析済みデータを共有している投稿は、元の投稿と同じ関連度になる
+    assert {result["id"] for result in results[:2]} == {close.id, shared.id}
+    assert [result["id"] for result in results[2:]] == [loose.id]
+    first = next(result for result in results if result["id"] == close.id)
+    assert first["match_count"] == 2
+    assert [(match["row"], match["value"]) for match in first["matches"]] == [(1, "abc"), (2, "ABC部品")]
+
+
+def test_matches_and_candidates_are_capped(search_db, employee, monkeypatch):
+    post = _post(search_db, employee, "多数", [f"abc{index}" for index in range(10)])
+
+    result = _search(search_db, "abc")["results"][0]
+    assert result["match_count"] == 10
+    assert len(result["matches"]) == excel_service.MAX_SEARCH_MATCHES_PER_POST
+
+    monkeypatch.setattr(excel_service, "MAX_SEARCH_CANDIDATES", 4)
+    result = _search(search_db, "abc")["results"][0]
+    assert result["id"] == post.id
+    assert result["match_count"] == 4
+
+
+def test_like_wildcards_are_matched_literally(search_db, employee):
+    _post(search_db, employee, "ワイルドカード", ["100%達成"])
+    _post(search_db, employee, "数字", ["1000"])
+
+    assert [result["title"] for result in _search(search_db, "00%")["results"]] == ["ワイルドカード"]
+
+
+def test_short_queries_are_rejected(search_db, employee, client):
+    _post(search_db, employee, "短い語", ["ab"])
+
+    assert _search(search_db, " ab ")["results"] == []
+    assert client.get("/bulletin_board/search", params={"q": "ab"}).status_code == 422
+
+    response = client.get("/bulletin_board/search", params={"q": "abc"})
+    assert response.status_code == 200
+    assert response.json()["results"] == []
@@ -0,0 +1,108 @@
+import asyncio
+import json
+from datetime import date
+
+import pytest
+from fastapi import BackgroundTasks
+
+from backend.api.all.bulletin_board import excel_service
+from backend.api.all.models import BulletinSnapshot
+from backend.api.general.employee import crud as employee_crud
+from backend.api.general.employee.schemas import EmployeeUpdate
+from backend.api.general.models import EmployeeInfo
+
+
+@pytest.fixture
+def post(db, storage, employee, make_workbook):
+    return asyncio.run(excel_service.parse_excel_to_db(
+        make_workbook(rows=3, cols=3), "sample.xlsx", employee.id, "タイトル", None, db
+    ))
+
+
+def _snapshot(db, bulletin_id, compact=False):
+    return asyncio.run(excel_service.get_bulletin_detail_snapshot(bulletin_id, db, compact=compact))
+
+
+def test_snapshot_is_created_on_upload(db, post):
+    formats = {snapshot.format for snapshot in db.query(BulletinSnapshot).filter_by(bulletin_id=post.id)}
+    assert formats == {excel_service.DETAIL_FORMAT_DEFAULT, excel_service.DETAIL_FORMAT_COMPACT}
+
+    response = excel_service.create_snapshot_response(_snapshot(db, post.id), None)
+    detail = json.loads(response.body)
+
+    assert response.status_code == 200
+    assert detail["title"] == "タイトル"
+    assert detail["employee_name"] == "山田太郎"
+    assert response.headers["ETag"].startswith('"')
+    assert response.headers["Vary"] == "Accept"
+
+
+@pytest.mark.parametrize("if_none_match", ['{etag}', 'W/{etag}', '"other", {etag}', '*'])
+def test_matching_etag_returns_not_modified(db, post, if_none_match):
+    snapshot = _snapshot(db, post.id)
+    etag = f'"{snapshot.etag}"'
+
+    response = excel_service.create_snapshot_response(snapshot, if_none_match.format(etag=etag))
+
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["ETag"] == etag
+    assert response.headers["Vary"] == "Accept"
+
+
+def test_stale_etag_returns_payload(db, post):
+    response = excel_service.create_snapshot_response(_snapshot(db, post.id), '"stale"')
+    assert response.status_code == 200
+
+
+def test_accept_header_selects_format_per_cached_variant(post, client):
+    default = client.get(f"/bulletin_board/{post.id}")
+    compact = client.get(f"/bulletin_board/{post.id}", headers={"Accept": excel_service.COMPACT_MEDIA_TYPE})
+
+    assert default.json().get("format") != excel_service.DETAIL_FORMAT_COMPACT
+    assert compact.json()["format"] == excel_service.DETAIL_FORMAT_COMPACT
+    assert default.headers["ETag"] != compact.headers["ETag"]
+    assert default.headers["Vary"] == compact.headers["Vary"] == "Accept"
+
+
+def test_rebuilt_snapshot_keeps_etag_for_unchanged_post(db, post):
+    snapshot = _snapshot(db, post.id)
+
+    asyncio.run(excel_service.refresh_bulletin_snapshots(post.id, db))
+    rebuilt = _snapshot(db, post.id)
+
+    assert rebuilt.etag == snapshot.etag
+    assert json.loads(rebuilt.payload)["parsed_at"] == post.updated_at.isoformat()
+
+
+def test_update_replaces_snapshot_etag(db, post, make_workbook):
+    etag = _snapshot(db, post.id).etag
+
+    asyncio.run(excel_service.update_excel_in_db(
+        post.id, make_workbook(rows=3, cols=3, value=lambda row, col: "new"), "sample.xlsx", "更新後", None, db
+    ))
+    snapshot = _snapshot(db, post.id)
+
+    assert snapshot.etag != etag
+    assert json.loads(snapshot.payload)["title"] == "更新後"
+
+
+def test_employee_rename_drops_snapshots(db, post, employee):
+    db.add(EmployeeInfo(employee_id=employee.id))
+    db.commit()
+
+    def update(name):
+        data = EmployeeUpdate(
+            name=name, employee_no="E000001", email="yamada@example.com",
+            employment_type="正社員", hire_date=date(2020, 4, 1)
+        )
+        assert employee_crud.update_employee(db, employee.id, data, BackgroundTasks())["success"]
+
+    update("山田太郎")
+    assert db.query(BulletinSnapshot).filter_by(bulletin_id=post.id).count() == 2
+
+    update("山田花子")
+    assert db.query(BulletinSnapshot).filter_by(bulletin_id=post.id).count() == 0
+
+    snapshot = _snapshot(db, post.id)
+    assert json.loads(snapshot.payload)["employee_name"] == "山田花子"
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from backend.api.all.bulletin_board import excel_service
+from backend.api.all.models import BulletinImage, BulletinPost
+
+
+# 20行×5列（A1:C1を結合、D5に画像）の投稿
+@pytest.fixture
+def post(db, storage, employee, make_workbook):
+    return asyncio.run(excel_service.parse_excel_to_db(
+        make_workbook(rows=20, cols=5), "sample.xlsx", employee.id, "タイトル", None, db
+    ))
+
+
+def _window(client, bulletin_id, **params):
+    return client.get(f"/bulletin_board/{bulletin_id}/cells", params=params)
+
+
+def test_metadata_reports_sheet_extent_and_dimensions(db, post, client):
+    image = db.query(BulletinImage).filter_by(bulletin_id=post.id).one()
+
+    response = client.get(f"/bulletin_board/{post.id}/meta")
+    meta = response.json()
+
+    assert response.status_code == 200
+    assert meta["title"] == "タイトル"
+    assert meta["max_row"] == max(20, image.to_row)
+    assert meta["max_col"] == max(5, image.to_col)
+    assert meta["cell_count"] == 20 * 5 - 2
+    assert meta["column_dimensions"]["2"] == 20
+    assert meta["row_dimensions"]["3"] == 30
+    assert "cells" not in meta
+
+
+def test_window_returns_only_intersecting_cells_merges_and_images(post, client):
+    window = _window(client, post.id, start_row=1, end_row=5, start_col=2, end_col=4).json()
+
+    positions = [(cell["row"], cell["col"]) for cell in window["cells"]]
+    # 結合したB1・C1はセルとして保存されない
+    assert positions == [(1, 4)] + [(row, col) for row in range(2, 6) for col in range(2, 5)]
+    # B列から始まる範囲でも、A1から始まる結合セルを含める
+    assert window["merges"] == [{"start": {"row": 1, "col": 1}, "end": {"row": 1, "col": 3}}]
+    assert len(window["images"]) == 1
+
+    window = _window(client, post.id, start_row=10, end_row=20, start_col=5, end_col=5).json()
+    assert [(cell["row"], cell["col"]) for cell in window["cells"]] == [(row, 5) for row in range(10, 21)]
+    assert window["merges"] == []
+    assert window["images"] == []
+
+
+def test_window_of_shared_post_reads_source_data(db, post, employee, client):
+    shared = BulletinPost(title="共有", employee_id=employee.id, content_source_id=post.id)
+    db.add(shared)
+    db.commit()
+
+    window = _window(client, shared.id, start_row=2, end_row=2, start_col=1, end_col=5).json()
+
+    assert window["id"] == shared.id
+    assert [cell["value"] for cell in window["cells"]] == [f"r2c{col}" for col in range(1, 6)]
+
+
+def test_window_size_is_limited(post, client):
+    largest = {"start_row": 1, "end_row": excel_service.MAX_WINDOW_ROWS,
+               "start_col": 1, "end_col": excel_service.MAX_WINDOW_COLS}
+    assert _window(client, post.id, **largest).status_code == 200
+
+    assert _window(client, post.id, **{**largest, "end_row": excel_service.MAX_WINDOW_ROWS + 1}).status_code == 400
+    assert _window(client, post.id, **{**largest, "end_col": excel_service.MAX_WINDOW_COLS + 1}).status_code == 400
+
+
+@pytest.mark.parametrize("params, status_code", [
+    ({"start_row": 5, "end_row": 4, "end_col": 5}, 400),
+    ({"start_col": 3, "end_row": 5, "end_col": 2}, 400),
+    ({"start_row": 0, "end_row": 5, "end_col": 5}, 422),
+    ({"end_row": 5}, 422),
+])
+def test_invalid_windows_are_rejected(post, client, params, status_code):
+    assert _window(client, post.id, **params).status_code == status_code
+
+
+def test_missing_post_is_not_found(storage, client):
+    assert client.get("/bulletin_board/12345/meta").status_code == 404
+    assert _window(client, 12345, end_row=5, end_col=5).status_code == 404
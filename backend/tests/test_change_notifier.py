@@ -0,0 +1,149 @@
+import asyncio
+import json
+import threading
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+
+from backend import change_notifier as notifier_module
+from backend.change_notifier import ChangeNotifier
+
+
+# WebSocketへの配信を記録する
+class FakeWebSocketManager:
+    def __init__(self):
+        self.broadcasts = []
+        self.user_messages = []
+
+    async def broadcast_filtered(self, get_func, topic):
+        self.broadcasts.append(topic)
+
+    def send_to_user(self, employee_no, message, key=None):
+        self.user_messages.append((employee_no, message, key))
+
+
+# pg_notifyの実行を記録するPostgreSQLのエンジンの代わり
+class FakePostgresEngine:
+    dialect = SimpleNamespace(name="postgresql")
+
+    def __init__(self, fail=False):
+        self.notified = []
+        self.fail = fail
+
+    @contextmanager
+    def begin(self):
+        if self.fail:
+            raise RuntimeError("connection refused")
+        yield SimpleNamespace(execute=lambda statement, params: self.notified.append(json.loads(params["payload"])))
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    manager = FakeWebSocketManager()
+    monkeypatch.setattr(notifier_module, "websocket_manager", manager)
+    monkeypatch.setattr(notifier_module, "engine", create_engine("sqlite://"))
+    monkeypatch.setattr(notifier_module, "DEBOUNCE_SECONDS", 0.05)
+    return manager
+
+
+def test_publishes_from_threads_are_coalesced(manager):
+    async def run():
+        notifier = ChangeNotifier()
+        notifier.register("topic", lambda *args: ([], 0))
+        await notifier.start()
+
+        threads = [threading.Thread(target=notifier.publish, args=("topic",)) for _ in range(50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        await asyncio.sleep(0.2)
+        await notifier.stop()
+
+    asyncio.run(run())
+    assert manager.broadcasts == ["topic"]
+
+
+def test_publish_on_event_loop_is_dispatched(manager):
+    async def run():
+        notifier = ChangeNotifier()
+        notifier.register("topic", lambda *args: ([], 0))
+        await notifier.start()
+        notifier.publish("topic")
+        await notifier.notify_user("E001", "message", "job:1")
+        await asyncio.sleep(0.2)
+        await notifier.stop()
+
+    asyncio.run(run())
+    assert manager.broadcasts == ["topic"]
+    assert manager.user_messages == [("E001", "message", "job:1")]
+
+
+def test_publish_without_started_notifier_is_ignored(manager):
+    notifier = ChangeNotifier()
+    notifier.publish("topic")
+    notifier.send_to_user("E001", "message")
+    assert manager.broadcasts == []
+    assert manager.user_messages == []
+
+
+def test_notify_is_sent_without_event_loop(manager, monkeypatch):
+    engine = FakePostgresEngine()
+    monkeypatch.setattr(notifier_module, "engine", engine)
+
+    # 解析ジョブのワーカープロセスのように、通知バスを起動していないプロセスからの通知
+    ChangeNotifier().send_to_user("E001", "message", "job:1")
+
+    assert engine.notified == [{"user": "E001", "message": "message", "key": "job:1"}]
+
+
+@pytest.mark.parametrize("listening, fail, dispatched_locally", [
+    (True, False, False),
+    (False, False, True),
+    (True, True, True),
+])
+def test_local_dispatch_only_when_notify_cannot_reach_this_worker(manager, monkeypatch, listening, fail, dispatched_locally):
+    monkeypatch.setattr(notifier_module, "engine", FakePostgresEngine(fail=fail))
+    notifier = ChangeNotifier()
+    dispatched = []
+    notifier._loop = SimpleNamespace(is_closed=lambda: False, call_soon_threadsafe=lambda func, event: dispatched.append(event))
+    notifier._listen_connection = object() if listening else None
+
+    notifier._notify_blocking({"topic": "topic"})
+
+    assert bool(dispatched) == dispatched_locally
+
+
+def test_oversized_payload_is_dispatched_locally(manager, monkeypatch):
+    engine = FakePostgresEngine()
+    monkeypatch.setattr(notifier_module, "engine", engine)
+    notifier = ChangeNotifier()
+    dispatched = []
+    notifier._loop = SimpleNamespace(is_closed=lambda: False, call_soon_threadsafe=lambda func, event: dispatched.append(event))
+    notifier._listen_connection = object()
+
+    notifier._notify_blocking({"user": "E001", "message": "x" * notifier_module.MAX_NOTIFY_PAYLOAD})
+
+    assert engine.notified == []
+    assert len(dispatched) == 1
+
+
+def test_received_notifications_are_dispatched(manager):
+    notifier = ChangeNotifier()
+    notifier._changed = asyncio.Event()
+    notifier._listen_connection = SimpleNamespace(
+        poll=lambda: None,
+        notifies=[
+            SimpleNamespace(payload=json.dumps({"topic": "topic"})),
+            SimpleNamespace(payload="broken"),
+            SimpleNamespace(payload=json.dumps({"user": "E001", "message": "message", "key": None})),
+        ]
+    )
+
+    notifier._read_notifications()
+
+    assert notifier._pending == {"topic"}
+    assert notifier._changed.is_set()
+    assert manager.user_messages == [("E001", "message", None)]
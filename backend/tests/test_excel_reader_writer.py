@@ -0,0 +1,98 @@
+import asyncio
+import io
+import types
+
+import openpyxl
+
+from backend.api.all.bulletin_board import excel_executor, excel_service
+from backend.api.all.bulletin_board.excel_reader import ExcelStreamReader, ParsedWorkbook, spill_cells
+from backend.api.all.models import BulletinCell, BulletinImage, BulletinMerge
+
+
+def test_reader_streams_cells_styles_and_sheet_properties(make_workbook):
+    with ExcelStreamReader(make_workbook(rows=3, cols=3), excel_service._parse_cell_style) as reader:
+        cells = list(reader.iter_cells())
+        anchors = list(reader.iter_image_anchors())
+
+        # 結合したB1・C1はセルとして出力されない
+        assert [(cell["row"], cell["col"], cell["value"]) for cell in cells[:3]] == [
+            (1, 1, "r1c1"), (2, 1, "r2c1"), (2, 2, "r2c2")
+        ]
+        assert cells[0]["style"]["font_bold"] is True
+        assert cells[2]["style"]["bg_color"] is not None
+        assert reader.merges == [{"start_row": 1, "start_col": 1, "end_row": 1, "end_col": 3}]
+        assert reader.column_widths[2] == 20
+        assert reader.row_heights[3] == 30
+        assert [(anchor["from_row"], anchor["from_col"]) for anchor in anchors] == [(5, 4)]
+
+
+def test_parsed_workbook_reads_spilled_cells_and_removes_file(make_workbook, tmp_path, monkeypatch):
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+    workbook = make_workbook(rows=30, cols=4)
+    with ExcelStreamReader(workbook, excel_service._parse_cell_style) as reader:
+        expected = [(cell["row"], cell["col"], cell["value"], cell["style_id"]) for cell in reader.iter_cells()]
+
+    workbook.seek(0)
+    with ExcelStreamReader(workbook, excel_service._parse_cell_style) as reader:
+        cells_path = spill_cells(reader, batch_size=7)
+        data = {
+            "cells_path": cells_path,
+            "styles": reader.styles,
+            "merges": reader.merges,
+            "column_widths": reader.column_widths,
+            "row_heights": reader.row_heights,
+            "dimension_rows": reader.dimension_rows,
+            "images": []
+        }
+
+    with ParsedWorkbook(data) as parsed:
+        cells = list(parsed.iter_cells())
+        assert [(cell["row"], cell["col"], cell["value"], cell["style_id"]) for cell in cells] == expected
+        assert cells[0]["style"]["font_bold"] is True
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_parse_stores_cells_and_images(db, storage, employee, make_workbook):
+    post = asyncio.run(excel_service.parse_excel_to_db(
+        make_workbook(rows=10, cols=3), "sample.xlsx", employee.id, "タイトル", None, db
+    ))
+
+    # 結合したB1・C1を除くセル
+    assert db.query(BulletinCell).filter_by(bulletin_id=post.id).count() == 28
+    assert db.query(BulletinMerge).filter_by(bulletin_id=post.id).count() == 1
+    image = db.query(BulletinImage).filter_by(bulletin_id=post.id).one()
+    assert storage == [image.image_hash]
+    assert post.file_path is not None
+
+
+def test_generated_workbook_round_trips(db, storage, employee, make_workbook):
+    post = asyncio.run(excel_service.parse_excel_to_db(
+        make_workbook(rows=10, cols=3, with_image=False), "sample.xlsx", employee.id, "タイトル", None, db
+    ))
+
+    output, filename = asyncio.run(excel_service.generate_excel_from_db(post.id, db))
+    workbook = openpyxl.load_workbook(io.BytesIO(b"".join(output)))
+    sheet = workbook.active
+
+    assert filename.endswith(".xlsx")
+    assert sheet.cell(10, 3).value == "r10c3"
+    assert sheet.cell(1, 1).font.bold is True
+    assert [str(merged) for merged in sheet.merged_cells.ranges] == ["A1:C1"]
+    assert sheet.column_dimensions["B"].width == 20
+
+
+def test_download_is_streamed_even_in_process_mode(db, storage, employee, make_workbook, monkeypatch):
+    post = asyncio.run(excel_service.parse_excel_to_db(
+        make_workbook(rows=10, cols=3, with_image=False), "sample.xlsx", employee.id, "タイトル", None, db
+    ))
+
+    def get_process_executor():
+        raise AssertionError("ダウンロードはプロセスプールで生成しない")
+
+    monkeypatch.setattr(excel_executor, "EXCEL_EXECUTOR", excel_executor.EXECUTOR_PROCESS)
+    monkeypatch.setattr(excel_executor, "get_process_executor", get_process_executor)
+    output, _ = asyncio.run(excel_service.generate_excel_from_db(post.id, db))
+
+    assert isinstance(output, types.GeneratorType)
+    assert openpyxl.load_workbook(io.BytesIO(b"".join(output))).active.cell(10, 3).value == "r10c3"
@@ -0,0 +1,83 @@
+import asyncio
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from backend.api.all.bulletin_board import excel_service, image_store
+from backend.api.all.models import BulletinCell, BulletinImage, BulletinPost
+
+
+def _parse(db, employee, workbook, content_hash=None):
+    return asyncio.run(excel_service.parse_excel_to_db(
+        workbook, "sample.xlsx", employee.id, "タイトル", None, db, content_hash=content_hash
+    ))
+
+
+def _update(db, bulletin_id, workbook):
+    return asyncio.run(excel_service.update_excel_in_db(
+        bulletin_id, workbook, "sample.xlsx", "更新後", None, db
+    ))
+
+
+def _cells(db, bulletin_id):
+    return {
+        (cell.row, cell.col): (cell.id, cell.value)
+        for cell in db.query(BulletinCell).filter_by(bulletin_id=bulletin_id)
+    }
+
+
+def test_update_applies_only_changed_cells(db, storage, employee, make_workbook):
+    post = _parse(db, employee, make_workbook(rows=5, cols=3))
+    before = _cells(db, post.id)
+
+    # B2の値を変更し、5行目を削除して4列目を追加
+    def value(row, col):
+        return "changed" if (row, col) == (2, 2) else f"r{row}c{col}"
+
+    _update(db, post.id, make_workbook(rows=4, cols=4, value=value))
+    db.expire_all()
+    after = _cells(db, post.id)
+
+    assert after[(2, 2)] == (before[(2, 2)][0], "changed")
+    assert after[(3, 1)] == before[(3, 1)]
+    assert after[(2, 4)][1] == "r2c4"
+    assert (5, 1) not in after
+    assert len(after) == 4 * 4 - 2
+
+
+def test_update_detaches_shared_content(db, storage, employee, make_workbook):
+    data = make_workbook(rows=3, cols=3).read()
+    content_hash = hashlib.sha256(data).hexdigest()
+    source = _parse(db, employee, io.BytesIO(data), content_hash=content_hash)
+    shared = _parse(db, employee, io.BytesIO(data), content_hash=content_hash)
+    assert shared.content_source_id == source.id
+    assert _cells(db, shared.id) == {}
+
+    _update(db, shared.id, make_workbook(rows=3, cols=3, value=lambda row, col: "new"))
+    db.expire_all()
+
+    assert db.get(BulletinPost, shared.id).content_source_id is None
+    assert {value for _, value in _cells(db, shared.id).values()} == {"new"}
+    assert _cells(db, source.id)[(2, 1)][1] == "r2c1"
+
+
+def test_update_removes_unreferenced_images(db, storage, employee, make_workbook):
+    post = _parse(db, employee, make_workbook(rows=5, cols=5))
+    other = _parse(db, employee, make_workbook(rows=6, cols=5))
+    image_hash = db.query(BulletinImage.image_hash).filter_by(bulletin_id=post.id).scalar()
+
+    # 他の投稿が同じ画像を参照している間は残す
+    _update(db, post.id, make_workbook(rows=5, cols=5, with_image=False))
+    assert os.path.exists(image_store.get_image_path(image_hash))
+
+    _update(db, other.id, make_workbook(rows=6, cols=5, with_image=False))
+    assert not os.path.exists(image_store.get_image_path(image_hash))
+
+
+def test_update_of_missing_post_returns_not_found(db, storage, make_workbook):
+    with pytest.raises(HTTPException) as error:
+        _update(db, 12345, make_workbook(rows=3, cols=3))
+    assert error.value.status_code == 404
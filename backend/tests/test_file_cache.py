@@ -0,0 +1,75 @@
+import asyncio
+import hashlib
+import io
+import os
+
+import openpyxl
+
+from backend.api.all.bulletin_board import excel_service, file_cache
+
+
+def _store(bulletin_id, data, mtime=None):
+    path, content_hash = file_cache.store_file(bulletin_id, io.BytesIO(data), "sample.XLSX")
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path, content_hash
+
+
+def test_store_file_names_file_by_post_and_hash(storage):
+    data = b"workbook"
+    file_data = io.BytesIO(data)
+    file_data.read()
+
+    path, content_hash = file_cache.store_file(7, file_data, "sample.XLSX")
+
+    assert content_hash == hashlib.sha256(data).hexdigest()
+    assert os.path.basename(path) == f"7_{content_hash}.xlsx"
+    assert open(path, "rb").read() == data
+    assert file_data.tell() == 0
+    assert os.listdir(file_cache.FILE_CACHE_DIR) == [os.path.basename(path)]
+
+
+def test_evict_removes_least_recently_used_files(storage, monkeypatch):
+    monkeypatch.setattr(file_cache, "FILE_CACHE_MAX_BYTES", 25)
+    oldest, _ = _store(1, b"a" * 10, mtime=1000)
+    used, _ = _store(2, b"b" * 10, mtime=2000)
+    # 使用時刻を更新したファイルは残る
+    assert file_cache.get_cached_path(oldest) == oldest
+    newest, _ = _store(3, b"c" * 10)
+
+    assert os.path.exists(oldest)
+    assert not os.path.exists(used)
+    assert os.path.exists(newest)
+
+
+def test_cached_path_rejects_missing_and_foreign_files(storage, tmp_path):
+    path, _ = _store(1, b"data")
+    foreign = tmp_path / "foreign.xlsx"
+    foreign.write_bytes(b"data")
+
+    assert file_cache.get_cached_path(None) is None
+    assert file_cache.get_cached_path(str(foreign)) is None
+    file_cache.remove_file(str(foreign))
+    assert foreign.exists()
+
+    file_cache.remove_file(path)
+    assert file_cache.get_cached_path(path) is None
+
+
+def test_download_returns_uploaded_file_until_it_is_evicted(db, storage, employee, client, make_workbook):
+    data = make_workbook(rows=5, cols=3, with_image=False).read()
+    post = asyncio.run(excel_service.parse_excel_to_db(
+        io.BytesIO(data), "sample.xlsx", employee.id, "タイトル", None, db
+    ))
+
+    response = client.get(f"/bulletin_board/download/{post.id}")
+    assert response.status_code == 200
+    assert response.content == data
+    assert "attachment; filename*=UTF-8''" in response.headers["content-disposition"]
+
+    # 元ファイルがなくなった場合はデータベースから生成する
+    file_cache.remove_file(post.file_path)
+    response = client.get(f"/bulletin_board/download/{post.id}")
+    assert response.status_code == 200
+    assert response.content != data
+    assert openpyxl.load_workbook(io.BytesIO(response.content)).active.cell(5, 3).value == "r5c3"
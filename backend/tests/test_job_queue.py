@@ -0,0 +1,170 @@
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pytest
+
+from backend.api.all.bulletin_board import excel_executor, excel_service, job_queue
+from backend.api.all.models import BulletinJob, BulletinPost
+from backend.scripts.get_time import now
+
+
+# 解析ジョブをスレッドで実行し、投稿者への通知を記録する
+# （プロセスプールのワーカーはテスト用のデータベースを参照できないため）
+@pytest.fixture
+def notifications(monkeypatch):
+    monkeypatch.setattr(excel_executor, "EXCEL_EXECUTOR", excel_executor.EXECUTOR_THREAD)
+
+    sent = []
+
+    def send_to_user(employee_no, message, key=None):
+        sent.append((employee_no, key, json.loads(message)["job"]))
+
+    async def notify_user(employee_no, message, key=None):
+        send_to_user(employee_no, message, key)
+
+    monkeypatch.setattr(job_queue.change_notifier, "send_to_user", send_to_user)
+    monkeypatch.setattr(job_queue.change_notifier, "notify_user", notify_user)
+    return sent
+
+
+def _save_upload(data: bytes, name: str = "upload.xlsx") -> str:
+    os.makedirs(job_queue.UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(job_queue.UPLOAD_DIR, name)
+    with open(path, "wb") as upload:
+        upload.write(data)
+    return path
+
+
+def _run_job(db, employee, upload_path):
+    async def run():
+        job = await job_queue.enqueue_job(
+            db, employee.id, employee.employee_no, upload_path, "sample.xlsx", "タイトル", None
+        )
+        await asyncio.gather(*job_queue._monitor_tasks)
+        return job.id
+
+    job_id = asyncio.run(run())
+    db.expire_all()
+    return db.get(BulletinJob, job_id)
+
+
+def test_job_creates_post_and_notifies_author(db, storage, employee, notifications, make_workbook, monkeypatch):
+    # SQLiteは書き込みが1接続に限られ、解析中のトランザクションと並行して進捗を書き込めないため、途中の進捗は記録しない
+    monkeypatch.setattr(job_queue, "PROGRESS_STEP", 1000)
+    upload_path = _save_upload(make_workbook(rows=100, cols=5).read())
+
+    job = _run_job(db, employee, upload_path)
+
+    assert job.status == job_queue.JOB_SUCCEEDED
+    assert job.progress == 100
+    assert job.upload_path is None
+    assert db.get(BulletinPost, job.bulletin_id).title == "タイトル"
+    assert not os.path.exists(upload_path)
+
+    assert [state["status"] for _, _, state in notifications] == [
+        job_queue.JOB_RUNNING, job_queue.JOB_SUCCEEDED, job_queue.JOB_SUCCEEDED
+    ]
+    assert {(employee_no, key) for employee_no, key, _ in notifications} == {("E001", f"bulletin_job:{job.id}")}
+
+
+def test_parse_reports_progress_per_batch(db, storage, employee, make_workbook, monkeypatch):
+    monkeypatch.setattr(excel_service, "CELL_BATCH_SIZE", 50)
+    reported = []
+
+    asyncio.run(excel_service.parse_excel_to_db(
+        make_workbook(rows=100, cols=5), "sample.xlsx", employee.id, "タイトル", None, db, progress=reported.append
+    ))
+
+    assert len(reported) == 10
+    assert reported == sorted(reported)
+    assert reported[-1] == 1.0
+
+
+def test_job_uses_process_pool_only_in_process_mode(db, storage, employee, notifications, make_workbook, monkeypatch):
+    monkeypatch.setattr(job_queue, "PROGRESS_STEP", 1000)
+    executor = ThreadPoolExecutor(max_workers=1)
+    used = []
+
+    def get_process_executor():
+        used.append(executor)
+        return executor
+
+    monkeypatch.setattr(excel_executor, "get_process_executor", get_process_executor)
+
+    job = _run_job(db, employee, _save_upload(make_workbook(rows=3, cols=3).read()))
+    assert job.status == job_queue.JOB_SUCCEEDED
+    assert used == []
+
+    monkeypatch.setattr(excel_executor, "EXCEL_EXECUTOR", excel_executor.EXECUTOR_PROCESS)
+    # プロセスプールの代わりのスレッドから同じプールへ解析を入れ子で投入しないよう、その場で実行させる
+    monkeypatch.setattr(excel_executor, "call", lambda func, *args: func(*args))
+    job = _run_job(db, employee, _save_upload(make_workbook(rows=3, cols=3).read(), "second.xlsx"))
+    executor.shutdown()
+    assert job.status == job_queue.JOB_SUCCEEDED
+    assert used
+
+
+def test_job_failure_is_recorded(db, storage, employee, notifications):
+    upload_path = _save_upload(b"not an excel file")
+
+    job = _run_job(db, employee, upload_path)
+
+    assert job.status == job_queue.JOB_FAILED
+    assert job.message
+    assert job.bulletin_id is None
+    assert not os.path.exists(upload_path)
+    assert notifications[-1][2]["status"] == job_queue.JOB_FAILED
+
+
+def test_missing_job_is_ignored(session_factory):
+    assert job_queue.run_job(12345) is None
+
+
+def test_recover_stale_jobs_fails_only_jobs_without_heartbeat(db, storage, employee):
+    stale_at = now() - timedelta(seconds=job_queue.JOB_STALE_SECONDS + 60)
+    cases = [
+        ("queued", job_queue.JOB_QUEUED, stale_at),
+        ("running", job_queue.JOB_RUNNING, stale_at),
+        ("alive", job_queue.JOB_RUNNING, now()),  # 他のワーカーで実行中のジョブ
+        ("succeeded", job_queue.JOB_SUCCEEDED, stale_at),
+    ]
+    jobs = {}
+    for name, status, updated_at in cases:
+        jobs[name] = BulletinJob(
+            employee_id=employee.id, status=status, title="タイトル", filename="sample.xlsx",
+            upload_path=_save_upload(b"data", f"{name}.xlsx"), updated_at=updated_at
+        )
+    db.add_all(jobs.values())
+    db.commit()
+    upload_paths = {name: job.upload_path for name, job in jobs.items()}
+
+    job_queue.recover_stale_jobs()
+    db.expire_all()
+
+    for name in ("queued", "running"):
+        assert jobs[name].status == job_queue.JOB_FAILED
+        assert jobs[name].upload_path is None
+        assert not os.path.exists(upload_paths[name])
+    assert jobs["alive"].status == job_queue.JOB_RUNNING
+    assert jobs["succeeded"].status == job_queue.JOB_SUCCEEDED
+    for name in ("alive", "succeeded"):
+        assert os.path.exists(upload_paths[name])
+
+
+def test_recovered_job_is_not_run_or_overwritten(db, storage, employee, make_workbook):
+    job = BulletinJob(
+        employee_id=employee.id, status=job_queue.JOB_FAILED, title="タイトル", filename="sample.xlsx",
+        upload_path=_save_upload(make_workbook(rows=3, cols=3).read())
+    )
+    db.add(job)
+    db.commit()
+
+    job_queue.run_job(job.id)
+    job_queue._update_job(job.id, status=job_queue.JOB_SUCCEEDED)
+    db.expire_all()
+
+    assert job.status == job_queue.JOB_FAILED
+    assert db.query(BulletinPost).count() == 0
@@ -0,0 +1,88 @@
+import asyncio
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import FastAPI, HTTPException, UploadFile
+from fastapi.testclient import TestClient
+
+from backend.middleware import upload_size_middleware as middleware_module
+from backend.utils import upload_service
+
+
+def _upload(data: bytes, size=None) -> UploadFile:
+    return UploadFile(io.BytesIO(data), size=size, filename="sample.xlsx")
+
+
+@pytest.mark.parametrize("size", [None, 10])
+def test_check_upload_size_accepts_files_up_to_the_limit(size):
+    file = _upload(b"x" * 10, size=size)
+    file.file.read(3)
+
+    assert upload_service.check_upload_size(file, max_bytes=10) == 10
+    assert file.file.tell() == 0
+
+
+@pytest.mark.parametrize("size", [None, 11])
+def test_check_upload_size_rejects_large_files(size):
+    with pytest.raises(HTTPException) as error:
+        upload_service.check_upload_size(_upload(b"x" * 11, size=size), max_bytes=10)
+    assert error.value.status_code == 413
+
+
+def test_save_upload_copies_file_and_hashes_content(tmp_path):
+    data = b"workbook" * 1000
+
+    stored = asyncio.run(upload_service.save_upload(_upload(data), str(tmp_path), suffix=".xlsx"))
+
+    assert stored.size == len(data)
+    assert stored.sha256 == hashlib.sha256(data).hexdigest()
+    assert stored.path.endswith(".xlsx")
+    assert open(stored.path, "rb").read() == data
+
+
+def test_save_upload_stops_when_content_exceeds_declared_size(tmp_path):
+    # 申告されたサイズが実際より小さくても、コピー中に上限を超えた時点で中止して一時ファイルを削除する
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(upload_service.save_upload(_upload(b"x" * 11, size=5), str(tmp_path), max_bytes=10))
+
+    assert error.value.status_code == 413
+    assert os.listdir(tmp_path) == []
+
+
+# アップロードサイズのミドルウェアだけを載せたアプリケーション（ルートが呼ばれた回数を記録する）
+@pytest.fixture
+def middleware_client(monkeypatch):
+    monkeypatch.setattr(middleware_module, "MAX_UPLOAD_BYTES", 100)
+    calls = []
+    app = FastAPI()
+    app.middleware("http")(middleware_module.upload_size_middleware)
+
+    @app.post("/upload")
+    async def upload():
+        calls.append(True)
+        return {}
+
+    with TestClient(app) as client:
+        yield client, calls
+
+
+def test_middleware_rejects_large_multipart_requests_before_the_route(middleware_client):
+    client, calls = middleware_client
+    limit = 100 + middleware_module.FORM_OVERHEAD_BYTES
+
+    response = client.post("/upload", files={"file": ("sample.xlsx", b"x" * (limit + 1))})
+
+    assert response.status_code == 413
+    assert "上限" in response.json()["detail"]
+    assert calls == []
+
+
+def test_middleware_passes_small_and_non_multipart_requests(middleware_client):
+    client, calls = middleware_client
+    limit = 100 + middleware_module.FORM_OVERHEAD_BYTES
+
+    assert client.post("/upload", files={"file": ("sample.xlsx", b"x" * 50)}).status_code == 200
+    assert client.post("/upload", content=b"x" * (limit + 1)).status_code == 200
+    assert len(calls) == 2
@@ -0,0 +1,180 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import backend.websocket as websocket_module
+from backend.websocket import LIST_UPDATE_KEY, ConnectionSender, WebSocketManager, parse_filters
+
+
+# 送信内容を記録するWebSocketの代わり（gateを閉じている間は送信が完了しない）
+class FakeWebSocket:
+    def __init__(self, fail=False):
+        self.scope = {}
+        self.sent = []
+        self.closed_with = None
+        self.fail = fail
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message):
+        await self.gate.wait()
+        if self.fail:
+            raise RuntimeError("send failed")
+        self.sent.append(message)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+def _user(employee_no="E001"):
+    return SimpleNamespace(employee_no=employee_no)
+
+
+def test_sender_coalesces_keyed_messages_and_drops_oldest():
+    async def run():
+        websocket = FakeWebSocket()
+        websocket.gate.clear()
+        sender = ConnectionSender(websocket, lambda _: None, max_size=3)
+        await asyncio.sleep(0)
+
+        sender.put("first")
+        await asyncio.sleep(0)  # 送信タスクが1件目を取り出して送信待ちになる
+        sender.put("list-1", key=LIST_UPDATE_KEY)
+        sender.put("a")
+        sender.put("list-2", key=LIST_UPDATE_KEY)
+        sender.put("b")
+        sender.put("c")
+
+        websocket.gate.set()
+        await asyncio.sleep(0.01)
+        sender.close()
+        return websocket.sent, sender
+
+    sent, sender = asyncio.run(run())
+    assert sent == ["first", "a", "b", "c"]
+    assert sender.coalesced == 1
+    assert sender.dropped == 1
+
+
+def test_dropped_messages_are_logged_at_most_once_per_interval(caplog, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(websocket_module.time, "monotonic", lambda: clock[0])
+
+    async def run():
+        websocket = FakeWebSocket()
+        websocket.gate.clear()
+        sender = ConnectionSender(websocket, lambda _: None, max_size=1)
+        await asyncio.sleep(0)
+        sender.put("first")
+        await asyncio.sleep(0)
+        for index in range(5):
+            sender.put(f"message-{index}")
+        clock[0] += websocket_module.DROP_LOG_INTERVAL
+        sender.put("last")
+        sender.close()
+
+    with caplog.at_level("WARNING", logger="backend.websocket"):
+        asyncio.run(run())
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert len(messages) == 2
+    assert "破棄: 1件、累計: 1件" in messages[0]
+    assert "破棄: 4件、累計: 5件" in messages[1]
+
+
+def test_queue_metrics_are_logged_while_connected(caplog):
+    async def run():
+        manager = WebSocketManager()
+        manager.log_queue_metrics()
+        websocket = FakeWebSocket()
+        websocket.gate.clear()
+        await manager.connect(websocket, _user(), "topic")
+        await asyncio.sleep(0)
+        for index in range(3):
+            manager.send(websocket, f"message-{index}")
+        metrics = manager.get_queue_metrics()
+        manager.log_queue_metrics()
+        manager.disconnect(websocket)
+        return metrics
+
+    with caplog.at_level("INFO", logger="backend.websocket"):
+        metrics = asyncio.run(run())
+
+    assert metrics == {"connections": 1, "queued": 3, "max_queue_depth": 3, "dropped": 0, "coalesced": 0}
+    assert len(caplog.records) == 1
+    assert "'queued': 3" in caplog.records[0].getMessage()
+
+
+def test_failed_send_closes_socket_and_disconnects():
+    async def run():
+        manager = WebSocketManager()
+        websocket = FakeWebSocket(fail=True)
+        await manager.connect(websocket, _user(), "topic")
+        manager.send(websocket, "message")
+        await asyncio.sleep(0.01)
+        return manager, websocket
+
+    manager, websocket = asyncio.run(run())
+    assert websocket.closed_with == 1011
+    assert websocket not in manager.active_connections
+    assert manager.get_subscribers("topic") == []
+
+
+@pytest.mark.parametrize("data, expected", [
+    ({"searchQuery": "abc", "currentPage": "2", "itemsPerPage": 20},
+     {"searchQuery": "abc", "currentPage": 2, "itemsPerPage": 20}),
+    ({"searchQuery": None}, {"searchQuery": "", "currentPage": 1, "itemsPerPage": 10}),
+    ({"searchQuery": ["abc"]}, None),
+    ({"currentPage": "x"}, None),
+    ({"currentPage": 0}, None),
+    ({"itemsPerPage": 1000}, None),
+    (["not", "a", "dict"], None),
+])
+def test_parse_filters(data, expected):
+    assert parse_filters(data) == expected
+
+
+def test_broadcast_renders_each_filter_once(monkeypatch, session_factory):
+    calls = []
+
+    def get_func(db, search_query, current_page, items_per_page):
+        calls.append((search_query, current_page, items_per_page))
+        return [search_query], 1
+
+    async def run():
+        manager = WebSocketManager()
+        websockets = [FakeWebSocket() for _ in range(3)]
+        for websocket in websockets:
+            await manager.connect(websocket, _user(), "topic")
+        manager.update_filters(websockets[2], {"searchQuery": "other"})
+        # 不正な検索条件の接続は配信対象から外す
+        assert manager.update_filters(websockets[1], {"itemsPerPage": "many"}) is False
+
+        await manager.broadcast_filtered(get_func, "topic")
+        await asyncio.sleep(0.01)
+        return websockets
+
+    websockets = asyncio.run(run())
+    assert sorted(calls) == [("", 1, 10), ("other", 1, 10)]
+    assert [json.loads(websocket.sent[0])["updated_data"] for websocket in websockets] == [[""], [""], ["other"]]
+
+
+def test_send_to_user_reaches_every_connection_of_user():
+    async def run():
+        manager = WebSocketManager()
+        mine, other = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(mine, _user("E001"), "a")
+        await manager.connect(other, _user("E002"), "a")
+        manager.send_to_user("E001", "hello", "job:1")
+        manager.send_to_user("E001", "hello again", "job:1")
+        await asyncio.sleep(0.01)
+        return mine, other
+
+    mine, other = asyncio.run(run())
+    assert mine.sent[-1] == "hello again"
+    assert other.sent == []
@@ -0,0 +1,81 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import BinaryIO, Optional
+
+from fastapi import HTTPException, UploadFile, status
+
+# アップロードファイルのサイズ上限（バイト）
+MAX_UPLOAD_BYTES = int(os.environ.get('UPLOAD_MAX_BYTES', 50 * 1024 * 1024))
+
+# コピー・ハッシュ計算時の読み込み単位
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+# 保存したアップロードファイルの情報
+@dataclass
+class StoredUpload:
+    path: str
+    size: int
+    sha256: str
+
+
+# サイズ上限を超えた場合のエラー
+def _upload_too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"ファイルサイズが上限（{max_bytes // (1024 * 1024)}MB）を超えています"
+    )
+
+
+# アップロードファイルのサイズを確認する（上限を超えていれば413を返す）
+def check_upload_size(file: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> int:
+    size = file.size
+    if size is None:
+        file.file.seek(0, os.SEEK_END)
+        size = file.file.tell()
+    file.file.seek(0)
+
+    if size > max_bytes:
+        raise _upload_too_large(max_bytes)
+    return size
+
+
+# アップロードファイルを読み込み用に開く
+# Starletteが一時ファイルへ書き出したファイルを先頭に戻してそのまま渡し、バイト列へのコピーを作らない
+def open_upload(file: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> BinaryIO:
+    check_upload_size(file, max_bytes)
+    return file.file
+
+
+# アップロードファイルを指定ディレクトリへ少しずつコピーし、コピーしながら内容のハッシュを計算する
+async def save_upload(
+    file: UploadFile, directory: str, max_bytes: int = MAX_UPLOAD_BYTES, suffix: Optional[str] = None
+) -> StoredUpload:
+    check_upload_size(file, max_bytes)
+    os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=directory, suffix=suffix)
+
+    def copy() -> StoredUpload:
+        digest = hashlib.sha256()
+        size = 0
+        file.file.seek(0)
+        with os.fdopen(fd, 'wb') as upload_file:
+            for chunk in iter(lambda: file.file.read(UPLOAD_CHUNK_SIZE), b''):
+                # サイズが申告と異なる場合に備え、コピー中も上限を確認する
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _upload_too_large(max_bytes)
+                digest.update(chunk)
+                upload_file.write(chunk)
+        file.file.seek(0)
+        return StoredUpload(path=path, size=size, sha256=digest.hexdigest())
+
+    try:
+        return await asyncio.get_running_loop().run_in_executor(None, copy)
+    except Exception:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
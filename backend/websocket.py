@@ -1,6 +1,9 @@
 import asyncio
 import json
-from typing import Optional
+import logging
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, Cookie
 from jose import JWTError, jwt
@@ -8,45 +11,268 @@ from sqlalchemy.orm import Session
 from starlette.websockets import WebSocketState
 
 from backend.auth import SECRET_KEY, ALGORITHM
-from backend.models import get_db
+from backend.models import SessionLocal, get_db
 from backend.api.general.models import Employee
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# 接続ごとの送信待ちメッセージの上限（超えた場合は古いものから破棄する）
+SEND_QUEUE_SIZE = 16
+
+# 1件の送信を待つ最大時間（秒）。応答しない接続は切断する
+SEND_TIMEOUT = 10
+
+# 送信キューの破棄を記録する最短の間隔（秒）。間隔内の破棄は次の記録でまとめて件数を出す
+DROP_LOG_INTERVAL = 60
+
+# 送信キューの状況をログに記録する間隔（秒）
+QUEUE_METRICS_LOG_SECONDS = 300
+
+# 1ページあたりの表示件数の上限（画面で選択できる最大の件数）
+MAX_ITEMS_PER_PAGE = 50
+
+# 一覧の更新通知の統合キー（未送信の古い一覧は最新の一覧で置き換える）
+LIST_UPDATE_KEY = "updated_data"
+
+
+# 接続ごとの送信キューと送信タスク
+# 遅い接続があっても他の接続への送信を待たせないよう、送信は接続ごとのタスクで行う
+class ConnectionSender:
+    def __init__(self, websocket: WebSocket, on_error: Callable[[WebSocket], None], max_size: int = SEND_QUEUE_SIZE):
+        self.websocket = websocket
+        self.max_size = max_size
+        self.queue: Deque[Tuple[Optional[str], str]] = deque()
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self._logged_dropped = 0
+        self._last_drop_log: Optional[float] = None
+        self._on_error = on_error
+        self._ready = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    def put(self, message: str, key: Optional[str] = None):
+        """メッセージを送信キューに追加する（同じキーの未送信メッセージがあれば置き換える）"""
+        if key is not None:
+            for index, (queued_key, _) in enumerate(self.queue):
+                if queued_key == key:
+                    self.queue[index] = (key, message)
+                    self.coalesced += 1
+                    return
+
+        if len(self.queue) >= self.max_size:
+            self.queue.popleft()
+            self.dropped += 1
+            self._log_dropped()
+
+        self.queue.append((key, message))
+        self._ready.set()
+
+    def _log_dropped(self):
+        """破棄をログに記録する（DROP_LOG_INTERVALに1回まで、前回の記録以降の件数をまとめて出す）"""
+        current = time.monotonic()
+        if self._last_drop_log is not None and current - self._last_drop_log < DROP_LOG_INTERVAL:
+            return
+        logger.warning(
+            f"WebSocket送信キューが上限に達したため古いメッセージを破棄しました"
+            f"（ユーザー: {self.websocket.scope.get('user')}、破棄: {self.dropped - self._logged_dropped}件、累計: {self.dropped}件）"
+        )
+        self._last_drop_log = current
+        self._logged_dropped = self.dropped
+
+    def close(self):
+        self._task.cancel()
+
+    async def _run(self):
+        while True:
+            await self._ready.wait()
+            while self.queue:
+                _, message = self.queue.popleft()
+                try:
+                    await asyncio.wait_for(self.websocket.send_text(message), SEND_TIMEOUT)
+                    self.sent += 1
+                except Exception:
+                    # 切断してクライアントに再接続させてから、管理対象から外す
+                    await self._close()
+                    self._on_error(self.websocket)
+                    return
+            self._ready.clear()
+
+    async def _close(self):
+        try:
+            await asyncio.wait_for(self.websocket.close(code=1011), SEND_TIMEOUT)
+        except Exception:
+            pass
+
 
 class WebSocketManager:
     def __init__(self):
         self.active_connections = {}
+        # トピック（接続パス）ごとの購読中の接続
+        self.subscriptions: Dict[str, Set[WebSocket]] = {}
+        # 接続ごとの送信キュー
+        self.senders: Dict[WebSocket, ConnectionSender] = {}
+        self._metrics_task: Optional[asyncio.Task] = None
 
-    async def connect(self, websocket: WebSocket, user: Employee):
-        """ユーザー認証済みの接続を受け入れる"""
+    async def connect(self, websocket: WebSocket, user: Employee, topic: str = ""):
+        """ユーザー認証済みの接続を受け入れ、接続パスのトピックを購読する"""
         websocket.scope["user"] = user.employee_no  # ユーザー情報を保存
         await websocket.accept()
         self.active_connections[websocket] = {
+            "topic": topic,
             "searchQuery": "",
             "currentPage": 1,
             "itemsPerPage": 10
         }
+        self.subscriptions.setdefault(topic, set()).add(websocket)
+        self.senders[websocket] = ConnectionSender(websocket, self.disconnect)
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            del self.active_connections[websocket]
+        sender = self.senders.pop(websocket, None)
+        if sender is not None:
+            sender.close()
+
+        filters = self.active_connections.pop(websocket, None)
+        if filters is None:
+            return
+
+        subscribers = self.subscriptions.get(filters["topic"])
+        if subscribers is not None:
+            subscribers.discard(websocket)
+            if not subscribers:
+                del self.subscriptions[filters["topic"]]
+
+    def update_filters(self, websocket: WebSocket, data) -> bool:
+        """クライアントから受信した検索条件を検証して保存する（不正な場合は保存せずFalseを返す）"""
+        filters = self.active_connections.get(websocket)
+        parsed = parse_filters(data)
+        if filters is None or parsed is None:
+            return False
+        filters.update(parsed)
+        return True
+
+    def get_subscribers(self, topic: str) -> List[WebSocket]:
+        """トピックを購読中の接続（送信中の切断に備えて複製を返す）"""
+        return list(self.subscriptions.get(topic, ()))
+
+    def send(self, websocket: WebSocket, message: str, key: Optional[str] = None):
+        """接続の送信キューにメッセージを追加する（送信の完了は待たない）"""
+        sender = self.senders.get(websocket)
+        if sender is not None:
+            sender.put(message, key)
 
     async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
+        self.send(websocket, message)
 
-    async def broadcast_filtered(self, db: Session, get_func):
-        for websocket, filters in self.active_connections.items():
-            search_query = filters["searchQuery"]
-            current_page = filters["currentPage"]
-            items_per_page = filters["itemsPerPage"]
+    def send_to_user(self, employee_no: str, message: str, key: Optional[str] = None):
+        """指定したユーザーの全ての接続にメッセージを送信する"""
+        for websocket in list(self.active_connections):
+            if websocket.scope.get("user") == employee_no:
+                self.send(websocket, message, key)
 
-            updated_data, total_count = get_func(db, search_query, current_page, items_per_page)
-            message = json.dumps({"updated_data": updated_data, "totalCount": total_count}, default=str)
+    async def broadcast_filtered(self, get_func, topic: str):
+        """トピックの購読者に、それぞれの検索条件で取得した一覧を送信する"""
+        # 検索条件が同じ接続をまとめ、一覧の取得とJSON化は条件ごとに1回だけ行う
+        # 送信は接続ごとのキューに積むだけなので、遅い接続が他の接続への配信を遅らせない
+        groups = self._group_by_filters(topic)
+        if not groups:
+            return
+
+        # 一覧の取得はイベントループを止めないようスレッドプールで行う
+        messages = await asyncio.get_running_loop().run_in_executor(None, _render_lists, get_func, list(groups))
+        for filters, message in messages.items():
+            for websocket in groups[filters]:
+                self.send(websocket, message, LIST_UPDATE_KEY)
+
+    def _group_by_filters(self, topic: str) -> Dict[Tuple, List[WebSocket]]:
+        """トピックの購読者を検索条件（検索語・ページ・表示件数）ごとにまとめる"""
+        groups: Dict[Tuple, List[WebSocket]] = {}
+        for websocket in self.get_subscribers(topic):
+            filters = self.active_connections.get(websocket)
+            if filters is None:
+                continue
 
+            # 検索条件が壊れている接続は、他の接続への配信を止めないよう対象外にする
             try:
-                await websocket.send_text(message)
-            except Exception:
-                self.disconnect(websocket)
+                key = (filters["searchQuery"], filters["currentPage"], filters["itemsPerPage"])
+                groups.setdefault(key, []).append(websocket)
+            except (KeyError, TypeError):
+                logger.warning(f"検索条件が不正なため一覧を配信しません（ユーザー: {websocket.scope.get('user')}）")
+        return groups
+
+    def get_queue_metrics(self) -> Dict[str, int]:
+        """送信キューの状況（接続数・未送信件数・最大の滞留数・破棄件数・置き換え件数）"""
+        senders = list(self.senders.values())
+        return {
+            "connections": len(senders),
+            "queued": sum(len(sender.queue) for sender in senders),
+            "max_queue_depth": max((len(sender.queue) for sender in senders), default=0),
+            "dropped": sum(sender.dropped for sender in senders),
+            "coalesced": sum(sender.coalesced for sender in senders)
+        }
+
+    def log_queue_metrics(self):
+        """送信キューの状況をログに記録する（接続がない場合は記録しない）"""
+        metrics = self.get_queue_metrics()
+        if metrics["connections"]:
+            logger.info(f"WebSocket送信キューの状況: {metrics}")
+
+    async def start_metrics_log(self):
+        """送信キューの状況を一定間隔でログに記録するタスクを起動する（アプリケーションのイベントループ上で呼び出す）"""
+        if self._metrics_task is None:
+            self._metrics_task = asyncio.create_task(self._log_metrics_periodically())
+
+    async def stop_metrics_log(self):
+        """送信キューの状況の記録を停止する"""
+        if self._metrics_task is None:
+            return
+        self._metrics_task.cancel()
+        try:
+            await self._metrics_task
+        except asyncio.CancelledError:
+            pass
+        self._metrics_task = None
+
+    async def _log_metrics_periodically(self):
+        while True:
+            await asyncio.sleep(QUEUE_METRICS_LOG_SECONDS)
+            self.log_queue_metrics()
+
+
+# クライアントから受信した検索条件を検証し、文字列・整数に揃える（不正な場合はNone）
+def parse_filters(data) -> Optional[Dict[str, object]]:
+    if not isinstance(data, dict):
+        return None
+
+    search_query = data.get("searchQuery") or ""
+    if not isinstance(search_query, str):
+        return None
+
+    try:
+        current_page = int(data.get("currentPage", 1))
+        items_per_page = int(data.get("itemsPerPage", 10))
+    except (TypeError, ValueError):
+        return None
+    if current_page < 1 or not 1 <= items_per_page <= MAX_ITEMS_PER_PAGE:
+        return None
+
+    return {"searchQuery": search_query, "currentPage": current_page, "itemsPerPage": items_per_page}
+
+
+# 検索条件ごとの一覧を取得してJSON化する（リクエストとは別の専用セッションを使う）
+def _render_lists(get_func, filter_keys: List[Tuple]) -> Dict[Tuple, str]:
+    db = SessionLocal()
+    try:
+        messages = {}
+        for search_query, current_page, items_per_page in filter_keys:
+            updated_data, total_count = get_func(db, search_query, current_page, items_per_page)
+            messages[(search_query, current_page, items_per_page)] = json.dumps(
+                {"updated_data": updated_data, "totalCount": total_count}, default=str
+            )
+        return messages
+    finally:
+        db.close()
 
 websocket_manager = WebSocketManager()
 
@@ -71,8 +297,8 @@ async def websocket_handler(
         await websocket.close(code=1008)  # 認証失敗
         return
 
-    # 接続を受け入れる
-    await websocket_manager.connect(websocket, employee)
+    # 接続を受け入れ、接続パスをトピックとして購読する
+    await websocket_manager.connect(websocket, employee, path.strip("/"))
 
     # 30分操作がなければ切断する
     async def timeout_disconnect():
@@ -90,16 +316,20 @@ async def websocket_handler(
             try:
                 data = json.loads(raw_data)
             except json.JSONDecodeError:
-                await websocket.send_text(json.dumps({"error": "Invalid JSON format"}))
+                await websocket_manager.send_personal_message(json.dumps({"error": "Invalid JSON format"}), websocket)
                 continue
 
-            # クライアントごとの検索条件を更新
-            websocket_manager.active_connections[websocket]["searchQuery"] = data.get("searchQuery", "")
-            websocket_manager.active_connections[websocket]["currentPage"] = data.get("currentPage", 1)
-            websocket_manager.active_connections[websocket]["itemsPerPage"] = data.get("itemsPerPage", 10)
+            # クライアントごとの検索条件を更新（不正な値の場合はそれまでの条件を使い続ける）
+            if not websocket_manager.update_filters(websocket, data):
+                await websocket_manager.send_personal_message(json.dumps({"error": "Invalid filters"}), websocket)
+                continue
 
             # 新しいメッセージを受信したらタイムをリセット
             timeout_task.cancel()
             timeout_task = asyncio.create_task(timeout_disconnect())
-    except WebSocketDisconnect:
+    except (WebSocketDisconnect, RuntimeError):
+        # RuntimeErrorは送信エラーでサーバー側から切断した後の受信
+        pass
+    finally:
+        timeout_task.cancel()
         websocket_manager.disconnect(websocket)
\ No newline at end of file
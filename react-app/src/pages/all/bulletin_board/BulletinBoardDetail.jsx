@@ -36,6 +36,24 @@ import { successNoti, errorNoti } from '../../../utils/noti';
 
 import '../../../CSS/index.css';
 
+// 列指向形式（format=compact）のセル配列をセルオブジェクトの配列に展開
+const expandCompactCells = (data) => {
+  if (data.format !== 'compact') {
+    return data;
+  }
+  const { rows, cols, values, styles } = data.cells;
+  const palette = data.styles || [];
+  const cells = rows.map((row, index) => {
+    const cell = { row, col: cols[index], value: values[index] };
+    const styleIndex = styles[index];
+    if (styleIndex !== null && styleIndex !== undefined) {
+      cell.style = palette[styleIndex];
+    }
+    return cell;
+  });
+  return { ...data, cells };
+};
+
 const BulletinBoardDetail = () => {
   const { id } = useParams();
   const navigate = useNavigate();
@@ -80,7 +98,7 @@ const BulletinBoardDetail = () => {
       setError(null);
       setErrorDetail(null);
 
-      const response = await fetch(`${API_BASE_URL}/api/all/bulletin_board/${id}`, {
+      const response = await fetch(`${API_BASE_URL}/api/all/bulletin_board/${id}?format=compact`, {
         method: 'GET',
         credentials: 'include',
       });
@@ -105,7 +123,7 @@ const BulletinBoardDetail = () => {
       // 成功した場合はJSONとしてパース
       try {
         const data = JSON.parse(responseText);
-        setBulletinData(data);
+        setBulletinData(expandCompactCells(data));
       } catch (parseError) {
         setError(`データの解析に失敗しました: ${parseError.message}`);
         throw parseError;
@@ -512,15 +530,8 @@ const BulletinBoardDetail = () => {
       );
 
 
-      // データURIを構築
-      let imageDataUri = '';
-      try {
-        if (image.image_data) {
-          imageDataUri = `data:image/${image.image_type || 'png'};base64,${image.image_data}`;
-        }
-      } catch (e) {
-        console.error('画像データURIの構築に失敗:', e);
-      }
+      // 画像URLを構築
+      const imageDataUri = image.image_url ? `${API_BASE_URL}${image.image_url}` : '';
 
       return (
         <div
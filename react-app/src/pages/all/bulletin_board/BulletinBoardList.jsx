@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import {
   Box,
   Typography,
@@ -46,6 +46,8 @@ const BulletinBoardList = () => {
   const [selectedMonth, setSelectedMonth] = useState('current');
   const [filteredPosts, setFilteredPosts] = useState([]);
   const [searchTerm, setSearchTerm] = useState(''); // 検索ワード用のステート
+  // ページ番号ごとの取得開始カーソル（前のページの応答で受け取ったnext_cursor）
+  const pageCursors = useRef({});
 
   // 月の選択肢を生成（現在から過去12ヶ月）
   const months = [];
@@ -82,7 +84,10 @@ const BulletinBoardList = () => {
       setLoading(true);
       setError(null);
 
-      const response = await fetch(`${API_BASE_URL}/api/all/bulletin_board/list?skip=${(page - 1) * 9}&limit=9`, {
+      // カーソルがあるページはその続きから取得し、ない場合（ページを飛ばした場合など）は件数で読み飛ばす
+      const cursor = pageCursors.current[page];
+      const pageQuery = cursor ? `cursor=${encodeURIComponent(cursor)}` : `skip=${(page - 1) * 9}`;
+      const response = await fetch(`${API_BASE_URL}/api/all/bulletin_board/list?${pageQuery}&limit=9&thumbnail=true`, {
         method: 'GET',
         credentials: 'include',
       });
@@ -102,6 +107,9 @@ const BulletinBoardList = () => {
       setBulletinPosts(data.posts);
       setFilteredPosts(data.posts);
       setTotalPages(Math.ceil(data.total / 9));
+      if (data.next_cursor) {
+        pageCursors.current[page + 1] = data.next_cursor;
+      }
     } catch (err) {
       console.error('掲示板リスト取得エラー:', err);
       setError(err.message);
@@ -391,7 +399,7 @@ const BulletinBoardList = () => {
                   }}
                 >
                   <img
-                    src={`data:image/${post.images[0].image_type || 'png'};base64,${post.images[0].image_data}`}
+                    src={`${API_BASE_URL}${post.images[0].thumbnail_url || post.images[0].image_url}`}
                     alt={`${post.title}の1枚目の画像`}
                     style={{
                       width: '100%',
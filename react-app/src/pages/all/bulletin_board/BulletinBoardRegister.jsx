@@ -16,7 +16,7 @@ import {
   DialogTitle
 } from '@mui/material';
 import { UploadFile as UploadFileIcon, Send as SendIcon } from '@mui/icons-material';
-import { API_BASE_URL } from '../../../config/baseURL';
+import { API_BASE_URL, WS_BASE_URL } from '../../../config/baseURL';
 import { useNavigate } from 'react-router-dom';
 import AuthService from '../../../services/auth';
 
@@ -38,6 +38,9 @@ const BulletinBoardRegister = () => {
   // 現在のユーザー情報
   const [currentUser, setCurrentUser] = useState(null);
 
+  // 解析ジョブの進捗（0〜100）
+  const [jobProgress, setJobProgress] = useState(null);
+
   const fileInputRef = useRef(null);
 
   useEffect(() => {
@@ -97,6 +100,64 @@ const BulletinBoardRegister = () => {
     setSubmitDialogOpen(false);
   };
 
+  // 解析ジョブの完了を待つ（WebSocketで進捗を受け取り、接続できない場合は定期的に状態を確認する）
+  const waitForJob = (jobId) => new Promise((resolve, reject) => {
+    const currentUser = JSON.parse(localStorage.getItem("currentUser") || "{}");
+    let ws = null;
+    let pollTimer = null;
+
+    const finish = (job) => {
+      if (ws) ws.close();
+      clearInterval(pollTimer);
+      if (job.status === 'succeeded') {
+        resolve(job);
+      } else {
+        reject(new Error(job.message || '解析に失敗しました'));
+      }
+    };
+
+    const handleJob = (job) => {
+      if (!job || job.job_id !== jobId) return;
+      setJobProgress(job.progress);
+      if (job.status === 'succeeded' || job.status === 'failed') {
+        finish(job);
+      }
+    };
+
+    const pollJob = async () => {
+      try {
+        const response = await fetch(`${API_BASE_URL}/api/all/bulletin_board/jobs/${jobId}`, {
+          credentials: 'include',
+        });
+        if (response.ok) {
+          handleJob(await response.json());
+        }
+      } catch (err) {
+        console.error('ジョブ状態の取得に失敗:', err);
+      }
+    };
+
+    try {
+      ws = new WebSocket(`${WS_BASE_URL}/ws/bulletin_board/jobs?userId=${currentUser.userId || ''}`);
+      ws.onmessage = (event) => {
+        try {
+          const data = JSON.parse(event.data);
+          if (data.type === 'bulletin_job') {
+            handleJob(data.job);
+          }
+        } catch (err) {
+          console.error('WebSocketメッセージのパースに失敗:', err);
+        }
+      };
+      // 接続前に完了した場合に備えて接続後に一度状態を確認する
+      ws.onopen = pollJob;
+    } catch (err) {
+      console.error('WebSocket connection failed:', err);
+    }
+
+    pollTimer = setInterval(pollJob, 5000);
+  });
+
   const handleSubmit = async () => {
     try {
       setLoading(true);
@@ -128,15 +189,19 @@ const BulletinBoardRegister = () => {
         throw new Error(`HTTP error! Status: ${response.status}`);
       }
 
-      const data = await response.json();
-
-      successNoti(`掲示板への投稿が完了しました`);
+      const job = await response.json();
 
       setSubmitDialogOpen(false);
+      setJobProgress(job.progress);
+
+      // バックグラウンドでの解析完了を待つ
+      const finishedJob = await waitForJob(job.job_id);
+
+      successNoti(`掲示板への投稿が完了しました`);
 
       // 投稿完了後、掲示板詳細画面へ遷移
       setTimeout(() => {
-        navigate(`/all/bulletin_board/${data.id}`);
+        navigate(`/all/bulletin_board/${finishedJob.bulletin_id}`);
       }, 1500);
 
     } catch (err) {
@@ -144,6 +209,7 @@ const BulletinBoardRegister = () => {
       setError(`投稿に失敗しました: ${err.message}`);
     } finally {
       setLoading(false);
+      setJobProgress(null);
     }
   };
 
@@ -268,8 +334,14 @@ const BulletinBoardRegister = () => {
       </Paper>
 
       {loading && (
-        <Box sx={{ display: 'flex', justifyContent: 'center', mt: 3 }}>
-          <CircularProgress />
+        <Box sx={{ display: 'flex', flexDirection: 'column', alignItems: 'center', mt: 3 }}>
+          <CircularProgress
+            variant={jobProgress ? 'determinate' : 'indeterminate'}
+            value={jobProgress || 0}
+          />
+          {jobProgress !== null && (
+            <Typography sx={{ mt: 1 }}>解析中... {jobProgress}%</Typography>
+          )}
         </Box>
       )}
 